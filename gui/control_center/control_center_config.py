@@ -127,6 +127,7 @@ class ControlCenterConfig:
         'health': '/api/health',
         'stats': '/api/stats',
         'search': '/api/search',
+        'suggest': '/api/suggest',
         'history': '/api/history',
         'cache_stats': '/api/cache/stats',
         'cache_clear': '/api/cache/clear',
@@ -43,13 +43,15 @@ class ReCrawlWorker(QThread):
             # Import crawler components
             from kse.crawler.kse_crawler_core import CrawlerCore
             from kse.storage.kse_storage_manager import StorageManager
-            from kse.core.kse_config import ConfigManager
+            from kse.core.kse_config import ConfigManager, get_config
+            from kse.core.kse_memory_budget import MemoryBudget
             
             self.progress.emit(20, "Loading configuration...")
             
             # Initialize storage
             config_manager = ConfigManager()
             storage_manager = StorageManager(config_manager.config)
+            memory_budget = MemoryBudget.from_config(get_config())
             
             self.progress.emit(30, "Creating crawler instance...")
             
@@ -62,7 +64,8 @@ class ReCrawlWorker(QThread):
                 crawl_depth=self.crawl_config.get('crawl_depth', 100),
                 respect_robots=self.crawl_config.get('respect_robots', True),
                 dynamic_speed=self.crawl_config.get('dynamic_speed', True),
-                max_workers=self.crawl_config.get('max_workers', 5)
+                max_workers=self.crawl_config.get('max_workers', 5),
+                memory_budget=memory_budget
             )
             
             self.progress.emit(40, "Starting domain crawl...")
@@ -74,9 +77,12 @@ class ReCrawlWorker(QThread):
             
             # Re-index the crawled pages
             from kse.indexing.kse_indexer_pipeline import IndexerPipeline
-            indexer = IndexerPipeline(storage_manager)
+            indexer = IndexerPipeline(storage_manager, memory_budget=memory_budget)
             
+            # All pages are in storage if memory pressure released some
             pages = crawler.get_crawled_pages()
+            if crawler.get_crawl_stats()['pages_released']:
+                pages = crawler.load_all_crawled_pages()
             indexer.index_pages(pages)
             
             self.progress.emit(95, "Saving index...")
@@ -18,6 +18,8 @@ from PyQt6.QtGui import QFont, QTextCursor
 
 from gui.kse_gui_config import GUIConfig
 from gui.kse_gui_styles import Styles
+from kse.core.kse_config import get_config
+from kse.core.kse_memory_budget import MemoryBudget
 from kse.crawler.kse_crawler_core import CrawlerCore
 from kse.storage.kse_storage_manager import StorageManager
 
@@ -63,6 +65,9 @@ class CrawlerThread(QThread):
             storage_path = Path(self.config['storage_path'])
             storage_manager = StorageManager(storage_path)
             
+            # Shared by crawler and indexer: pages are moved to storage under memory pressure
+            memory_budget = MemoryBudget.from_config(get_config())
+            
             # Get domains to crawl
             domains = self.config['domains']
             self.total_domains = len(domains)
@@ -78,7 +83,8 @@ class CrawlerThread(QThread):
                 max_retries=3,
                 crawl_depth=self.config.get('crawl_depth', 50),
                 respect_robots=self.config.get('respect_robots', True),
-                dynamic_speed=self.config.get('dynamic_speed', False)
+                dynamic_speed=self.config.get('dynamic_speed', False),
+                memory_budget=memory_budget
             )
             
             self.log_message.emit('success', f"Crawler initialized for {self.total_domains} domains")
@@ -158,10 +164,12 @@ class CrawlerThread(QThread):
                     
                     # Initialize indexer
                     nlp_core = NLPCore(enable_lemmatization=True, enable_stopword_removal=True)
-                    indexer = IndexerPipeline(storage_manager, nlp_core)
+                    indexer = IndexerPipeline(storage_manager, nlp_core, memory_budget=memory_budget)
                     
-                    # Get crawled pages
+                    # Get crawled pages (all of them are in storage if memory pressure released some)
                     pages = self.crawler.get_crawled_pages()
+                    if self.crawler.get_crawl_stats()['pages_released']:
+                        pages = self.crawler.load_all_crawled_pages()
                     
                     # Index pages
                     index_stats = indexer.index_pages(pages)
@@ -1,59 +1,137 @@
 """
 Cache Manager - Cache orchestration for KSE
-Manages in-memory caching for search results and processed queries
+Manages in-memory caching for search results and processed queries, optionally
+backed by a persistent on-disk second tier
 """
 
 import logging
-from typing import Any, Optional, Dict
+from pathlib import Path
+from typing import Any, Optional, Dict, Tuple
 from datetime import datetime, timedelta
 
+from kse.core.kse_memory_budget import MemoryBudget
+
 logger = logging.getLogger(__name__)
 
 
 class CacheManager:
     """Main cache orchestration layer"""
     
-    def __init__(self, max_size_mb: int = 100, default_ttl: int = 3600):
+    PERSISTENT_CACHES = ('search', 'result')  # Query analyses are cheaper to redo than to read from disk
+    
+    def __init__(
+        self,
+        max_size_mb: int = 100,
+        default_ttl: int = 3600,
+        admission: str = 'lru',
+        shards: int = 1,
+        disk_cache_dir: Optional[Path] = None,
+        disk_max_size_mb: int = 256,
+        postings_cache_mb: int = 32,
+        postings_min_document_frequency: int = 64,
+        memory_budget: Optional[MemoryBudget] = None
+    ):
         """
         Initialize cache manager
         
         Args:
             max_size_mb: Maximum cache size in megabytes
             default_ttl: Default time-to-live in seconds (default: 1 hour)
+            admission: Cache admission policy, 'lru' or 'tinylfu' (see MemoryCache)
+            shards: Lock-striped segments per cache (1 = a single MemoryCache)
+            disk_cache_dir: Directory for the persistent L2 cache (None = memory only)
+            disk_max_size_mb: Maximum size of the L2 cache in megabytes
+            postings_cache_mb: Maximum size of decoded posting lists kept for the index
+            postings_min_document_frequency: Shortest posting list worth keeping decoded
+            memory_budget: Process MemoryBudget the caches give memory back to under pressure
         """
         self.max_size_mb = max_size_mb
         self.default_ttl = default_ttl
+        self.admission = admission
+        self.shards = shards
         self.caches = {}
         
         # Initialize specialized caches
-        from kse.cache.kse_memory_cache import MemoryCache
         from kse.cache.kse_cache_policy import CachePolicy
+        from kse.cache.kse_cache_stats import CacheStats
         
-        self.search_cache = MemoryCache(name="search", max_size_mb=max_size_mb // 2)
-        self.query_cache = MemoryCache(name="query", max_size_mb=max_size_mb // 4)
-        self.result_cache = MemoryCache(name="result", max_size_mb=max_size_mb // 4)
+        self.search_cache = self._create_cache("search", max_size_mb // 2)
+        self.query_cache = self._create_cache("query", max_size_mb // 4)
+        self.result_cache = self._create_cache("result", max_size_mb // 4)
         
         self.policy = CachePolicy()
         
-        logger.info(f"CacheManager initialized (max_size={max_size_mb}MB, ttl={default_ttl}s)")
+        # Decoded posting lists, attached to the inverted index by the search pipeline
+        from kse.cache.kse_postings_cache import PostingsCache
+        self.postings_cache = PostingsCache(
+            max_size_mb=postings_cache_mb,
+            min_document_frequency=postings_min_document_frequency
+        )
+        
+        # L2: entries survive restarts; L1 misses are looked up here before recomputing
+        self.disk_cache = None
+        if disk_cache_dir is not None:
+            from kse.cache.kse_disk_cache import DiskCache
+            self.disk_cache = DiskCache(disk_cache_dir, max_size_mb=disk_max_size_mb)
+        
+        # Lookups per tier (L2 only sees L1 misses)
+        self.l1_stats = CacheStats()
+        self.l2_stats = CacheStats()
+        self.stale_misses = 0  # Entries found but computed against an older index generation
+        
+        if memory_budget is not None:
+            memory_budget.register('caches', self.get_memory_usage, self.shrink, priority=0)
+        
+        logger.info(f"CacheManager initialized (max_size={max_size_mb}MB, ttl={default_ttl}s, "
+                    f"admission={admission}, shards={shards}, disk={'on' if self.disk_cache else 'off'})")
+    
+    def _create_cache(self, name: str, max_size_mb: int):
+        """Create one named cache, sharded if more than one shard is configured"""
+        if self.shards > 1:
+            from kse.cache.kse_sharded_cache import ShardedCache
+            return ShardedCache(name=name, max_size_mb=max_size_mb, shards=self.shards, admission=self.admission)
+        
+        from kse.cache.kse_memory_cache import MemoryCache
+        return MemoryCache(name=name, max_size_mb=max_size_mb, admission=self.admission)
     
-    def get(self, cache_name: str, key: str) -> Optional[Any]:
+    def _is_stale(self, entry: Tuple[Optional[int], Any], generation: Optional[int]) -> bool:
+        """Check if a tagged entry was computed against another index generation"""
+        if generation is not None and entry[0] != generation:
+            self.stale_misses += 1
+            return True
+        return False
+    
+    def get(self, cache_name: str, key: str, generation: Optional[int] = None) -> Optional[Any]:
         """
         Get value from cache
         
         Args:
             cache_name: Name of cache ('search', 'query', 'result')
             key: Cache key
+            generation: Current index generation; entries tagged with another one are
+                misses (they are replaced lazily by the next set)
         
         Returns:
             Cached value or None
         """
         cache = self._get_cache(cache_name)
         if cache:
-            value = cache.get(key)
-            if value is not None:
+            entry = cache.get(key)
+            if entry is not None and not self._is_stale(entry, generation):
+                self.l1_stats.record_hit()
                 logger.debug(f"Cache HIT: {cache_name}/{key}")
-                return value
+                return entry[1]
+            self.l1_stats.record_miss()
+            
+            if self.disk_cache is not None and entry is None and cache_name in self.PERSISTENT_CACHES:
+                stored = self.disk_cache.get(cache_name, key)
+                if stored is not None and not self._is_stale(stored[0], generation):
+                    entry, ttl_left = stored
+                    self.l2_stats.record_hit()
+                    cache.set(key, entry, max(1, int(ttl_left)))  # Promote to L1
+                    logger.debug(f"Cache L2 HIT: {cache_name}/{key}")
+                    return entry[1]
+                self.l2_stats.record_miss()
             logger.debug(f"Cache MISS: {cache_name}/{key}")
         return None
     
@@ -62,7 +140,8 @@ class CacheManager:
         cache_name: str,
         key: str,
         value: Any,
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        generation: Optional[int] = None
     ) -> None:
         """
         Set value in cache
@@ -72,11 +151,15 @@ class CacheManager:
             key: Cache key
             value: Value to cache
             ttl: Time-to-live in seconds (uses default if None)
+            generation: Index generation the value was computed against
         """
         cache = self._get_cache(cache_name)
         if cache:
             ttl = ttl or self.default_ttl
-            cache.set(key, value, ttl)
+            entry = (generation, value)
+            cache.set(key, entry, ttl)
+            if self.disk_cache is not None and cache_name in self.PERSISTENT_CACHES:
+                self.disk_cache.set(cache_name, key, entry, ttl)
             logger.debug(f"Cache SET: {cache_name}/{key} (ttl={ttl}s)")
     
     def _get_cache(self, cache_name: str):
@@ -100,32 +183,82 @@ class CacheManager:
             cache = self._get_cache(cache_name)
             if cache:
                 cache.clear()
+                if self.disk_cache is not None:
+                    self.disk_cache.clear(cache_name)
                 logger.info(f"Cleared cache: {cache_name}")
         else:
             self.search_cache.clear()
             self.query_cache.clear()
             self.result_cache.clear()
+            self.postings_cache.clear()
+            if self.disk_cache is not None:
+                self.disk_cache.clear()
             logger.info("Cleared all caches")
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        from kse.cache.kse_cache_stats import CacheStats
-        stats = CacheStats()
+        l1 = self.l1_stats.get_statistics()
+        l2 = self.l2_stats.get_statistics()
+        served = l1['total_hits'] + l2['total_hits']
         
-        return {
+        stats = {
             'search_cache': self.search_cache.get_stats(),
             'query_cache': self.query_cache.get_stats(),
             'result_cache': self.result_cache.get_stats(),
+            'postings_cache': self.postings_cache.get_stats(),
             'total_size_mb': (
                 self.search_cache.get_size_mb() +
                 self.query_cache.get_size_mb() +
-                self.result_cache.get_size_mb()
-            )
+                self.result_cache.get_size_mb() +
+                self.postings_cache.get_size_mb()
+            ),
+            'tiers': {
+                'l1_hits': l1['total_hits'],
+                'l1_hit_rate_percent': l1['hit_rate_percent'],
+                'l2_hits': l2['total_hits'],
+                'l2_hit_rate_percent': l2['hit_rate_percent'],  # Of L1 misses
+                'misses': l1['total_misses'] - l2['total_hits'],
+                'stale_misses': self.stale_misses,
+                'hit_rate_percent': round(served / l1['total_requests'] * 100, 2) if l1['total_requests'] else 0
+            }
         }
+        if self.disk_cache is not None:
+            stats['disk_cache'] = self.disk_cache.get_stats()
+        return stats
+    
+    def get_memory_usage(self) -> int:
+        """Bytes held by the in-memory caches"""
+        return int((
+            self.search_cache.get_size_mb() +
+            self.query_cache.get_size_mb() +
+            self.result_cache.get_size_mb() +
+            self.postings_cache.get_size_mb()
+        ) * 1024 * 1024)
+    
+    def shrink(self, nbytes: int) -> int:
+        """
+        Evict in-memory entries to give memory back, cheapest to recompute first
+        
+        Search results go last; with a disk tier they stay available from L2.
+        
+        Args:
+            nbytes: Bytes to free
+        
+        Returns:
+            Bytes freed
+        """
+        freed = 0
+        for cache in (self.postings_cache, self.query_cache, self.result_cache, self.search_cache):
+            if freed >= nbytes:
+                break
+            freed += cache.shrink(nbytes - freed)
+        return freed
     
     def cleanup_expired(self) -> None:
         """Remove expired cache entries"""
         self.search_cache.cleanup_expired()
         self.query_cache.cleanup_expired()
         self.result_cache.cleanup_expired()
+        if self.disk_cache is not None:
+            self.disk_cache.cleanup_expired()
         logger.info("Cleaned up expired cache entries")
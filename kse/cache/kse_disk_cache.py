@@ -0,0 +1,210 @@
+"""
+Disk Cache - Persistent second-tier cache
+SQLite-backed key/value store with TTLs and a size cap, surviving restarts
+"""
+
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """On-disk cache of pickled values, evicting least recently used entries"""
+    
+    DB_FILE = "cache.sqlite3"
+    EVICT_FRACTION = 0.1  # Share of the cap freed per eviction pass, so passes are rare
+    
+    def __init__(self, directory: Path, max_size_mb: int = 256):
+        """
+        Initialize disk cache
+        
+        Args:
+            directory: Directory of the cache database (e.g. storage/cache)
+            max_size_mb: Maximum total size of stored values in megabytes
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / self.DB_FILE
+        self.max_size_mb = max_size_mb
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " cache TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+            " expires REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL,"
+            " PRIMARY KEY (cache, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        logger.info(f"DiskCache opened at {self.path} ({self._bytes / (1024 * 1024):.1f}MB, max_size={max_size_mb}MB)")
+    
+    def get(self, cache_name: str, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Get value from disk
+        
+        Args:
+            cache_name: Name of the cache the entry belongs to
+            key: Cache key
+        
+        Returns:
+            (value, seconds left to live), or None if not found or expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires FROM entries WHERE cache = ? AND key = ?", (cache_name, key)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE entries SET accessed = ? WHERE cache = ? AND key = ?", (now, cache_name, key)
+            )
+            self.hits += 1
+        
+        try:
+            return pickle.loads(row[0]), row[1] - now
+        except Exception as e:
+            logger.warning(f"Dropping unreadable disk cache entry {cache_name}/{key}: {e}")
+            self.delete(cache_name, key)
+            return None
+    
+    def set(self, cache_name: str, key: str, value: Any, ttl: int = 3600) -> None:
+        """
+        Store value on disk
+        
+        Args:
+            cache_name: Name of the cache the entry belongs to
+            key: Cache key
+            value: Picklable value
+            ttl: Time-to-live in seconds
+        """
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"Value for {cache_name}/{key} cannot be stored on disk: {e}")
+            return
+        if len(data) > self.max_bytes:
+            return
+        
+        now = time.time()
+        with self._lock:
+            self._bytes -= self._entry_size(cache_name, key)
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (cache, key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_name, key, data, now + ttl, now, len(data))
+            )
+            self._bytes += len(data)
+            if self._bytes > self.max_bytes:
+                self._evict(now)
+    
+    def _entry_size(self, cache_name: str, key: str) -> int:
+        """Stored size of an entry (0 if absent)"""
+        row = self._db.execute(
+            "SELECT size FROM entries WHERE cache = ? AND key = ?", (cache_name, key)
+        ).fetchone()
+        return row[0] if row else 0
+    
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until below the cap"""
+        self._db.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        target = self.max_bytes * (1 - self.EVICT_FRACTION)
+        freed = 0
+        excess = self._recount() - target
+        if excess > 0:
+            rows = self._db.execute("SELECT cache, key, size FROM entries ORDER BY accessed")
+            victims = []
+            for cache_name, key, size in rows:
+                if freed >= excess:
+                    break
+                victims.append((cache_name, key))
+                freed += size
+            self._db.executemany("DELETE FROM entries WHERE cache = ? AND key = ?", victims)
+            self.evictions += len(victims)
+            self._bytes -= freed
+            logger.debug(f"Evicted {len(victims)} entries from disk cache ({freed} bytes)")
+    
+    def _recount(self) -> int:
+        """Recompute the stored byte total"""
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        return self._bytes
+    
+    def delete(self, cache_name: str, key: str) -> None:
+        """
+        Remove one entry
+        
+        Args:
+            cache_name: Name of the cache the entry belongs to
+            key: Cache key
+        """
+        with self._lock:
+            self._bytes -= self._entry_size(cache_name, key)
+            self._db.execute("DELETE FROM entries WHERE cache = ? AND key = ?", (cache_name, key))
+    
+    def clear(self, cache_name: Optional[str] = None) -> None:
+        """
+        Clear entries
+        
+        Args:
+            cache_name: Cache to clear (clears everything if None)
+        """
+        with self._lock:
+            if cache_name:
+                self._db.execute("DELETE FROM entries WHERE cache = ?", (cache_name,))
+            else:
+                self._db.execute("DELETE FROM entries")
+            self._recount()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+        logger.info(f"Cleared disk cache{f' {cache_name}' if cache_name else ''}")
+    
+    def cleanup_expired(self) -> None:
+        """Remove all expired entries"""
+        with self._lock:
+            removed = self._db.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),)).rowcount
+            self._recount()
+        if removed:
+            logger.info(f"Removed {removed} expired entries from disk cache")
+    
+    def get_size_mb(self) -> float:
+        """Get current size of stored values in megabytes"""
+        return self._bytes / (1024 * 1024)
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._db.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get disk cache statistics"""
+        with self._lock:
+            items = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            total_requests = self.hits + self.misses
+            hit_rate = (self.hits / total_requests * 100) if total_requests > 0 else 0
+            
+            return {
+                'path': str(self.path),
+                'items': items,
+                'size_mb': round(self.get_size_mb(), 2),
+                'max_size_mb': self.max_size_mb,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(hit_rate, 2),
+                'evictions': self.evictions
+            }
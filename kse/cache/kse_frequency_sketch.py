@@ -0,0 +1,91 @@
+"""
+Frequency Sketch - Approximate access counts for cache admission
+Count-Min sketch with small saturating counters and periodic aging
+"""
+
+import logging
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+MAX_COUNT = 15  # Counters saturate, only relative popularity matters
+_HALVE = bytes(count >> 1 for count in range(256))  # translate() table for aging
+# Odd 64-bit multipliers, one hash per row
+_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5)
+
+
+class FrequencySketch:
+    """Count-Min sketch of key popularity with aging (TinyLFU)"""
+    
+    DEPTH = len(_SEEDS)
+    COUNTERS_PER_ITEM = 4  # Row width relative to capacity (fewer collisions between keys)
+    SAMPLE_FACTOR = 10  # Increments per tracked item before all counters are halved
+    
+    def __init__(self, capacity: int):
+        """
+        Initialize frequency sketch
+        
+        Args:
+            capacity: Expected number of distinct cached items
+        """
+        capacity = max(int(capacity), 16)
+        bits = (capacity * self.COUNTERS_PER_ITEM - 1).bit_length()
+        self.width = 1 << bits
+        self._shift = 64 - bits  # Row index = top bits of a multiplicative hash
+        self._rows = [bytearray(self.width) for _ in range(self.DEPTH)]
+        self.sample_size = capacity * self.SAMPLE_FACTOR
+        self._additions = 0
+        self.resets = 0
+    
+    def _indexes(self, key: Any):
+        """Counter index of a key in each row"""
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        for seed in _SEEDS:
+            yield ((h ^ seed) * seed & 0xFFFFFFFFFFFFFFFF) >> self._shift
+    
+    def increment(self, key: Any) -> None:
+        """
+        Record one access of a key
+        
+        Args:
+            key: Cache key
+        """
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < MAX_COUNT:
+                row[index] += 1
+        
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._age()
+    
+    def frequency(self, key: Any) -> int:
+        """
+        Estimate how often a key was accessed recently
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Estimated access count (never below the true count, up to MAX_COUNT)
+        """
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+    
+    def _age(self) -> None:
+        """Halve all counters so old popularity fades"""
+        self._rows = [bytearray(row.translate(_HALVE)) for row in self._rows]
+        self._additions //= 2
+        self.resets += 1
+    
+    def clear(self) -> None:
+        """Forget all counts"""
+        self._rows = [bytearray(self.width) for _ in range(self.DEPTH)]
+        self._additions = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sketch statistics"""
+        return {
+            'width': self.width,
+            'depth': self.DEPTH,
+            'sample_size': self.sample_size,
+            'resets': self.resets
+        }
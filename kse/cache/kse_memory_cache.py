@@ -1,6 +1,6 @@
 """
 Memory Cache - In-memory cache implementation
-Thread-safe LRU cache with TTL support
+Thread-safe LRU cache with TTL support and optional W-TinyLFU admission
 """
 
 import logging
@@ -10,13 +10,83 @@ from collections import OrderedDict
 import threading
 import sys
 
+from kse.cache.kse_frequency_sketch import FrequencySketch
+
 logger = logging.getLogger(__name__)
 
+ADMISSION_POLICIES = ('lru', 'tinylfu')
+_ATOMIC_TYPES = (str, bytes, bytearray, int, float, bool, type(None))
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory held by a value, following containers and object attributes
+    
+    Args:
+        value: Value to measure
+    
+    Returns:
+        Size in bytes (objects reachable more than once are counted once)
+    """
+    seen = set()
+    total = 0
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        
+        if isinstance(obj, _ATOMIC_TYPES):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, '__dict__'):
+            stack.append(obj.__dict__)
+    return total
+
+
+class _CountingLock:
+    """threading.Lock that counts acquisitions which had to wait for another thread"""
+    
+    __slots__ = ('_lock', 'waits')
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits = 0
+    
+    def __enter__(self):
+        if not self._lock.acquire(blocking=False):
+            self._lock.acquire()
+            self.waits += 1
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._lock.release()
+
 
 class MemoryCache:
-    """In-memory cache with LRU eviction and TTL"""
+    """In-memory cache with LRU eviction and TTL
     
-    def __init__(self, name: str = "default", max_size_mb: int = 50, max_items: int = 10000):
+    With admission='tinylfu' (W-TinyLFU) new entries first go to a small LRU
+    window. An entry pushed out of the window only enters the main LRU if a
+    frequency sketch says it is requested more often than the main region's
+    eviction victim, so one-off queries cannot flush popular ones.
+    """
+    
+    WINDOW_FRACTION = 0.01  # Share of items and bytes given to the admission window
+    
+    def __init__(
+        self,
+        name: str = "default",
+        max_size_mb: int = 50,
+        max_items: int = 10000,
+        admission: str = 'lru'
+    ):
         """
         Initialize memory cache
         
@@ -24,19 +94,37 @@ class MemoryCache:
             name: Cache name for logging
             max_size_mb: Maximum size in megabytes
             max_items: Maximum number of items
+            admission: 'lru' (admit everything) or 'tinylfu' (frequency-based admission)
         """
+        if admission not in ADMISSION_POLICIES:
+            raise ValueError(f"Unknown cache admission policy: {admission}")
+        
         self.name = name
         self.max_size_mb = max_size_mb
         self.max_items = max_items
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.admission = admission
         
-        self._cache = OrderedDict()
-        self._metadata = {}  # Stores TTL and timestamp
-        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # Main region in LRU order
+        self._metadata = {}  # Stores TTL, timestamp and size
+        self._lock = _CountingLock()
+        self._bytes = 0  # Running total of entry sizes (window included)
+        
+        # W-TinyLFU admission window and frequency sketch
+        self._window = OrderedDict()
+        self._window_bytes = 0
+        self._sketch = None
+        if admission == 'tinylfu':
+            self._sketch = FrequencySketch(max_items)
+            self.window_items = max(1, int(max_items * self.WINDOW_FRACTION))
+            self.window_max_bytes = max(1, int(self.max_bytes * self.WINDOW_FRACTION))
         
         self.hits = 0
         self.misses = 0
+        self.evictions = 0
+        self.rejections = 0  # Entries refused by admission or too large to cache
         
-        logger.info(f"MemoryCache '{name}' initialized (max_size={max_size_mb}MB, max_items={max_items})")
+        logger.info(f"MemoryCache '{name}' initialized (max_size={max_size_mb}MB, max_items={max_items}, admission={admission})")
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -49,22 +137,25 @@ class MemoryCache:
             Cached value or None if not found or expired
         """
         with self._lock:
-            if key not in self._cache:
+            if self._sketch is not None:
+                self._sketch.increment(key)
+            
+            region = self._window if key in self._window else self._cache
+            if key not in region:
                 self.misses += 1
                 return None
             
             # Check if expired
             metadata = self._metadata.get(key)
             if metadata and self._is_expired(metadata):
-                del self._cache[key]
-                del self._metadata[key]
+                self._remove(key)
                 self.misses += 1
                 return None
             
             # Move to end (LRU)
-            self._cache.move_to_end(key)
+            region.move_to_end(key)
             self.hits += 1
-            return self._cache[key]
+            return region[key]
     
     def set(self, key: str, value: Any, ttl: int = 3600) -> None:
         """
@@ -75,21 +166,34 @@ class MemoryCache:
             value: Value to cache
             ttl: Time-to-live in seconds
         """
+        size = estimate_size(value)
+        
         with self._lock:
             # Remove if exists (to update)
-            if key in self._cache:
-                del self._cache[key]
+            if key in self._metadata:
+                self._remove(key)
+            
+            if size > self.max_bytes:
+                self.rejections += 1
+                logger.debug(f"Not caching '{key}' in {self.name} cache ({size} bytes exceeds the cache size)")
+                return
             
-            # Add new entry
-            self._cache[key] = value
             self._metadata[key] = {
                 'timestamp': datetime.now(),
                 'ttl': ttl,
-                'size': sys.getsizeof(value)
+                'size': size
             }
+            self._bytes += size
             
-            # Check size limits and evict if necessary
-            self._evict_if_needed()
+            if self._sketch is None:
+                self._cache[key] = value
+                # Check size limits and evict if necessary
+                self._evict_if_needed()
+            else:
+                self._sketch.increment(key)
+                self._window[key] = value
+                self._window_bytes += size
+                self._drain_window()
     
     def _is_expired(self, metadata: Dict[str, Any]) -> bool:
         """Check if cache entry is expired"""
@@ -98,33 +202,101 @@ class MemoryCache:
         expiry = timestamp + timedelta(seconds=ttl)
         return datetime.now() > expiry
     
+    def _remove(self, key: str) -> None:
+        """Drop an entry from whichever region holds it"""
+        metadata = self._metadata.pop(key)
+        self._bytes -= metadata['size']
+        if key in self._window:
+            del self._window[key]
+            self._window_bytes -= metadata['size']
+        else:
+            del self._cache[key]
+    
     def _evict_if_needed(self) -> None:
         """Evict entries if cache is over limits"""
         # Check item count limit
         while len(self._cache) > self.max_items:
             # Remove oldest (first item in OrderedDict)
             oldest_key = next(iter(self._cache))
-            del self._cache[oldest_key]
-            del self._metadata[oldest_key]
+            self._remove(oldest_key)
+            self.evictions += 1
             logger.debug(f"Evicted '{oldest_key}' from {self.name} cache (item limit)")
         
         # Check size limit
-        current_size_mb = self.get_size_mb()
-        while current_size_mb > self.max_size_mb and len(self._cache) > 0:
+        while self._bytes > self.max_bytes and len(self._cache) > 0:
             # Remove oldest
             oldest_key = next(iter(self._cache))
-            del self._cache[oldest_key]
-            del self._metadata[oldest_key]
-            current_size_mb = self.get_size_mb()
+            self._remove(oldest_key)
+            self.evictions += 1
             logger.debug(f"Evicted '{oldest_key}' from {self.name} cache (size limit)")
     
+    def _drain_window(self) -> None:
+        """Move entries pushed out of the window into the main region if admitted"""
+        while self._window and (len(self._window) > self.window_items or self._window_bytes > self.window_max_bytes):
+            candidate = next(iter(self._window))
+            value = self._window.pop(candidate)
+            size = self._metadata[candidate]['size']
+            self._window_bytes -= size
+            
+            main_items = max(1, self.max_items - self.window_items)
+            main_bytes = self.max_bytes - self.window_max_bytes
+            candidate_frequency = self._sketch.frequency(candidate)
+            
+            admitted = True
+            while self._cache and (len(self._cache) + 1 > main_items or
+                                   self._bytes - self._window_bytes > main_bytes):
+                victim = next(iter(self._cache))
+                if candidate_frequency <= self._sketch.frequency(victim):
+                    admitted = False
+                    break
+                self._remove(victim)
+                self.evictions += 1
+                logger.debug(f"Evicted '{victim}' from {self.name} cache for more frequent '{candidate}'")
+            
+            if admitted and self._bytes - self._window_bytes <= main_bytes:
+                self._cache[candidate] = value
+            else:
+                del self._metadata[candidate]
+                self._bytes -= size
+                self.rejections += 1
+                logger.debug(f"Admission rejected '{candidate}' from {self.name} cache")
+    
+    def shrink(self, nbytes: int) -> int:
+        """
+        Evict least recently used entries to give memory back
+        
+        Args:
+            nbytes: Bytes to free
+        
+        Returns:
+            Bytes freed
+        """
+        with self._lock:
+            start = self._bytes
+            for region in (self._window, self._cache):
+                while region and start - self._bytes < nbytes:
+                    self._remove(next(iter(region)))
+                    self.evictions += 1
+            freed = start - self._bytes
+        if freed:
+            logger.info(f"Shrunk {self.name} cache by {freed} bytes")
+        return freed
+    
     def clear(self) -> None:
         """Clear all cache entries"""
         with self._lock:
             self._cache.clear()
+            self._window.clear()
             self._metadata.clear()
+            self._bytes = 0
+            self._window_bytes = 0
+            if self._sketch is not None:
+                self._sketch.clear()
             self.hits = 0
             self.misses = 0
+            self.evictions = 0
+            self.rejections = 0
+            self._lock.waits = 0
             logger.info(f"Cleared {self.name} cache")
     
     def cleanup_expired(self) -> None:
@@ -136,19 +308,14 @@ class MemoryCache:
             ]
             
             for key in expired_keys:
-                del self._cache[key]
-                del self._metadata[key]
+                self._remove(key)
             
             if expired_keys:
                 logger.info(f"Removed {len(expired_keys)} expired entries from {self.name} cache")
     
     def get_size_mb(self) -> float:
         """Get current cache size in megabytes"""
-        total_bytes = sum(
-            metadata.get('size', 0)
-            for metadata in self._metadata.values()
-        )
-        return total_bytes / (1024 * 1024)
+        return self._bytes / (1024 * 1024)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
@@ -156,13 +323,22 @@ class MemoryCache:
             total_requests = self.hits + self.misses
             hit_rate = (self.hits / total_requests * 100) if total_requests > 0 else 0
             
-            return {
+            stats = {
                 'name': self.name,
-                'items': len(self._cache),
+                'items': len(self._metadata),
                 'size_mb': round(self.get_size_mb(), 2),
+                'size_bytes': self._bytes,
                 'max_size_mb': self.max_size_mb,
                 'max_items': self.max_items,
                 'hits': self.hits,
                 'misses': self.misses,
-                'hit_rate': round(hit_rate, 2)
+                'hit_rate': round(hit_rate, 2),
+                'evictions': self.evictions,
+                'rejections': self.rejections,
+                'lock_waits': self._lock.waits,
+                'admission': self.admission
             }
+            if self._sketch is not None:
+                stats['window_items'] = len(self._window)
+                stats['sketch'] = self._sketch.get_stats()
+            return stats
@@ -0,0 +1,199 @@
+"""
+Postings Cache - Bounded cache of decoded posting lists
+Keeps the sorted doc-number lists of frequently queried, expensive terms so
+they are not rebuilt from the stored postings on every query
+"""
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+from kse.cache.kse_frequency_sketch import FrequencySketch
+
+logger = logging.getLogger(__name__)
+
+_INT_SIZE = sys.getsizeof(1 << 20)  # Doc numbers past the small-int cache are separate objects
+
+
+def postings_size(postings: List[int]) -> int:
+    """
+    Estimate the memory held by a decoded posting list
+    
+    Args:
+        postings: Sorted document numbers
+    
+    Returns:
+        Size in bytes
+    """
+    return sys.getsizeof(postings) + len(postings) * _INT_SIZE
+
+
+class PostingsCache:
+    """LRU cache of decoded posting lists with cost-aware admission
+    
+    Keys are (segment, term), where the segment is the field the postings
+    belong to (None = main index). Lists shorter than min_document_frequency
+    are cheap to rebuild and are never cached. When the cache is full, a new
+    list only displaces the least recently used one if it is worth more:
+    query frequency (from a frequency sketch) times document frequency, which
+    is what a decode costs.
+    """
+    
+    def __init__(self, max_size_mb: float = 32, min_document_frequency: int = 64, max_items: int = 10000):
+        """
+        Initialize postings cache
+        
+        Args:
+            max_size_mb: Maximum size of the decoded lists in megabytes
+            min_document_frequency: Shortest posting list worth caching
+            max_items: Expected number of distinct queried terms (sizes the frequency sketch)
+        """
+        self.max_size_mb = max_size_mb
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.min_document_frequency = min_document_frequency
+        
+        self._entries: OrderedDict = OrderedDict()  # key -> (postings, size, decode seconds)
+        self._bytes = 0
+        self._sketch = FrequencySketch(max_items)
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0  # Lists refused by admission or larger than the cache
+        self.bypassed = 0  # Lists too short to be worth caching
+        self.decode_time = 0.0  # Seconds spent decoding on misses
+        self.decode_time_saved = 0.0  # Decode seconds avoided by hits
+    
+    def get(self, key: Hashable) -> Optional[List[int]]:
+        """
+        Get a decoded posting list
+        
+        Args:
+            key: (segment, term)
+        
+        Returns:
+            Sorted document numbers, or None if not cached
+        """
+        with self._lock:
+            self._sketch.increment(key)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.decode_time_saved += entry[2]
+            return entry[0]
+    
+    def put(self, key: Hashable, postings: List[int], decode_time: float) -> bool:
+        """
+        Offer a freshly decoded posting list to the cache
+        
+        Args:
+            key: (segment, term)
+            postings: Sorted document numbers
+            decode_time: Seconds the decode took
+        
+        Returns:
+            True if the list was admitted
+        """
+        with self._lock:
+            self.decode_time += decode_time
+            if len(postings) < self.min_document_frequency:
+                self.bypassed += 1
+                return False
+            
+            size = postings_size(postings)
+            if size > self.max_bytes:
+                self.rejections += 1
+                return False
+            
+            value = self._sketch.frequency(key) * len(postings)
+            victims = []
+            freed = 0
+            for victim, (victim_postings, victim_size, _) in self._entries.items():
+                if self._bytes - freed + size <= self.max_bytes:
+                    break
+                if value <= self._sketch.frequency(victim) * len(victim_postings):
+                    self.rejections += 1
+                    logger.debug(f"Postings cache rejected {key} ({len(postings)} docs)")
+                    return False
+                victims.append(victim)
+                freed += victim_size
+            
+            for victim in victims:
+                self._bytes -= self._entries.pop(victim)[1]
+                self.evictions += 1
+            self._entries[key] = (postings, size, decode_time)
+            self._bytes += size
+            return True
+    
+    def shrink(self, nbytes: int) -> int:
+        """
+        Drop least recently used lists to give memory back
+        
+        Args:
+            nbytes: Bytes to free
+        
+        Returns:
+            Bytes freed
+        """
+        freed = 0
+        with self._lock:
+            while self._entries and freed < nbytes:
+                _, (_, size, _) = self._entries.popitem(last=False)
+                self._bytes -= size
+                self.evictions += 1
+                freed += size
+        return freed
+    
+    def invalidate(self) -> None:
+        """Drop all lists after the index changed (statistics and query frequencies are kept)"""
+        with self._lock:
+            if self._entries:
+                self._entries.clear()
+                self._bytes = 0
+    
+    def clear(self) -> None:
+        """Drop all lists and reset statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._sketch.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.rejections = 0
+            self.bypassed = 0
+            self.decode_time = 0.0
+            self.decode_time_saved = 0.0
+        logger.info("Cleared postings cache")
+    
+    def get_size_mb(self) -> float:
+        """Get current size of the cached lists in megabytes"""
+        return self._bytes / (1024 * 1024)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get postings cache statistics"""
+        with self._lock:
+            total_requests = self.hits + self.misses
+            hit_rate = (self.hits / total_requests * 100) if total_requests > 0 else 0
+            
+            return {
+                'items': len(self._entries),
+                'size_mb': round(self.get_size_mb(), 2),
+                'size_bytes': self._bytes,
+                'max_size_mb': self.max_size_mb,
+                'min_document_frequency': self.min_document_frequency,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(hit_rate, 2),
+                'evictions': self.evictions,
+                'rejections': self.rejections,
+                'bypassed': self.bypassed,
+                'decode_time_ms': round(self.decode_time * 1000, 2),
+                'decode_time_saved_ms': round(self.decode_time_saved * 1000, 2)
+            }
@@ -0,0 +1,143 @@
+"""
+Sharded Cache - Lock-striped in-memory cache
+Splits one cache into independent MemoryCache segments chosen by key hash
+"""
+
+import logging
+from typing import Any, Optional, Dict, List
+
+from kse.cache.kse_memory_cache import MemoryCache
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedCache:
+    """MemoryCache split into shards, each with its own lock and LRU
+    
+    Threads working on keys in different shards never wait for each other.
+    Size and item limits are divided evenly, so each shard evicts on its own.
+    """
+    
+    def __init__(
+        self,
+        name: str = "default",
+        max_size_mb: int = 50,
+        max_items: int = 10000,
+        shards: int = 8,
+        admission: str = 'lru'
+    ):
+        """
+        Initialize sharded cache
+        
+        Args:
+            name: Cache name for logging
+            max_size_mb: Maximum size in megabytes (all shards together)
+            max_items: Maximum number of items (all shards together)
+            shards: Number of independent segments
+            admission: Admission policy of every shard ('lru' or 'tinylfu')
+        """
+        self.name = name
+        self.max_size_mb = max_size_mb
+        self.max_items = max_items
+        self.admission = admission
+        
+        shards = max(1, int(shards))
+        self._shards: List[MemoryCache] = [
+            MemoryCache(
+                name=f"{name}[{i}]",
+                max_size_mb=max_size_mb / shards,
+                max_items=max(1, max_items // shards),
+                admission=admission
+            )
+            for i in range(shards)
+        ]
+        
+        logger.info(f"ShardedCache '{name}' initialized ({shards} shards, max_size={max_size_mb}MB, max_items={max_items})")
+    
+    @property
+    def shard_count(self) -> int:
+        """Number of shards"""
+        return len(self._shards)
+    
+    def _shard(self, key: str) -> MemoryCache:
+        """Shard owning a key"""
+        return self._shards[hash(key) % len(self._shards)]
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get value from cache
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached value or None if not found or expired
+        """
+        return self._shard(key).get(key)
+    
+    def set(self, key: str, value: Any, ttl: int = 3600) -> None:
+        """
+        Set value in cache
+        
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Time-to-live in seconds
+        """
+        self._shard(key).set(key, value, ttl)
+    
+    def shrink(self, nbytes: int) -> int:
+        """
+        Evict least recently used entries from every shard to give memory back
+        
+        Args:
+            nbytes: Bytes to free (spread evenly over the shards)
+        
+        Returns:
+            Bytes freed
+        """
+        per_shard = -(-nbytes // len(self._shards))
+        return sum(shard.shrink(per_shard) for shard in self._shards)
+    
+    def clear(self) -> None:
+        """Clear all shards"""
+        for shard in self._shards:
+            shard.clear()
+        logger.info(f"Cleared {self.name} cache")
+    
+    def cleanup_expired(self) -> None:
+        """Remove expired entries from all shards"""
+        for shard in self._shards:
+            shard.cleanup_expired()
+    
+    def get_size_mb(self) -> float:
+        """Get current cache size in megabytes"""
+        return sum(shard.get_size_mb() for shard in self._shards)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics aggregated over shards"""
+        shard_stats = [shard.get_stats() for shard in self._shards]
+        hits = sum(stats['hits'] for stats in shard_stats)
+        misses = sum(stats['misses'] for stats in shard_stats)
+        total_requests = hits + misses
+        hit_rate = (hits / total_requests * 100) if total_requests > 0 else 0
+        items = [stats['items'] for stats in shard_stats]
+        size_bytes = sum(stats['size_bytes'] for stats in shard_stats)
+        
+        return {
+            'name': self.name,
+            'items': sum(items),
+            'size_mb': round(size_bytes / (1024 * 1024), 2),
+            'size_bytes': size_bytes,
+            'max_size_mb': self.max_size_mb,
+            'max_items': self.max_items,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hit_rate, 2),
+            'evictions': sum(stats['evictions'] for stats in shard_stats),
+            'rejections': sum(stats['rejections'] for stats in shard_stats),
+            'lock_waits': sum(stats['lock_waits'] for stats in shard_stats),
+            'admission': self.admission,
+            'shards': len(self._shards),
+            'shard_items': items
+        }
@@ -0,0 +1,101 @@
+"""
+Single Flight - In-flight request coalescing
+Concurrent calls with the same key share one execution instead of each
+computing the same result before the cache is populated
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """One in-flight execution that followers wait on"""
+    
+    __slots__ = ('done', 'result', 'error')
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Deduplicate concurrent executions by key"""
+    
+    def __init__(self, wait_timeout: Optional[float] = 5.0):
+        """
+        Initialize single flight group
+        
+        Args:
+            wait_timeout: Seconds a follower waits for the leader before executing
+                itself (None = wait indefinitely)
+        """
+        self.wait_timeout = wait_timeout
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        
+        self.executions = 0  # Calls that ran the function
+        self.coalesced = 0  # Calls answered by another caller's execution
+        self.wait_timeouts = 0  # Followers that gave up waiting and executed themselves
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn once per key among concurrent callers
+        
+        Args:
+            key: Identity of the work (callers with equal keys share one execution)
+            fn: Function computing the result
+        
+        Returns:
+            (result, shared) where shared is True if another caller's execution was used
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+        
+        if leader:
+            return self._lead(key, call, fn), False
+        
+        finished = call.done.wait(self.wait_timeout)
+        with self._lock:
+            if finished and call.error is None:
+                self.coalesced += 1
+                return call.result, True
+            if not finished:
+                self.wait_timeouts += 1
+            self.executions += 1
+        
+        if not finished:
+            logger.debug(f"Waited {self.wait_timeout}s for in-flight '{key}', executing instead")
+        return fn(), False
+    
+    def _lead(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> Any:
+        """Execute for all callers of a key and wake the followers"""
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e  # Followers run fn themselves rather than share the failure
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        with self._lock:
+            in_flight = len(self._calls)
+        return {
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'wait_timeouts': self.wait_timeouts,
+            'in_flight': in_flight,
+            'wait_timeout': self.wait_timeout
+        }
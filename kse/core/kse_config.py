@@ -119,6 +119,34 @@ class KSEConfig(metaclass=Singleton):
                 "search_timeout": DEFAULT_SEARCH_TIMEOUT,
                 "enable_cache": True,
                 "cache_ttl": 3600,
+                "auto_correct": True,
+                "coalesce_requests": True,
+                "coalesce_wait_timeout": 5.0,
+                "http_max_age": 60,
+            },
+            
+            # Result cache settings
+            "cache": {
+                "enabled": True,
+                "max_size_mb": 100,
+                "default_ttl": 3600,
+                "admission": "tinylfu",
+                "shards": 8,
+                "disk_enabled": True,
+                "disk_max_size_mb": 256,
+                "refresh_hot_queries": 50,
+                "postings_cache_mb": 32,
+                "postings_min_document_frequency": 64,
+                "query_log": True,
+                "warmup_queries": 100,
+            },
+            
+            # Process memory budget shared by caches, crawler and indexer
+            "memory": {
+                "limit_mb": 0,
+                "high_watermark": 0.9,
+                "low_watermark": 0.75,
+                "check_interval": 5.0,
             },
             
             # Ranking settings
@@ -134,6 +162,8 @@ class KSEConfig(metaclass=Singleton):
                 "debug": False,
                 "enable_cors": True,
                 "public_url": None,
+                "compress_responses": True,
+                "compression_min_size": 1024,
             },
             
             # NLP settings
@@ -142,6 +172,13 @@ class KSEConfig(metaclass=Singleton):
                 "enable_lemmatization": True,
                 "enable_compound_splitting": True,
                 "min_compound_length": 8,
+                "enable_shingles": False,
+            },
+            
+            # Indexing settings
+            "indexing": {
+                "detect_duplicates": True,
+                "collapse_duplicates": True,
             },
             
             # Storage settings
@@ -149,6 +186,7 @@ class KSEConfig(metaclass=Singleton):
                 "compression_enabled": True,
                 "backup_enabled": True,
                 "max_backups": 5,
+                "document_compression": "zlib",
             },
         }
     
@@ -55,6 +55,7 @@ SNAPSHOTS_DIR = DEFAULT_STORAGE_DIR / "snapshots"
 DOMAINS_FILE = DEFAULT_CONFIG_DIR / "swedish_domains.json"
 DEFAULT_CONFIG_FILE = DEFAULT_CONFIG_DIR / "kse_default_config.yaml"
 STOPWORDS_FILE = DEFAULT_CONFIG_DIR / "swedish_stopwords.txt"
+COMPOUND_LEXICON_FILE = DEFAULT_CONFIG_DIR / "swedish_compound_lexicon.txt"
 
 # Index files
 INVERTED_INDEX_FILE = INDEX_DIR / "inverted_index.pkl"
@@ -0,0 +1,288 @@
+"""
+KSE Memory Budget - Process-wide memory limit shared by caches, crawler and indexer
+Subsystems register how much memory they hold and how to give some back; when
+the process grows past the high watermark they are asked to release memory
+until it is back under the low watermark
+"""
+import gc
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBudget:
+    """Process memory budget with registered consumers and back-pressure"""
+    
+    DEFAULT_LIMIT_FRACTION = 0.75  # Share of physical memory used when no limit is given
+    THROTTLE_STEP = 0.1  # Seconds between checks while a caller waits for memory
+    
+    def __init__(
+        self,
+        limit_mb: Optional[float] = None,
+        high_watermark: float = 0.9,
+        low_watermark: float = 0.75,
+        check_interval: float = 5.0
+    ):
+        """
+        Initialize memory budget
+        
+        Args:
+            limit_mb: Process memory limit in megabytes (None or 0 = 75% of physical memory)
+            high_watermark: Share of the limit at which consumers are asked to release memory
+            low_watermark: Share of the limit releasing aims for
+            check_interval: Seconds between checks of the background thread and maybe_check
+        """
+        try:
+            import psutil
+            self._process = psutil.Process()
+        except ImportError:
+            self._process = None  # RSS is read from /proc instead
+        
+        if not limit_mb:
+            total = self._total_memory()
+            limit_mb = total * self.DEFAULT_LIMIT_FRACTION / (1024 * 1024) if total else None
+        self.limit_mb = limit_mb
+        self.limit_bytes = int(limit_mb * 1024 * 1024) if limit_mb else None
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.check_interval = check_interval
+        
+        self._consumers: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        
+        self.rss_bytes = 0
+        self.rss_source = None
+        self.pressure = 'ok'  # ok, high (past the high watermark) or critical (past the limit)
+        self.pressure_events = 0
+        self.released_bytes = 0
+        self.throttled_seconds = 0.0
+        self._last_check = 0.0
+        
+        logger.info(f"MemoryBudget initialized (limit={f'{limit_mb:.0f}MB' if limit_mb else 'none'}, "
+                    f"high={high_watermark:.0%}, low={low_watermark:.0%})")
+    
+    @classmethod
+    def from_config(cls, config) -> 'MemoryBudget':
+        """
+        Create a memory budget from the memory.* settings
+        
+        Args:
+            config: KSEConfig instance
+        
+        Returns:
+            MemoryBudget instance
+        """
+        return cls(
+            limit_mb=config.get("memory.limit_mb", 0),
+            high_watermark=config.get("memory.high_watermark", 0.9),
+            low_watermark=config.get("memory.low_watermark", 0.75),
+            check_interval=config.get("memory.check_interval", 5.0)
+        )
+    
+    def _total_memory(self) -> Optional[int]:
+        """Physical memory in bytes, if it can be determined"""
+        if self._process is not None:
+            import psutil
+            return psutil.virtual_memory().total
+        try:
+            return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (ValueError, OSError, AttributeError):
+            return None
+    
+    def register(
+        self,
+        name: str,
+        usage: Callable[[], int],
+        release: Callable[[int], int],
+        priority: int = 0
+    ) -> None:
+        """
+        Register a memory consumer
+        
+        Args:
+            name: Consumer name shown in statistics (re-registering replaces it)
+            usage: Returns the bytes the consumer currently holds
+            release: Called with the bytes wanted back; frees what it can and returns
+                the bytes freed
+            priority: Consumers with lower priority are asked first
+        """
+        with self._lock:
+            self._consumers[name] = {
+                'usage': usage,
+                'release': release,
+                'priority': priority,
+                'released_bytes': 0,
+                'releases': 0
+            }
+        logger.debug(f"Memory consumer registered: {name} (priority {priority})")
+    
+    def unregister(self, name: str) -> None:
+        """
+        Remove a memory consumer
+        
+        Args:
+            name: Consumer name
+        """
+        with self._lock:
+            self._consumers.pop(name, None)
+    
+    def _read_rss(self) -> Tuple[Optional[int], str]:
+        """Resident set size of the process and where it was read from"""
+        if self._process is not None:
+            try:
+                return self._process.memory_info().rss, 'psutil'
+            except Exception as e:
+                logger.debug(f"psutil RSS read failed: {e}")
+        try:
+            with open('/proc/self/statm', 'r') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE'), 'proc'
+        except (OSError, ValueError, IndexError, AttributeError):
+            return None, 'consumers'
+    
+    def _consumer_usage(self, consumer: Dict[str, Any]) -> int:
+        """Bytes a consumer reports (0 if its callback fails)"""
+        try:
+            return int(consumer['usage']() or 0)
+        except Exception as e:
+            logger.debug(f"Memory usage callback failed: {e}")
+            return 0
+    
+    def _measure(self) -> int:
+        """Read current process memory (sum of consumers if RSS is unavailable)"""
+        rss, source = self._read_rss()
+        if rss is None:
+            rss = sum(self._consumer_usage(consumer) for consumer in self._consumers.values())
+        self.rss_bytes = rss
+        self.rss_source = source
+        
+        if self.limit_bytes is None or rss < self.limit_bytes * self.high_watermark:
+            self.pressure = 'ok'
+        elif rss < self.limit_bytes:
+            self.pressure = 'high'
+        else:
+            self.pressure = 'critical'
+        return rss
+    
+    def check(self) -> str:
+        """
+        Measure memory and ask consumers to release some if past the high watermark
+        
+        Returns:
+            Pressure level after releasing ('ok', 'high' or 'critical')
+        """
+        with self._lock:
+            self._last_check = time.monotonic()
+            rss = self._measure()
+            if self.pressure == 'ok':
+                return self.pressure
+            
+            self.pressure_events += 1
+            needed = rss - int(self.limit_bytes * self.low_watermark)
+            logger.warning(f"Memory pressure: {rss / (1024 * 1024):.0f}MB of {self.limit_mb:.0f}MB, "
+                           f"releasing {needed / (1024 * 1024):.0f}MB")
+            
+            for name, consumer in sorted(self._consumers.items(), key=lambda item: item[1]['priority']):
+                if needed <= 0:
+                    break
+                try:
+                    freed = int(consumer['release'](needed) or 0)
+                except Exception as e:
+                    logger.error(f"Memory consumer {name} failed to release memory: {e}")
+                    continue
+                consumer['released_bytes'] += freed
+                consumer['releases'] += 1
+                self.released_bytes += freed
+                needed -= freed
+                logger.info(f"Memory consumer {name} released {freed / (1024 * 1024):.1f}MB")
+            
+            gc.collect()
+            self._measure()
+            return self.pressure
+    
+    def maybe_check(self) -> str:
+        """
+        Check if check_interval has passed since the last check
+        
+        Returns:
+            Current pressure level
+        """
+        if time.monotonic() - self._last_check >= self.check_interval:
+            return self.check()
+        return self.pressure
+    
+    def throttle(self, max_wait: float = 5.0) -> float:
+        """
+        Back-pressure for producers: wait while the process is past its limit
+        
+        Args:
+            max_wait: Longest time to wait in seconds
+        
+        Returns:
+            Seconds waited
+        """
+        if self.maybe_check() != 'critical':
+            return 0.0
+        
+        start = time.monotonic()
+        while time.monotonic() - start < max_wait:
+            time.sleep(self.THROTTLE_STEP)
+            if self.check() != 'critical':
+                break
+        waited = time.monotonic() - start
+        self.throttled_seconds += waited
+        logger.warning(f"Throttled {waited:.1f}s waiting for memory")
+        return waited
+    
+    def start(self) -> None:
+        """Check memory every check_interval seconds in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="kse-memory-budget", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+    
+    def _run(self) -> None:
+        """Background check loop"""
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Memory budget check failed: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get memory budget statistics with per-consumer usage"""
+        with self._lock:
+            if not self._last_check:
+                self._measure()
+            consumers = {
+                name: {
+                    'usage_mb': round(self._consumer_usage(consumer) / (1024 * 1024), 2),
+                    'priority': consumer['priority'],
+                    'released_mb': round(consumer['released_bytes'] / (1024 * 1024), 2),
+                    'releases': consumer['releases']
+                }
+                for name, consumer in self._consumers.items()
+            }
+            return {
+                'limit_mb': round(self.limit_mb, 1) if self.limit_mb else None,
+                'rss_mb': round(self.rss_bytes / (1024 * 1024), 1),
+                'rss_source': self.rss_source,
+                'usage_percent': round(self.rss_bytes / self.limit_bytes * 100, 1) if self.limit_bytes else None,
+                'pressure': self.pressure,
+                'pressure_events': self.pressure_events,
+                'released_mb': round(self.released_bytes / (1024 * 1024), 2),
+                'throttled_seconds': round(self.throttled_seconds, 2),
+                'consumers': consumers
+            }
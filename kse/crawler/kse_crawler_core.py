@@ -9,6 +9,8 @@ from pathlib import Path
 from kse.core.kse_logger import get_logger
 from kse.core.kse_exceptions import CrawlerError, DomainNotAllowedError
 from kse.core.kse_constants import CrawlStatus
+from kse.core.kse_memory_budget import MemoryBudget
+from kse.cache.kse_memory_cache import estimate_size
 from kse.crawler.kse_http_client import HTTPClient
 from kse.crawler.kse_html_extractor import HTMLExtractor
 from kse.crawler.kse_url_processor import URLProcessor
@@ -36,7 +38,8 @@ class CrawlerCore:
         respect_robots: bool = True,
         dynamic_speed: bool = False,
         max_workers: int = 5,
-        page_batch_size: int = None
+        page_batch_size: int = None,
+        memory_budget: Optional[MemoryBudget] = None
     ):
         """
         Initialize crawler
@@ -53,6 +56,8 @@ class CrawlerCore:
             dynamic_speed: Whether to dynamically adjust crawl speed from robots.txt
             max_workers: Maximum number of concurrent threads for parallel crawling
             page_batch_size: Number of pages to accumulate before saving (defaults to DEFAULT_PAGE_BATCH_SIZE)
+            memory_budget: Process MemoryBudget; under pressure crawled pages are saved and
+                dropped from memory, and crawling waits while the process is past its limit
         """
         self.storage = storage_manager
         self.allowed_domains = set(allowed_domains)
@@ -74,6 +79,13 @@ class CrawlerCore:
         self._state_lock = threading.Lock()  # Lock for thread-safe state updates
         self._page_batch_size = page_batch_size or self.DEFAULT_PAGE_BATCH_SIZE
         self._pages_since_last_save = 0
+        self._saved_pages = 0  # Leading crawled_pages already written to storage
+        self._pages_bytes = 0  # Estimated memory held by crawled_pages
+        self._released_pages = 0  # Pages dropped from memory under pressure (still in storage)
+        
+        self.memory_budget = memory_budget
+        if memory_budget is not None:
+            memory_budget.register('crawler', self.get_memory_usage, self.release_memory, priority=2)
         
         # Load previous state if exists
         self._load_crawl_state()
@@ -119,12 +131,14 @@ class CrawlerCore:
         """Save a batch of pages to storage"""
         try:
             with self._state_lock:
-                if self.crawled_pages:
-                    # Save pages incrementally
-                    self.storage.save_pages_batch(self.crawled_pages)
-                    logger.info(f"Saved batch of {len(self.crawled_pages)} pages to storage")
+                unsaved = self.crawled_pages[self._saved_pages:]
+                if unsaved:
+                    # Save pages incrementally (each page goes into one batch only)
+                    self.storage.save_pages_batch(unsaved)
+                    self._saved_pages = len(self.crawled_pages)
+                    logger.info(f"Saved batch of {len(unsaved)} pages to storage")
                     # Note: Keep pages in memory for get_crawled_pages() during active crawl
-                    # Pages are only cleared when loading from storage after crawl completion
+                    # Pages are only cleared under memory pressure (see release_memory)
         except Exception as e:
             logger.error(f"Failed to save pages batch: {e}")
     
@@ -254,13 +268,16 @@ class CrawlerCore:
                         'description': content['description'],
                         'content': content['content'],
                         'keywords': content['keywords'],
+                        'language': content.get('language', 'sv'),
                         'links': content['links'],
                         'status_code': status_code,
                         'crawl_time': time.time()
                     }
                     
+                    page_size = estimate_size(page_data)
                     with self._state_lock:
                         self.crawled_pages.append(page_data)
+                        self._pages_bytes += page_size
                         self._pages_since_last_save += 1
                     
                     # Mark as visited
@@ -278,6 +295,10 @@ class CrawlerCore:
                         self._save_pages_batch()
                         self._pages_since_last_save = 0
                     
+                    # Back-pressure: wait for memory to be released before fetching more
+                    if self.memory_budget is not None:
+                        self.memory_budget.throttle()
+                    
                     # Save state periodically
                     if crawled_count % 10 == 0:
                         self._save_crawl_state()
@@ -388,10 +409,41 @@ class CrawlerCore:
         logger.info(f"Completed parallel crawl of all domains")
         return results
     
+    def get_memory_usage(self) -> int:
+        """Estimated bytes held by crawled pages in memory"""
+        return self._pages_bytes
+    
+    def release_memory(self, nbytes: int = 0) -> int:
+        """
+        Save crawled pages not yet in storage and drop all of them from memory
+        
+        Args:
+            nbytes: Bytes wanted back (everything held is released)
+        
+        Returns:
+            Estimated bytes freed
+        """
+        self._save_pages_batch()
+        with self._state_lock:
+            if self._saved_pages < len(self.crawled_pages):
+                return 0  # Saving failed; keep the pages rather than lose them
+            freed = self._pages_bytes
+            released = len(self.crawled_pages)
+            self._released_pages += released
+            self.crawled_pages = []
+            self._saved_pages = 0
+            self._pages_bytes = 0
+            self._pages_since_last_save = 0
+        logger.info(f"Released {released} crawled pages from memory (kept in storage)")
+        return freed
+    
     def get_crawled_pages(self) -> List[Dict]:
         """
         Get all crawled pages
         
+        Pages released under memory pressure are only in storage
+        (see load_all_crawled_pages).
+        
         Returns:
             List of crawled page data (in-memory during active crawl)
         """
@@ -417,7 +469,9 @@ class CrawlerCore:
             Dictionary with statistics
         """
         return {
-            "total_pages_crawled": len(self.crawled_pages),
+            "total_pages_crawled": len(self.crawled_pages) + self._released_pages,
+            "pages_in_memory": len(self.crawled_pages),
+            "pages_released": self._released_pages,
             "total_urls_visited": self.url_processor.get_visited_count(),
             "domains_status": self.domain_status,
             "allowed_domains": len(self.allowed_domains)
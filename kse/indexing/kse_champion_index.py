@@ -0,0 +1,166 @@
+"""
+KSE Champion Index - Impact-ordered first tier for head terms
+
+For terms whose postings cover a large part of the corpus, a champion list
+keeps only the documents with the highest precomputed impact: normalized term
+frequency combined with the document's static quality. Retrieval scores the
+union of the query terms' champion lists first and only falls back to the full
+postings when that tier cannot fill the requested top-k.
+"""
+from heapq import nlargest
+from typing import Callable, Dict, List, Optional, Tuple
+from kse.indexing.kse_inverted_index import InvertedIndex
+from kse.core.kse_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ChampionIndex:
+    """Per-term champion lists over the inverted index"""
+    
+    CHAMPION_SIZE = 100  # Documents kept per head term
+    QUALITY_WEIGHT = 0.3  # Share of static quality in the champion score
+    
+    def __init__(
+        self,
+        inverted_index: InvertedIndex,
+        quality_fn: Optional[Callable[[Dict], float]] = None,
+        champion_size: int = None
+    ):
+        """
+        Initialize champion index
+        
+        Args:
+            inverted_index: Inverted index instance
+            quality_fn: Document metadata -> static quality in 0-1 (None = all equal)
+            champion_size: Documents per champion list (defaults to CHAMPION_SIZE)
+        """
+        self.index = inverted_index
+        self.quality_fn = quality_fn
+        self.champion_size = champion_size or self.CHAMPION_SIZE
+        
+        self._champions: Dict[str, List[str]] = {}
+        self._quality: Dict[str, float] = {}
+        self._built_generation = -1
+    
+    def is_head_term(self, term: str) -> bool:
+        """
+        Check if a term's postings are longer than its champion list
+        
+        Args:
+            term: Index term
+        
+        Returns:
+            True if the term has a champion list
+        """
+        return self.index.get_document_frequency(term) > self.champion_size
+    
+    def build(self) -> None:
+        """Precompute champion lists for every head term"""
+        self._reset()
+        head_terms = [term for term, docs in self.index.index.items() if len(docs) > self.champion_size]
+        for term in head_terms:
+            self._champions[term] = self._select(term)
+        logger.info(f"Built champion lists for {len(head_terms)} head terms (size {self.champion_size})")
+    
+    def _reset(self) -> None:
+        """Drop lists and quality scores from an older index generation"""
+        self._champions = {}
+        self._quality = {}
+        self._built_generation = self.index.generation
+    
+    def _document_quality(self, doc_id: str) -> float:
+        """Static quality of a document, computed once per generation"""
+        quality = self._quality.get(doc_id)
+        if quality is None:
+            quality = 0.5
+            if self.quality_fn:
+                quality = self.quality_fn(self.index.documents.get(doc_id, {}))
+            self._quality[doc_id] = quality
+        return quality
+    
+    def _select(self, term: str) -> List[str]:
+        """Top documents of a term by normalized TF blended with static quality"""
+        docs = self.index.index.get(term, {})
+        doc_lengths = self.index.doc_lengths
+        
+        impacts: List[Tuple[str, float]] = []
+        for doc_id, positions in docs.items():
+            length = doc_lengths.get(doc_id) or self.index.get_document_length(doc_id)
+            impacts.append((doc_id, len(positions) / max(length, 1)))
+        
+        max_impact = max((impact for _, impact in impacts), default=0.0) or 1.0
+        weight = self.QUALITY_WEIGHT
+        
+        top = nlargest(
+            self.champion_size,
+            impacts,
+            key=lambda entry: (1 - weight) * entry[1] / max_impact + weight * self._document_quality(entry[0])
+        )
+        return [doc_id for doc_id, _ in top]
+    
+    def get_champions(self, term: str) -> List[str]:
+        """
+        Get the champion list of a term
+        
+        Args:
+            term: Index term
+        
+        Returns:
+            Champion document IDs for head terms, the full postings otherwise
+        """
+        if self._built_generation != self.index.generation:
+            self._reset()
+        
+        if not self.is_head_term(term):
+            return list(self.index.index.get(term, {}))
+        
+        champions = self._champions.get(term)
+        if champions is None:
+            champions = self._select(term)
+            self._champions[term] = champions
+        return champions
+    
+    def get_candidates(self, terms: List[str]) -> List[str]:
+        """
+        Get first-tier candidates for a query
+        
+        Args:
+            terms: Query terms
+        
+        Returns:
+            Union of the terms' champion lists, in first-seen order
+        """
+        candidates = {}
+        for term in terms:
+            for doc_id in self.get_champions(term):
+                candidates[doc_id] = True
+        return list(candidates)
+    
+    def estimate_hits(self, terms: List[str]) -> int:
+        """
+        Estimate documents matching any term without walking the postings
+        
+        Args:
+            terms: Query terms
+        
+        Returns:
+            Upper-bounded estimate (sum of document frequencies, capped at corpus size)
+        """
+        frequencies = [self.index.get_document_frequency(term) for term in terms]
+        if not frequencies:
+            return 0
+        return min(sum(frequencies), self.index.total_documents)
+    
+    def get_statistics(self) -> Dict:
+        """
+        Get champion index statistics
+        
+        Returns:
+            Dictionary with statistics
+        """
+        return {
+            'champion_size': self.champion_size,
+            'head_terms': len(self._champions),
+            'index_generation': self._built_generation
+        }
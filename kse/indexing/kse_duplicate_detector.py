@@ -0,0 +1,231 @@
+"""
+KSE Duplicate Detector - SimHash near-duplicate clustering at index time
+
+Every page gets a 64-bit SimHash over its word unigrams and bigrams, so pages
+that differ in a few words (http/https/www variants, mirrors, print versions)
+get fingerprints a few bits apart. Fingerprints are cut into BANDS bands of
+16 bits, each band keying its own hash table. Two fingerprints within
+MAX_DISTANCE < BANDS bits agree on at least one whole band, so finding a
+page's near-duplicates only compares it with the pages sharing a band.
+Pages shorter than MIN_WORDS are not fingerprinted: a handful of shared
+words says little about whether two pages are copies.
+"""
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+from kse.utils.kse_bit_utils import popcount
+from kse.core.kse_logger import get_logger
+
+logger = get_logger(__name__)
+
+FINGERPRINT_BITS = 64
+MIN_WORDS = 20
+_WORD_PATTERN = re.compile(r'\w+')
+_LANE_BITS = 24  # Per-bit counters packed into one int, 24 bits each
+
+# byte -> int with a 1 in the lane of every set bit, so one add updates 8 counters
+_SPREAD = [sum(1 << (bit * _LANE_BITS) for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+def simhash(tokens: List[str]) -> int:
+    """
+    Compute 64-bit SimHash of a token stream
+    
+    Args:
+        tokens: Document tokens in order (unigrams and adjacent pairs are features)
+    
+    Returns:
+        Fingerprint (0 for an empty document)
+    """
+    features: Dict[str, int] = {}
+    for token in tokens:
+        features[token] = features.get(token, 0) + 1
+    for first, second in zip(tokens, tokens[1:]):
+        pair = f"{first} {second}"
+        features[pair] = features.get(pair, 0) + 1
+    
+    if not features:
+        return 0
+    
+    counters = [0] * (FINGERPRINT_BITS // 8)
+    total = 0
+    for feature, weight in features.items():
+        digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+        for i, byte in enumerate(digest):
+            counters[i] += weight * _SPREAD[byte]
+        total += weight
+    
+    # A bit is set where the weighted majority of features had it set
+    mask = (1 << _LANE_BITS) - 1
+    fingerprint = 0
+    for i, lanes in enumerate(counters):
+        for bit in range(8):
+            if 2 * (lanes >> (bit * _LANE_BITS) & mask) > total:
+                fingerprint |= 1 << (i * 8 + bit)
+    return fingerprint
+
+
+def fingerprint_text(text: str) -> Optional[int]:
+    """
+    Compute SimHash of raw page text (lowercased words, nothing removed)
+    
+    Args:
+        text: Page text
+    
+    Returns:
+        Fingerprint, or None if the text has fewer than MIN_WORDS words
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < MIN_WORDS:
+        return None
+    return simhash(words)
+
+
+def hamming_distance(first: int, second: int) -> int:
+    """Number of differing bits between two fingerprints"""
+    return popcount(first ^ second)
+
+
+class DuplicateDetector:
+    """Cluster near-duplicate documents with banded SimHash lookups"""
+    
+    BANDS = 4
+    MAX_DISTANCE = 3  # Must stay below BANDS for the band lookup to be exact
+    
+    def __init__(self, max_distance: int = None):
+        """
+        Initialize duplicate detector
+        
+        Args:
+            max_distance: Maximum differing bits for near-duplicates (defaults to MAX_DISTANCE)
+        """
+        self.max_distance = min(max_distance if max_distance is not None else self.MAX_DISTANCE, self.BANDS - 1)
+        self._band_bits = FINGERPRINT_BITS // self.BANDS
+        
+        # Only cluster representatives are in the band tables
+        self._tables: List[Dict[int, List[str]]] = [{} for _ in range(self.BANDS)]
+        self._fingerprints: Dict[str, int] = {}
+        self._cluster_of: Dict[str, str] = {}  # doc_id -> representative doc_id
+        self._members: Dict[str, List[str]] = {}  # representative -> collapsed doc_ids
+    
+    def _bands(self, fingerprint: int) -> Iterable[Tuple[int, int]]:
+        """(band number, band value) pairs of a fingerprint"""
+        mask = (1 << self._band_bits) - 1
+        for band in range(self.BANDS):
+            yield band, fingerprint >> (band * self._band_bits) & mask
+    
+    def find_duplicate(self, fingerprint: int) -> Optional[str]:
+        """
+        Find the closest cluster representative within max_distance bits
+        
+        Args:
+            fingerprint: SimHash of the document
+        
+        Returns:
+            Representative doc_id, or None if the document is unique
+        """
+        best = None
+        best_distance = self.max_distance + 1
+        for band, value in self._bands(fingerprint):
+            for doc_id in self._tables[band].get(value, ()):
+                distance = hamming_distance(fingerprint, self._fingerprints[doc_id])
+                if distance < best_distance:
+                    best, best_distance = doc_id, distance
+        return best
+    
+    def add(self, doc_id: str, fingerprint: int) -> str:
+        """
+        Assign a document to a cluster
+        
+        Args:
+            doc_id: Document identifier (URL)
+            fingerprint: SimHash of the document
+        
+        Returns:
+            Cluster ID: the representative's doc_id (the document itself if it is unique)
+        """
+        cluster_id = self._cluster_of.get(doc_id)
+        if cluster_id is not None:
+            return cluster_id
+        
+        cluster_id = self.find_duplicate(fingerprint)
+        if cluster_id is None:
+            cluster_id = doc_id
+            self._fingerprints[doc_id] = fingerprint
+            for band, value in self._bands(fingerprint):
+                self._tables[band].setdefault(value, []).append(doc_id)
+        else:
+            self._members.setdefault(cluster_id, []).append(doc_id)
+        
+        self._cluster_of[doc_id] = cluster_id
+        return cluster_id
+    
+    def get_cluster(self, doc_id: str) -> Optional[str]:
+        """
+        Get cluster ID of a document
+        
+        Args:
+            doc_id: Document identifier
+        
+        Returns:
+            Cluster ID, or None if the document was never added
+        """
+        return self._cluster_of.get(doc_id)
+    
+    def get_members(self, cluster_id: str) -> List[str]:
+        """
+        Get documents collapsed into a cluster
+        
+        Args:
+            cluster_id: Cluster ID
+        
+        Returns:
+            Duplicate doc_ids (the representative excluded)
+        """
+        return list(self._members.get(cluster_id, []))
+    
+    def rebuild(self, documents: Dict[str, Dict]) -> None:
+        """
+        Restore clusters from document metadata ('simhash', 'cluster_id')
+        
+        Args:
+            documents: doc_id -> metadata from the inverted index
+        """
+        self.clear()
+        for doc_id, metadata in documents.items():
+            fingerprint = metadata.get('simhash')
+            if fingerprint is None:
+                continue
+            cluster_id = metadata.get('cluster_id', doc_id)
+            if cluster_id == doc_id:
+                self.add(doc_id, fingerprint)
+            else:
+                self._cluster_of[doc_id] = cluster_id
+                self._members.setdefault(cluster_id, []).append(doc_id)
+            for duplicate in metadata.get('duplicates', []):
+                self._cluster_of[duplicate] = cluster_id
+                self._members.setdefault(cluster_id, []).append(duplicate)
+        
+        logger.info(f"Restored {len(self._fingerprints)} clusters, "
+                    f"{sum(len(members) for members in self._members.values())} duplicates")
+    
+    def clear(self) -> None:
+        """Forget all fingerprints and clusters"""
+        self._tables = [{} for _ in range(self.BANDS)]
+        self._fingerprints.clear()
+        self._cluster_of.clear()
+        self._members.clear()
+    
+    def get_statistics(self) -> Dict:
+        """
+        Get duplicate detector statistics
+        
+        Returns:
+            Dictionary with statistics
+        """
+        return {
+            'clusters': len(self._fingerprints),
+            'duplicates': sum(len(members) for members in self._members.values()),
+            'largest_cluster': max((len(members) + 1 for members in self._members.values()), default=1),
+            'max_distance': self.max_distance
+        }
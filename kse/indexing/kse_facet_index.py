@@ -0,0 +1,216 @@
+"""
+KSE Facet Index - Bitmap filters for domain, category, language and crawl date
+
+Each facet value maps to a bitset over document numbers, stored as a Python
+int so AND/OR and popcount run in C. A filter is evaluated to one bitset,
+converted once to bytes, and then tested per posting in O(1). Crawl times are
+kept as a sorted column so date ranges are two bisects. Everything is derived
+from document metadata and rebuilt when the index generation changes.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from kse.indexing.kse_inverted_index import InvertedIndex
+from kse.utils.kse_bit_utils import popcount
+from kse.core.kse_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _bitmap_from_numbers(numbers: Iterable[int], size: int) -> int:
+    """Build a bitset from document numbers"""
+    bits = bytearray((size + 7) // 8)
+    for number in numbers:
+        bits[number >> 3] |= 1 << (number & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class FacetIndex:
+    """Per-value document bitmaps and a sorted crawl-time column"""
+    
+    FACETS = ('domain', 'category', 'language')
+    
+    def __init__(self, inverted_index: InvertedIndex):
+        """
+        Initialize facet index
+        
+        Args:
+            inverted_index: Inverted index (document metadata and numbering are read)
+        """
+        self.index = inverted_index
+        
+        self._bitmaps: Dict[str, Dict[str, int]] = {}  # facet -> value -> bitset
+        self._columns: Dict[str, List[str]] = {}  # facet -> value per document number
+        self._crawl_times: List[Tuple[float, int]] = []  # Sorted (crawl_time, doc number)
+        self._built_generation = -1
+    
+    @staticmethod
+    def _normalize(facet: str, value) -> str:
+        """Lowercase a facet value ('www.' is dropped from domains)"""
+        value = str(value or '').lower().strip()
+        if facet == 'domain' and value.startswith('www.'):
+            value = value[4:]
+        return value
+    
+    def _ensure_built(self) -> None:
+        """Rebuild bitmaps and columns if the index changed"""
+        if self._built_generation == self.index.generation:
+            return
+        
+        documents = self.index.documents
+        doc_ids = self.index.doc_ids
+        size = len(doc_ids)
+        
+        numbers: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in self.FACETS}
+        columns: Dict[str, List[str]] = {facet: [''] * size for facet in self.FACETS}
+        crawl_times = []
+        
+        for number, doc_id in enumerate(doc_ids):
+            metadata = documents.get(doc_id, {})
+            for facet in self.FACETS:
+                value = self._normalize(facet, metadata.get(facet))
+                columns[facet][number] = value
+                if value:
+                    numbers[facet].setdefault(value, []).append(number)
+            crawl_time = metadata.get('crawl_time')
+            if crawl_time:
+                crawl_times.append((float(crawl_time), number))
+        
+        self._bitmaps = {
+            facet: {value: _bitmap_from_numbers(docs, size) for value, docs in values.items()}
+            for facet, values in numbers.items()
+        }
+        self._columns = columns
+        self._crawl_times = sorted(crawl_times)
+        self._built_generation = self.index.generation
+        
+        logger.info(f"Built facet bitmaps for {size} documents "
+                    f"({', '.join(f'{facet}: {len(values)}' for facet, values in self._bitmaps.items())})")
+    
+    def get_bitmap(self, filters: Dict) -> Optional[int]:
+        """
+        Evaluate filters to a document bitset
+        
+        Args:
+            filters: {facet: value or list of values} (values OR-ed, facets AND-ed), plus
+                     optional 'crawled_after' / 'crawled_before' Unix timestamps
+        
+        Returns:
+            Bitset of matching document numbers, or None if filters are empty
+        """
+        self._ensure_built()
+        bitmap = None
+        
+        for facet in self.FACETS:
+            values = filters.get(facet)
+            if not values:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            
+            facet_bitmap = 0
+            for value in values:
+                facet_bitmap |= self._bitmaps[facet].get(self._normalize(facet, value), 0)
+            bitmap = facet_bitmap if bitmap is None else bitmap & facet_bitmap
+        
+        after = filters.get('crawled_after')
+        before = filters.get('crawled_before')
+        if after is not None or before is not None:
+            times = self._crawl_times
+            start = bisect_left(times, (float(after),)) if after is not None else 0
+            end = bisect_right(times, (float(before), len(times))) if before is not None else len(times)
+            date_bitmap = _bitmap_from_numbers((number for _, number in times[start:end]), len(self.index.doc_ids))
+            bitmap = date_bitmap if bitmap is None else bitmap & date_bitmap
+        
+        return bitmap
+    
+    def get_filter(self, filters: Optional[Dict]) -> Optional[Callable[[str], bool]]:
+        """
+        Get a doc-id predicate for filters (for intersecting with postings)
+        
+        Args:
+            filters: Facet filters (see get_bitmap)
+        
+        Returns:
+            Predicate, or None if there is nothing to filter
+        """
+        if not filters:
+            return None
+        bitmap = self.get_bitmap(filters)
+        if bitmap is None:
+            return None
+        
+        bits = bitmap.to_bytes((len(self.index.doc_ids) + 7) // 8, 'little')
+        size = len(bits) * 8
+        doc_numbers = self.index.doc_numbers
+        
+        def matches(doc_id: str) -> bool:
+            number = doc_numbers.get(doc_id)
+            return number is not None and number < size and bool(bits[number >> 3] >> (number & 7) & 1)
+        
+        return matches
+    
+    def count(self, filters: Dict) -> int:
+        """
+        Count documents matching filters
+        
+        Args:
+            filters: Facet filters (see get_bitmap)
+        
+        Returns:
+            Number of matching documents
+        """
+        bitmap = self.get_bitmap(filters)
+        return len(self.index.doc_ids) if bitmap is None else popcount(bitmap)
+    
+    def facet_counts(self, doc_ids: Iterable[str], limit: int = 10) -> Dict[str, Dict[str, int]]:
+        """
+        Count facet values over a result list
+        
+        Args:
+            doc_ids: Document IDs of the results
+            limit: Values kept per facet (most frequent first)
+        
+        Returns:
+            {facet: {value: count}}
+        """
+        self._ensure_built()
+        doc_numbers = self.index.doc_numbers
+        numbers = [doc_numbers[doc_id] for doc_id in doc_ids if doc_id in doc_numbers]
+        
+        counts = {}
+        for facet in self.FACETS:
+            column = self._columns[facet]
+            facet_counts: Dict[str, int] = {}
+            for number in numbers:
+                value = column[number]
+                if value:
+                    facet_counts[value] = facet_counts.get(value, 0) + 1
+            top = sorted(facet_counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            counts[facet] = dict(top)
+        return counts
+    
+    def get_values(self, facet: str) -> Dict[str, int]:
+        """
+        Get all values of a facet with their document counts
+        
+        Args:
+            facet: Facet name
+        
+        Returns:
+            {value: documents}
+        """
+        self._ensure_built()
+        return {value: popcount(bitmap) for value, bitmap in self._bitmaps.get(facet, {}).items()}
+    
+    def get_statistics(self) -> Dict:
+        """
+        Get facet index statistics
+        
+        Returns:
+            Dictionary with statistics
+        """
+        return {
+            'facet_values': {facet: len(values) for facet, values in self._bitmaps.items()},
+            'dated_documents': len(self._crawl_times),
+            'index_generation': self._built_generation
+        }
@@ -1,8 +1,13 @@
 """
 KSE Inverted Index - Inverted index structure for search
 """
-from typing import Dict, List, Set
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
 from collections import defaultdict
+from kse.indexing.kse_term_dictionary import TermDictionary
+from kse.indexing.kse_postings_codec import encoded_size
+from kse.cache.kse_postings_cache import PostingsCache
 from kse.core.kse_logger import get_logger
 
 logger = get_logger(__name__)
@@ -19,11 +24,39 @@ class InvertedIndex:
         # Document metadata: doc_id -> metadata
         self.documents: Dict[str, Dict] = {}
         
+        # Named fields: field -> term -> {doc_id: [positions]} (e.g. 'title', 'site')
+        self.fields: Dict[str, Dict[str, Dict[str, List[int]]]] = {}
+        
+        # Dense integer numbering of documents for sorted postings
+        self.doc_numbers: Dict[str, int] = {}
+        self.doc_ids: List[str] = []
+        
+        # Document lengths (tokens in the main index), kept so TF needs no index scan
+        self.doc_lengths: Dict[str, int] = {}
+        
+        # (field, term) -> sorted doc numbers, built on demand; only hot, long lists are kept
+        self.postings_cache = PostingsCache()
+        
+        # field -> (generation, TermDictionary), rebuilt when the index changes
+        self._term_dictionaries: Dict[Optional[str], Tuple[int, TermDictionary]] = {}
+        
+        # (generation, site key per doc number or None if numbering is not site-ordered)
+        self._site_keys: Tuple[int, Optional[List[str]]] = (-1, None)
+        
         # Statistics
         self.total_documents = 0
         self.total_terms = 0
+        
+        # Bumped on every change so derived structures can detect staleness
+        self.generation = 0
     
-    def add_document(self, doc_id: str, tokens: List[str], metadata: Dict = None) -> None:
+    def add_document(
+        self,
+        doc_id: str,
+        tokens: List[str],
+        metadata: Dict = None,
+        fields: Optional[Dict[str, List[str]]] = None
+    ) -> None:
         """
         Add document to index
         
@@ -31,18 +64,211 @@ class InvertedIndex:
             doc_id: Document identifier (URL)
             tokens: List of tokens from document
             metadata: Document metadata
+            fields: Optional {field: tokens} indexed separately (e.g. title, site)
         """
         # Store metadata
         self.documents[doc_id] = metadata or {}
+        self._assign_doc_number(doc_id)
         
         # Index tokens with positions
+        length = 0
         for position, token in enumerate(tokens):
             if token:  # Skip empty tokens
                 self.index[token][doc_id].append(position)
+                length += 1
+        self.doc_lengths[doc_id] = self.doc_lengths.get(doc_id, 0) + length
+        
+        for field, field_tokens in (fields or {}).items():
+            field_index = self.fields.setdefault(field, {})
+            for position, token in enumerate(field_tokens):
+                if token:
+                    field_index.setdefault(token, {}).setdefault(doc_id, []).append(position)
+        
+        self.postings_cache.invalidate()
+        self.generation += 1
         
         self.total_documents += 1
         logger.debug(f"Added document {doc_id} with {len(tokens)} tokens")
     
+    def _assign_doc_number(self, doc_id: str) -> int:
+        """Give a document the next integer number (kept if already numbered)"""
+        number = self.doc_numbers.get(doc_id)
+        if number is None:
+            number = len(self.doc_ids)
+            self.doc_numbers[doc_id] = number
+            self.doc_ids.append(doc_id)
+        return number
+    
+    def rebuild_doc_numbers(self) -> None:
+        """Renumber documents in metadata order (after loading from storage)"""
+        self.doc_numbers = {}
+        self.doc_ids = []
+        for doc_id in self.documents:
+            self._assign_doc_number(doc_id)
+        self.postings_cache.invalidate()
+        self.generation += 1
+    
+    @staticmethod
+    def site_key(domain: str) -> str:
+        """
+        Get sort key that groups a domain with its subdomains
+        
+        Args:
+            domain: Domain name, e.g. 'nyheter.svt.se'
+        
+        Returns:
+            Reversed labels with a trailing dot, e.g. 'se.svt.nyheter.'
+        """
+        domain = (domain or '').lower().strip('.')
+        if domain.startswith('www.'):
+            domain = domain[4:]
+        return '.'.join(reversed(domain.split('.'))) + '.' if domain else ''
+    
+    def reorder_documents(self) -> None:
+        """
+        Renumber documents grouped by domain (subdomains together), then by URL
+        
+        Per-site postings become contiguous runs, which shrinks delta gaps and
+        lets site: filters use a doc-number range. Postings dicts are rewritten
+        in the new order. Documents added afterwards are appended, which turns
+        range lookups off until the next reorder.
+        """
+        documents = self.documents
+        order = sorted(documents, key=lambda doc_id: (self.site_key(documents[doc_id].get('domain', '')), doc_id))
+        self.documents = {doc_id: documents[doc_id] for doc_id in order}
+        self.rebuild_doc_numbers()
+        
+        numbers = self.doc_numbers
+        
+        def rewrite(docs: Dict[str, List[int]]) -> Dict[str, List[int]]:
+            return {doc_id: docs[doc_id] for doc_id in sorted(docs, key=lambda doc_id: numbers.get(doc_id, -1))}
+        
+        for term in list(self.index):
+            self.index[term] = defaultdict(list, rewrite(self.index[term]))
+        for field_index in self.fields.values():
+            for term in list(field_index):
+                field_index[term] = rewrite(field_index[term])
+        
+        logger.info(f"Reordered {len(order)} documents by site")
+    
+    def get_site_range(self, domain: str) -> Optional[Tuple[int, int]]:
+        """
+        Get the doc-number range of a site (and its subdomains)
+        
+        Args:
+            domain: Domain name
+        
+        Returns:
+            (start, end) end exclusive, or None if numbering is not site-ordered
+        """
+        generation, keys = self._site_keys
+        if generation != self.generation:
+            keys = [self.site_key(self.documents.get(doc_id, {}).get('domain', '')) for doc_id in self.doc_ids]
+            if any(keys[i] > keys[i + 1] for i in range(len(keys) - 1)):
+                keys = None
+            self._site_keys = (self.generation, keys)
+        
+        if keys is None:
+            return None
+        
+        prefix = self.site_key(domain)
+        start = bisect_left(keys, prefix)
+        return start, bisect_left(keys, prefix + '\uffff', start)
+    
+    def get_postings_size(self) -> Dict:
+        """
+        Get main-index postings size as 4-byte integers and as varint gaps
+        
+        Returns:
+            Dictionary with raw and delta-encoded byte counts
+        """
+        postings = [self._decode_postings(term, None) for term in self.index]  # Bypasses the cache
+        raw = sum(len(docs) for docs in postings) * 4
+        encoded = sum(encoded_size(docs) for docs in postings)
+        
+        return {
+            'postings_raw_bytes': raw,
+            'postings_encoded_bytes': encoded,
+            'compression_ratio': round(raw / max(encoded, 1), 2)
+        }
+    
+    def rebuild_doc_lengths(self) -> None:
+        """Recount document lengths from the postings (after loading from storage)"""
+        lengths: Dict[str, int] = {}
+        for docs in self.index.values():
+            for doc_id, positions in docs.items():
+                lengths[doc_id] = lengths.get(doc_id, 0) + len(positions)
+        self.doc_lengths = lengths
+    
+    def get_postings(self, term: str, field: Optional[str] = None) -> List[int]:
+        """
+        Get sorted doc-number postings for a term
+        
+        Args:
+            term: Term to look up
+            field: Named field, or None for the main index
+        
+        Returns:
+            Ascending list of document numbers
+        """
+        term = term.lower()
+        key = (field, term)
+        postings = self.postings_cache.get(key)
+        if postings is None:
+            start = time.perf_counter()
+            postings = self._decode_postings(term, field)
+            self.postings_cache.put(key, postings, time.perf_counter() - start)
+        return postings
+    
+    def _decode_postings(self, term: str, field: Optional[str]) -> List[int]:
+        """Build the sorted doc-number list of a term from its stored postings"""
+        docs = self._field_postings(term, field)
+        doc_numbers = self.doc_numbers
+        return sorted(doc_numbers[doc_id] for doc_id in docs if doc_id in doc_numbers)
+    
+    def set_postings_cache(self, cache: PostingsCache) -> None:
+        """
+        Decode postings through another cache (e.g. one sized and reported by a CacheManager)
+        
+        Args:
+            cache: Postings cache to use from now on
+        """
+        cache.invalidate()
+        self.postings_cache = cache
+    
+    def get_positions(self, term: str, doc_id: str, field: Optional[str] = None) -> List[int]:
+        """
+        Get token positions of a term in a document
+        
+        Args:
+            term: Term to look up
+            doc_id: Document ID
+            field: Named field, or None for the main index
+        
+        Returns:
+            List of positions (empty if absent)
+        """
+        return self._field_postings(term.lower(), field).get(doc_id, [])
+    
+    def get_field_frequency(self, term: str, field: Optional[str] = None) -> int:
+        """
+        Get document frequency of term within a field
+        
+        Args:
+            term: Term to check
+            field: Named field, or None for the main index
+        
+        Returns:
+            Number of documents containing term in that field
+        """
+        return len(self._field_postings(term.lower(), field))
+    
+    def _field_postings(self, term: str, field: Optional[str]) -> Dict[str, List[int]]:
+        """Get {doc_id: positions} for a term in the main index or a named field"""
+        if field is None:
+            return self.index.get(term, {})
+        return self.fields.get(field, {}).get(term, {})
+    
     def search(self, term: str) -> Dict[str, List[int]]:
         """
         Search for term in index
@@ -123,6 +349,9 @@ class InvertedIndex:
         Returns:
             Number of terms in document
         """
+        if doc_id in self.doc_lengths:
+            return self.doc_lengths[doc_id]
+        
         length = 0
         for term, docs in self.index.items():
             if doc_id in docs:
@@ -134,14 +363,36 @@ class InvertedIndex:
         Get all terms in index
         
         Returns:
-            List of all unique terms
+            Sorted list of all unique terms
+        """
+        return list(self.get_term_dictionary().terms)
+    
+    def get_term_dictionary(self, field: Optional[str] = None) -> TermDictionary:
+        """
+        Get the sorted term dictionary (for prefix and wildcard lookups)
+        
+        Args:
+            field: Named field, or None for the main index
+        
+        Returns:
+            TermDictionary snapshot of the current index generation
         """
-        return list(self.index.keys())
+        cached = self._term_dictionaries.get(field)
+        if cached is not None and cached[0] == self.generation:
+            return cached[1]
+        
+        postings = self.index if field is None else self.fields.get(field, {})
+        dictionary = TermDictionary({term: len(docs) for term, docs in postings.items()})
+        self._term_dictionaries[field] = (self.generation, dictionary)
+        return dictionary
     
     def get_documents_containing_all(self, terms: List[str]) -> Set[str]:
         """
         Get documents containing all terms (AND search)
         
+        Postings come from get_postings, so hot terms are served by the
+        postings cache.
+        
         Args:
             terms: List of terms
         
@@ -151,31 +402,36 @@ class InvertedIndex:
         if not terms:
             return set()
         
-        # Start with documents containing first term
-        result = set(self.index.get(terms[0].lower(), {}).keys())
+        # Intersect smallest postings first so the candidate set shrinks fastest
+        postings = sorted((self.get_postings(term) for term in terms), key=len)
         
-        # Intersect with documents containing other terms
-        for term in terms[1:]:
-            docs = set(self.index.get(term.lower(), {}).keys())
-            result &= docs
+        result = set(postings[0])
+        for numbers in postings[1:]:
+            if not result:
+                break
+            result.intersection_update(numbers)
         
-        return result
+        doc_ids = self.doc_ids
+        return {doc_ids[number] for number in result}
     
     def get_documents_containing_any(self, terms: List[str]) -> Set[str]:
         """
         Get documents containing any term (OR search)
         
+        This is the candidate lookup of TF-IDF ranking; postings come from
+        get_postings, so hot terms are served by the postings cache.
+        
         Args:
             terms: List of terms
         
         Returns:
             Set of document IDs containing any term
         """
-        result = set()
+        numbers = set()
         for term in terms:
-            docs = set(self.index.get(term.lower(), {}).keys())
-            result |= docs
-        return result
+            numbers.update(self.get_postings(term))
+        doc_ids = self.doc_ids
+        return {doc_ids[number] for number in numbers}
     
     def validate_index_integrity(self) -> Dict:
         """
@@ -254,6 +510,28 @@ class InvertedIndex:
             "index_size_mb": round(self._estimate_size() / (1024 * 1024), 2)
         }
     
+    def get_field_statistics(self, field: str) -> Dict:
+        """
+        Get size statistics of a named field
+        
+        Args:
+            field: Named field
+        
+        Returns:
+            Dictionary with term, postings and position counts
+        """
+        field_index = self.fields.get(field, {})
+        postings = sum(len(docs) for docs in field_index.values())
+        positions = sum(len(positions) for docs in field_index.values() for positions in docs.values())
+        main_positions = sum(len(positions) for docs in self.index.values() for positions in docs.values())
+        
+        return {
+            "terms": len(field_index),
+            "postings": postings,
+            "positions": positions,
+            "positions_vs_main_index": round(positions / max(main_positions, 1), 2)
+        }
+    
     def _estimate_size(self) -> int:
         """
         Estimate memory size of index
@@ -287,6 +565,14 @@ class InvertedIndex:
         """Clear the index"""
         self.index.clear()
         self.documents.clear()
+        self.fields.clear()
+        self.doc_numbers.clear()
+        self.doc_ids.clear()
+        self.doc_lengths.clear()
+        self.postings_cache.invalidate()
+        self._term_dictionaries.clear()
+        self._site_keys = (-1, None)
+        self.generation += 1
         self.total_documents = 0
         self.total_terms = 0
         logger.info("Index cleared")
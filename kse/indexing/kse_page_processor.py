@@ -3,6 +3,7 @@ KSE Page Processor - Page parsing and preparation for indexing
 """
 from typing import Dict, List
 from kse.nlp.kse_nlp_core import NLPCore
+from kse.indexing.kse_duplicate_detector import fingerprint_text
 from kse.core.kse_logger import get_logger
 
 logger = get_logger(__name__)
@@ -11,14 +12,16 @@ logger = get_logger(__name__)
 class PageProcessor:
     """Process pages for indexing"""
     
-    def __init__(self, nlp_core: NLPCore):
+    def __init__(self, nlp_core: NLPCore, enable_shingles: bool = False):
         """
         Initialize page processor
         
         Args:
             nlp_core: NLP core instance
+            enable_shingles: Also produce word bigrams for the shingle field
         """
         self.nlp = nlp_core
+        self.enable_shingles = enable_shingles
     
     def process_page(self, page_data: Dict) -> Dict:
         """
@@ -37,6 +40,7 @@ class PageProcessor:
             description = page_data.get('description', '')
             content = page_data.get('content', '')
             domain = page_data.get('domain', '')
+            language = (page_data.get('language') or 'sv').split('-')[0].lower()
             
             # Process title (higher weight)
             title_tokens = self.nlp.process_text(title)
@@ -47,16 +51,39 @@ class PageProcessor:
             # Process main content
             content_tokens = self.nlp.process_text(content)
             
+            # Compound components (sjukvårdsupplysning -> sjuk, vård, upplysning)
+            compound_tokens = self.nlp.decompound(title_tokens + description_tokens + content_tokens)
+            
             # Combine tokens with weights
             # Title appears 3 times (higher weight)
             # Description appears 2 times
-            # Content appears 1 time
+            # Content and compound components appear 1 time (components are
+            # also kept in the 'compound' field, where TF-IDF down-weights them)
             all_tokens = (
                 title_tokens * 3 +
                 description_tokens * 2 +
-                content_tokens
+                content_tokens +
+                compound_tokens
             )
             
+            # Word bigrams per text field; the '' gap keeps pairs from spanning fields
+            shingle_tokens = []
+            if self.enable_shingles:
+                shingle_tokens = (
+                    self.nlp.shingles(title) + [''] +
+                    self.nlp.shingles(description) + [''] +
+                    self.nlp.shingles(content)
+                )
+            
+            # Near-duplicate fingerprint of the visible text
+            fingerprint = fingerprint_text(f"{title} {content}")
+            
+            # Term spans and sentence starts for query-biased snippets
+            content_annotations = {
+                'sentences': self.nlp.tokenizer.sentence_starts(content),
+                'terms': self.nlp.term_offsets(content)
+            }
+            
             # Extract keywords
             keywords = self.nlp.extract_keywords(content, max_keywords=10)
             
@@ -64,11 +91,18 @@ class PageProcessor:
                 'doc_id': url,
                 'url': url,
                 'domain': domain,
+                'language': language,
+                'crawl_time': page_data.get('crawl_time'),
                 'title': title,
                 'description': description,
+                'content': content,
+                'content_annotations': content_annotations,
                 'tokens': all_tokens,
                 'keywords': keywords,
                 'title_tokens': title_tokens,
+                'compound_tokens': compound_tokens,
+                'shingle_tokens': shingle_tokens,
+                'simhash': fingerprint,
                 'content_length': len(content),
                 'token_count': len(all_tokens),
                 'unique_token_count': len(set(all_tokens))
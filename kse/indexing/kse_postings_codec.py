@@ -0,0 +1,76 @@
+"""
+KSE Postings Codec - Delta + varint encoding of sorted doc-number postings
+
+Postings are stored as gaps between consecutive doc numbers, each written as
+a little-endian base-128 varint (7 bits per byte, high bit = more bytes).
+Small gaps, which doc-id reordering produces for clustered documents, take
+a single byte.
+"""
+from typing import Iterable, List
+
+
+def encode_postings(postings: Iterable[int]) -> bytes:
+    """
+    Encode sorted doc numbers as varint gaps
+    
+    Args:
+        postings: Ascending document numbers
+    
+    Returns:
+        Encoded bytes
+    """
+    out = bytearray()
+    previous = 0
+    for number in postings:
+        gap = number - previous
+        previous = number
+        while gap >= 0x80:
+            out.append((gap & 0x7F) | 0x80)
+            gap >>= 7
+        out.append(gap)
+    return bytes(out)
+
+
+def decode_postings(data: bytes) -> List[int]:
+    """
+    Decode varint gaps back to doc numbers
+    
+    Args:
+        data: Output of encode_postings
+    
+    Returns:
+        Ascending document numbers
+    """
+    postings = []
+    current = 0
+    gap = 0
+    shift = 0
+    for byte in data:
+        gap |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        current += gap
+        postings.append(current)
+        gap = 0
+        shift = 0
+    return postings
+
+
+def encoded_size(postings: List[int]) -> int:
+    """
+    Get encoded size without building the bytes
+    
+    Args:
+        postings: Ascending document numbers
+    
+    Returns:
+        Size in bytes
+    """
+    size = 0
+    previous = 0
+    for number in postings:
+        gap = number - previous
+        previous = number
+        size += 1 if gap < 0x80 else (gap.bit_length() + 6) // 7
+    return size
@@ -0,0 +1,237 @@
+"""
+KSE Spell Checker - "Menade du" corrections with a symmetric-delete index
+
+Every dictionary term is stored under all strings reachable by deleting up to
+MAX_EDIT_DISTANCE characters from its prefix. A misspelling is looked up by
+generating its own deletes, so no distance is computed against terms that
+cannot be close. Words are folded (å/ä -> a, ö -> o) before indexing, so
+diacritic confusions cost nothing.
+"""
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set
+import threading
+from kse.core.kse_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SpellChecker:
+    """Symmetric-delete (SymSpell) spelling correction over index terms"""
+    
+    MAX_EDIT_DISTANCE = 2
+    PREFIX_LENGTH = 7  # Only deletes of the first N characters are indexed
+    MIN_TERM_LENGTH = 3
+    
+    _FOLD_TABLE = str.maketrans({'å': 'a', 'ä': 'a', 'ö': 'o', 'é': 'e', 'ü': 'u'})
+    
+    def __init__(self):
+        """Initialize spell checker"""
+        self.frequencies: Dict[str, int] = {}  # term -> document frequency
+        self.deletes: Dict[str, Set[str]] = {}  # folded delete -> terms
+        self.is_built = False
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def fold(cls, word: str) -> str:
+        """
+        Fold Swedish diacritics (å/ä -> a, ö -> o)
+        
+        Args:
+            word: Lowercase word
+        
+        Returns:
+            Folded word
+        """
+        return word.translate(cls._FOLD_TABLE)
+    
+    def _generate_deletes(self, word: str, max_distance: int) -> Set[str]:
+        """All strings reachable from word's prefix by up to max_distance deletions"""
+        prefix = word[:self.PREFIX_LENGTH]
+        deletes = {prefix}
+        for distance in range(1, min(max_distance, len(prefix) - 1) + 1):
+            for removed in combinations(range(len(prefix)), distance):
+                deletes.add(''.join(
+                    char for index, char in enumerate(prefix) if index not in removed
+                ))
+        return deletes
+    
+    def add_terms(self, terms: Iterable[str], count: int = 1) -> int:
+        """
+        Add terms to the dictionary (incremental refresh after indexing)
+        
+        Args:
+            terms: Index terms
+            count: Frequency to add per term (e.g. one per document)
+        
+        Returns:
+            Number of new terms
+        """
+        added = 0
+        with self._lock:
+            for term in terms:
+                if len(term) < self.MIN_TERM_LENGTH or not term.isalpha():
+                    continue
+                
+                if term in self.frequencies:
+                    self.frequencies[term] += count
+                    continue
+                
+                self.frequencies[term] = count
+                for delete in self._generate_deletes(self.fold(term), self.MAX_EDIT_DISTANCE):
+                    self.deletes.setdefault(delete, set()).add(term)
+                added += 1
+        return added
+    
+    def build(self, term_frequencies: Dict[str, int]) -> None:
+        """
+        Build the delete index from a term dictionary
+        
+        Args:
+            term_frequencies: {term: document frequency}
+        """
+        with self._lock:
+            self.frequencies = {}
+            self.deletes = {}
+        
+        for term, frequency in term_frequencies.items():
+            self.add_terms([term], frequency)
+        
+        self.is_built = True
+        logger.info(f"Spell checker built: {len(self.frequencies)} terms, {len(self.deletes)} delete keys")
+    
+    def clear(self) -> None:
+        """Drop the dictionary (next use rebuilds)"""
+        with self._lock:
+            self.frequencies = {}
+            self.deletes = {}
+            self.is_built = False
+    
+    @staticmethod
+    def edit_distance(source: str, target: str, max_distance: int) -> int:
+        """
+        Optimal string alignment distance (adjacent transpositions cost 1)
+        
+        Args:
+            source: First word
+            target: Second word
+            max_distance: Stop early and return max_distance + 1 beyond this
+        
+        Returns:
+            Edit distance, or max_distance + 1 if it exceeds max_distance
+        """
+        if abs(len(source) - len(target)) > max_distance:
+            return max_distance + 1
+        
+        # Shared prefix and suffix never cost anything; trim before the DP
+        start = 0
+        while start < len(source) and start < len(target) and source[start] == target[start]:
+            start += 1
+        end_source, end_target = len(source), len(target)
+        while end_source > start and end_target > start and source[end_source - 1] == target[end_target - 1]:
+            end_source -= 1
+            end_target -= 1
+        source = source[start:end_source]
+        target = target[start:end_target]
+        
+        if not source or not target:
+            distance = len(source) + len(target)
+            return distance if distance <= max_distance else max_distance + 1
+        
+        previous_previous = None
+        previous = list(range(len(target) + 1))
+        for i in range(1, len(source) + 1):
+            current = [i] + [0] * len(target)
+            row_min = i
+            source_char = source[i - 1]
+            for j in range(1, len(target) + 1):
+                value = previous[j - 1] if source_char == target[j - 1] else previous[j - 1] + 1
+                if previous[j] + 1 < value:
+                    value = previous[j] + 1
+                if current[j - 1] + 1 < value:
+                    value = current[j - 1] + 1
+                if (previous_previous is not None and j > 1
+                        and source_char == target[j - 2] and source[i - 2] == target[j - 1]
+                        and previous_previous[j - 2] + 1 < value):
+                    value = previous_previous[j - 2] + 1
+                current[j] = value
+                if value < row_min:
+                    row_min = value
+            if row_min > max_distance:
+                return max_distance + 1
+            previous_previous, previous = previous, current
+        
+        return previous[-1] if previous[-1] <= max_distance else max_distance + 1
+    
+    def correct(self, word: str) -> Optional[str]:
+        """
+        Find the best correction for a word
+        
+        Candidates are ranked by folded distance, then exact distance (so
+        'gotebörg' prefers 'göteborg'), then frequency.
+        
+        Args:
+            word: Lowercase index-form word
+        
+        Returns:
+            Correction, the word itself if known, or None
+        """
+        if word in self.frequencies:
+            return word
+        if len(word) < self.MIN_TERM_LENGTH:
+            return None
+        
+        # Short words tolerate one edit, longer ones two
+        max_distance = 1 if len(word) <= 4 else self.MAX_EDIT_DISTANCE
+        folded = self.fold(word)
+        
+        candidates: Set[str] = set()
+        for delete in self._generate_deletes(folded, max_distance):
+            terms = self.deletes.get(delete)
+            if terms:
+                candidates.update(terms)
+        
+        best = None
+        best_key = None
+        for candidate in candidates:
+            # Anything worse than the current best is cut off early
+            bound = best_key[0] if best_key is not None else max_distance
+            distance = self.edit_distance(folded, self.fold(candidate), bound)
+            if distance > bound:
+                continue
+            key = (distance, self.edit_distance(word, candidate, max_distance + 2), -self.frequencies[candidate])
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        
+        return best
+    
+    def correct_terms(self, terms: List[str]) -> Dict[str, str]:
+        """
+        Correct unknown terms
+        
+        Args:
+            terms: Index-form query terms
+        
+        Returns:
+            Dictionary of {misspelled: correction} (known/uncorrectable terms omitted)
+        """
+        corrections = {}
+        for term in terms:
+            if term in self.frequencies:
+                continue
+            correction = self.correct(term)
+            if correction and correction != term:
+                corrections[term] = correction
+        return corrections
+    
+    def get_statistics(self) -> Dict:
+        """
+        Get spell checker statistics
+        
+        Returns:
+            Dictionary with statistics
+        """
+        return {
+            'is_built': self.is_built,
+            'terms': len(self.frequencies),
+            'delete_keys': len(self.deletes)
+        }
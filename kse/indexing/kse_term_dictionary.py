@@ -0,0 +1,153 @@
+"""
+KSE Term Dictionary - Sorted, immutable term list for prefix and wildcard lookups
+
+Prefix queries are a bisect range scan over the sorted terms. Infix wildcards
+use a 3-gram index ('$' marks word boundaries) to find candidate terms, which
+are then checked against the pattern. Expansions are capped so one short
+pattern cannot drag in the whole vocabulary.
+"""
+from bisect import bisect_left
+from heapq import nlargest
+from typing import Dict, Iterable, List, Optional, Tuple
+import re
+from kse.core.kse_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TermDictionary:
+    """Sorted term dictionary with a k-gram index for wildcards"""
+    
+    GRAM_SIZE = 3
+    MAX_EXPANSIONS = 50  # Terms one wildcard may expand to
+    MAX_SCAN_TERMS = 5000  # Candidate terms examined before picking the most frequent
+    MIN_LITERAL_CHARS = 2  # Patterns need this many literal characters
+    
+    def __init__(self, term_frequencies: Dict[str, int]):
+        """
+        Build term dictionary
+        
+        Args:
+            term_frequencies: {term: document frequency}
+        """
+        self.terms: Tuple[str, ...] = tuple(sorted(term_frequencies))
+        self.frequencies: Tuple[int, ...] = tuple(term_frequencies[term] for term in self.terms)
+        self._grams: Optional[Dict[str, List[int]]] = None  # Built on first infix query
+    
+    def __len__(self) -> int:
+        return len(self.terms)
+    
+    def __contains__(self, term: str) -> bool:
+        position = bisect_left(self.terms, term)
+        return position < len(self.terms) and self.terms[position] == term
+    
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """
+        Get the index range of terms starting with prefix
+        
+        Args:
+            prefix: Term prefix
+        
+        Returns:
+            (start, end) positions in self.terms, end exclusive
+        """
+        start = bisect_left(self.terms, prefix)
+        end = bisect_left(self.terms, prefix + '\uffff', start)
+        return start, end
+    
+    def expand_prefix(self, prefix: str, limit: int = None) -> List[str]:
+        """
+        Get the most frequent terms starting with prefix
+        
+        Args:
+            prefix: Term prefix
+            limit: Maximum terms (defaults to MAX_EXPANSIONS)
+        
+        Returns:
+            Terms ordered by document frequency, highest first
+        """
+        limit = limit or self.MAX_EXPANSIONS
+        if len(prefix) < self.MIN_LITERAL_CHARS:
+            return []
+        
+        start, end = self.prefix_range(prefix)
+        end = min(end, start + self.MAX_SCAN_TERMS)
+        return self._top_terms(range(start, end), limit)
+    
+    def expand_wildcard(self, pattern: str, limit: int = None) -> List[str]:
+        """
+        Get the most frequent terms matching a '*' wildcard pattern
+        
+        Args:
+            pattern: Pattern such as 'sjukvård*', '*vård' or 'sjuk*hus'
+            limit: Maximum terms (defaults to MAX_EXPANSIONS)
+        
+        Returns:
+            Terms ordered by document frequency, highest first
+        """
+        limit = limit or self.MAX_EXPANSIONS
+        pattern = pattern.lower()
+        
+        if len(pattern.replace('*', '')) < self.MIN_LITERAL_CHARS:
+            logger.info(f"Wildcard pattern too broad, ignored: {pattern}")
+            return []
+        
+        if '*' not in pattern:
+            return [pattern] if pattern in self else []
+        
+        leading, _, rest = pattern.partition('*')
+        if not rest.strip('*'):
+            return self.expand_prefix(leading, limit)
+        
+        matcher = re.compile('^' + '.*'.join(re.escape(part) for part in pattern.split('*')) + '$')
+        
+        candidates = self._gram_candidates(pattern)
+        if candidates is None:
+            # No usable grams: fall back to the (bounded) prefix range
+            if len(leading) < self.MIN_LITERAL_CHARS:
+                return []
+            start, end = self.prefix_range(leading)
+            candidates = range(start, min(end, start + self.MAX_SCAN_TERMS))
+        else:
+            candidates = candidates[:self.MAX_SCAN_TERMS]
+        
+        matching = [term_id for term_id in candidates if matcher.match(self.terms[term_id])]
+        return self._top_terms(matching, limit)
+    
+    def _top_terms(self, term_ids: Iterable[int], limit: int) -> List[str]:
+        """Most frequent terms among term ids"""
+        top = nlargest(limit, term_ids, key=lambda term_id: self.frequencies[term_id])
+        return [self.terms[term_id] for term_id in top]
+    
+    def _build_grams(self) -> Dict[str, List[int]]:
+        """Map every 3-gram of '$term$' to the sorted ids of terms containing it"""
+        grams: Dict[str, List[int]] = {}
+        size = self.GRAM_SIZE
+        for term_id, term in enumerate(self.terms):
+            padded = f"${term}$"
+            for gram in {padded[i:i + size] for i in range(len(padded) - size + 1)}:
+                grams.setdefault(gram, []).append(term_id)
+        logger.info(f"Built {len(grams)} k-grams for {len(self.terms)} terms")
+        return grams
+    
+    def _gram_candidates(self, pattern: str) -> Optional[List[int]]:
+        """Intersect gram postings of the literal pattern parts (None if it has no grams)"""
+        if self._grams is None:
+            self._grams = self._build_grams()
+        
+        size = self.GRAM_SIZE
+        gram_lists = []
+        for part in f"${pattern}$".split('*'):
+            for i in range(len(part) - size + 1):
+                gram_lists.append(self._grams.get(part[i:i + size], []))
+        
+        if not gram_lists:
+            return None
+        
+        gram_lists.sort(key=len)
+        candidates = set(gram_lists[0])
+        for term_ids in gram_lists[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(term_ids)
+        return sorted(candidates)
@@ -2,7 +2,7 @@
 KSE TF-IDF Calculator - Term Frequency-Inverse Document Frequency computation
 """
 import math
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 from kse.indexing.kse_inverted_index import InvertedIndex
 from kse.core.kse_logger import get_logger
 
@@ -12,6 +12,11 @@ logger = get_logger(__name__)
 class TFIDFCalculator:
     """Calculate TF-IDF scores for terms and documents"""
     
+    DEADLINE_CHECK_INTERVAL = 64  # Documents scored between deadline checks
+    DEGRADED_MAX_CANDIDATES = 100  # Candidate cap once the search deadline has passed
+    COMPOUND_FIELD = 'compound'  # Field recording terms that were indexed as compound components
+    COMPOUND_WEIGHT = 0.5  # A component occurrence counts half as much as the word itself
+    
     def __init__(self, inverted_index: InvertedIndex):
         """
         Initialize TF-IDF calculator
@@ -26,6 +31,10 @@ class TFIDFCalculator:
         """
         Calculate term frequency (TF)
         
+        Occurrences that only come from splitting a compound are counted at
+        COMPOUND_WEIGHT, so "vård" scores lower in a document that only
+        contains "sjukvård" than in one containing the word itself.
+        
         Args:
             term: Term to calculate TF for
             doc_id: Document ID
@@ -35,6 +44,9 @@ class TFIDFCalculator:
         """
         # Get term frequency in document
         tf = self.index.get_term_frequency(term, doc_id)
+        if tf:
+            components = len(self.index.get_positions(term, doc_id, self.COMPOUND_FIELD))
+            tf -= components * (1.0 - self.COMPOUND_WEIGHT)
         
         # Get document length
         doc_length = self.index.get_document_length(doc_id)
@@ -133,12 +145,17 @@ class TFIDFCalculator:
         
         return vector
     
-    def calculate_query_vector(self, query_terms: List[str]) -> Dict[str, float]:
+    def calculate_query_vector(
+        self,
+        query_terms: List[str],
+        term_weights: Optional[Dict[str, float]] = None
+    ) -> Dict[str, float]:
         """
         Calculate TF-IDF vector for query
         
         Args:
             query_terms: List of query terms
+            term_weights: Optional {term: weight} multipliers (missing terms weigh 1.0)
         
         Returns:
             Dictionary of {term: idf_score}
@@ -148,24 +165,32 @@ class TFIDFCalculator:
         # For queries, use IDF scores (TF is uniform)
         for term in query_terms:
             idf = self.calculate_idf(term)
+            if term_weights:
+                idf *= term_weights.get(term, 1.0)
             if idf > 0:
                 vector[term] = idf
         
         return vector
     
-    def calculate_similarity(self, query_terms: List[str], doc_id: str) -> float:
+    def calculate_similarity(
+        self,
+        query_terms: List[str],
+        doc_id: str,
+        term_weights: Optional[Dict[str, float]] = None
+    ) -> float:
         """
         Calculate cosine similarity between query and document
         
         Args:
             query_terms: List of query terms
             doc_id: Document ID
+            term_weights: Optional {term: weight} multipliers for query terms
         
         Returns:
             Similarity score (0-1)
         """
         # Get vectors
-        query_vector = self.calculate_query_vector(query_terms)
+        query_vector = self.calculate_query_vector(query_terms, term_weights)
         doc_vector = self.calculate_document_vector(doc_id)
         
         if not query_vector or not doc_vector:
@@ -189,16 +214,29 @@ class TFIDFCalculator:
         
         return similarity
     
-    def rank_documents(self, query_terms: List[str], doc_ids: List[str] = None, max_candidates: int = 1000) -> List[tuple]:
+    def rank_documents(
+        self,
+        query_terms: List[str],
+        doc_ids: List[str] = None,
+        max_candidates: int = 1000,
+        term_weights: Optional[Dict[str, float]] = None,
+        doc_filter: Optional[Callable[[str], bool]] = None,
+        context=None
+    ) -> List[tuple]:
         """
         Rank documents by TF-IDF similarity to query
         
         Limits scoring to top candidates to prevent expensive full-corpus ranking.
+        With a search deadline, fewer candidates are scored once it has passed
+        and scoring stops at the deadline, returning what was scored so far.
         
         Args:
             query_terms: List of query terms
             doc_ids: List of document IDs to rank (None = retrieve from index)
             max_candidates: Maximum candidate documents to score (prevents O(N) explosion)
+            term_weights: Optional {term: weight} multipliers, e.g. for query expansions
+            doc_filter: Optional doc-id predicate (e.g. facet filters), applied before scoring
+            context: Optional SearchContext with a deadline (marked degraded on cut-off)
         
         Returns:
             List of (doc_id, score) tuples, sorted by score descending
@@ -207,6 +245,9 @@ class TFIDFCalculator:
             # Get all documents containing at least one query term
             doc_ids = self.index.get_documents_containing_any(query_terms)
         
+        if doc_filter is not None:
+            doc_ids = [doc_id for doc_id in doc_ids if doc_filter(doc_id)]
+        
         if not doc_ids:
             return []
         
@@ -214,13 +255,23 @@ class TFIDFCalculator:
         if isinstance(doc_ids, set):
             doc_ids = list(doc_ids)
         
+        # Out of time before scoring: score only the strongest few candidates
+        if context is not None and context.expired() and len(doc_ids) > self.DEGRADED_MAX_CANDIDATES:
+            max_candidates = min(max_candidates, self.DEGRADED_MAX_CANDIDATES)
+            context.degrade('retrieval')
+        
         # Cap candidates to prevent excessive computation
         # This implements: "Cap work per query, not data size"
         if len(doc_ids) > max_candidates:
-            # Use a simple heuristic: prioritize documents with more query terms
+            # Use a simple heuristic: prioritize documents with more (weighted) query terms
+            weights = term_weights or {}
             doc_term_counts = {}
-            for doc_id in doc_ids:
-                count = sum(1 for term in query_terms 
+            for i, doc_id in enumerate(doc_ids):
+                if context is not None and i % self.DEADLINE_CHECK_INTERVAL == 0 and i >= max_candidates \
+                        and context.expired():
+                    context.degrade('retrieval')
+                    break
+                count = sum(weights.get(term, 1.0) for term in query_terms 
                           if self.index.get_term_frequency(term, doc_id) > 0)
                 doc_term_counts[doc_id] = count
             
@@ -232,8 +283,12 @@ class TFIDFCalculator:
         
         # Calculate similarity scores
         scores = []
-        for doc_id in doc_ids:
-            score = self.calculate_similarity(query_terms, doc_id)
+        for i, doc_id in enumerate(doc_ids):
+            if context is not None and i and i % self.DEADLINE_CHECK_INTERVAL == 0 and context.expired():
+                logger.info(f"Search deadline reached after scoring {i} of {len(doc_ids)} candidates")
+                context.degrade('retrieval')
+                break
+            score = self.calculate_similarity(query_terms, doc_id, term_weights)
             if score > 0:
                 scores.append((doc_id, score))
         
@@ -9,20 +9,24 @@ from datetime import datetime
 import threading
 import time
 
+from kse.core.kse_memory_budget import MemoryBudget
+
 logger = logging.getLogger(__name__)
 
 
 class MonitoringCore:
     """Main monitoring system orchestrator"""
     
-    def __init__(self, check_interval: int = 60):
+    def __init__(self, check_interval: int = 60, memory_budget: Optional[MemoryBudget] = None):
         """
         Initialize monitoring core
         
         Args:
             check_interval: Interval between health checks in seconds
+            memory_budget: Process MemoryBudget whose per-consumer usage is reported
         """
         self.check_interval = check_interval
+        self.memory_budget = memory_budget
         self.monitoring_active = False
         self.monitor_thread = None
         
@@ -83,12 +87,15 @@ class MonitoringCore:
         health = self.health_checker.check_system_health()
         metrics = self.metrics_collector.get_current_metrics()
         
-        return {
+        status = {
             'timestamp': datetime.now().isoformat(),
             'health': health,
             'metrics': metrics,
             'monitoring_active': self.monitoring_active
         }
+        if self.memory_budget is not None:
+            status['memory_budget'] = self.memory_budget.get_stats()
+        return status
     
     def check_component(self, component_name: str) -> Dict[str, Any]:
         """
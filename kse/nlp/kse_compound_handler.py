@@ -0,0 +1,184 @@
+"""
+KSE Compound Handler - Swedish compound word splitting
+
+Compounds are split at index time so a query for "vård" finds
+"sjukvårdsupplysning" with an ordinary postings lookup. The lexicon is
+compiled once into two lookup tables: modifier forms (a word as it appears
+before another part, with linking morphemes such as bostad-s- and skol-)
+and head forms (the last part, with inflection endings). Splitting is then a
+dynamic program over dictionary hits, memoized per word.
+"""
+from typing import Dict, List, Set, Tuple
+from pathlib import Path
+from kse.core.kse_logger import get_logger
+from kse.core.kse_constants import COMPOUND_LEXICON_FILE, SWEDISH_COMPOUND_MIN_LENGTH
+
+logger = get_logger(__name__)
+
+
+class SwedishCompoundHandler:
+    """Split Swedish compound words into lexicon components"""
+    
+    MIN_PART_LENGTH = 3
+    LINKING_MORPHEMES = ('s', 'e', 'a', 'u', 'o')  # Fogemorfem: bostad-s-rätt, gat-u-kök
+    HEAD_SUFFIXES = ('en', 'et', 'n', 't', 'ar', 'er', 'or', 'na', 'arna', 'erna', 'orna', 's', 'ens', 'ets')
+    MAX_CACHE_SIZE = 100000  # Memoized words before the cache is reset
+    
+    def __init__(self, lexicon_file: Path = COMPOUND_LEXICON_FILE, min_compound_length: int = SWEDISH_COMPOUND_MIN_LENGTH):
+        """
+        Initialize compound handler
+        
+        Args:
+            lexicon_file: Path to component lexicon (one base form per line)
+            min_compound_length: Shorter words are never split
+        """
+        self.min_compound_length = min_compound_length
+        self.lexicon: Set[str] = set()
+        self._modifier_forms: Dict[str, str] = {}  # Surface form -> base word
+        self._head_forms: Dict[str, str] = {}
+        self._max_form_length = 0
+        self._cache: Dict[str, Tuple[str, ...]] = {}
+        
+        self._load_lexicon(lexicon_file)
+        self._compile()
+    
+    def _load_lexicon(self, lexicon_file: Path) -> None:
+        """Load component lexicon from file"""
+        try:
+            if lexicon_file.exists():
+                with open(lexicon_file, 'r', encoding='utf-8') as f:
+                    self.lexicon = {
+                        line.strip().lower() for line in f
+                        if line.strip() and not line.startswith('#')
+                    }
+                logger.info(f"Loaded {len(self.lexicon)} compound components")
+            else:
+                logger.warning(f"Compound lexicon not found: {lexicon_file}")
+        except Exception as e:
+            logger.error(f"Failed to load compound lexicon: {e}")
+    
+    def add_words(self, words) -> None:
+        """
+        Add words to the lexicon
+        
+        Args:
+            words: Iterable of base forms
+        """
+        self.lexicon.update(word.lower() for word in words if word)
+        self._compile()
+    
+    def _compile(self) -> None:
+        """Precompute modifier and head surface forms for every lexicon word"""
+        modifiers: Dict[str, str] = {}
+        heads: Dict[str, str] = {}
+        
+        for word in self.lexicon:
+            if len(word) < self.MIN_PART_LENGTH:
+                continue
+            
+            forms = [word] + [word + link for link in self.LINKING_MORPHEMES]
+            if word[-1] in 'aeo':
+                # Final vowel drops or changes before the next part: skola -> skol-, gata -> gatu-
+                stem = word[:-1]
+                forms += [stem] + [stem + link for link in self.LINKING_MORPHEMES]
+            for form in forms:
+                if len(form) >= self.MIN_PART_LENGTH:
+                    modifiers.setdefault(form, word)
+            
+            heads[word] = word
+            for suffix in self.HEAD_SUFFIXES:
+                heads.setdefault(word + suffix, word)
+        
+        self._modifier_forms = modifiers
+        self._head_forms = heads
+        self._max_form_length = max((len(form) for form in modifiers), default=0)
+        self._cache.clear()
+    
+    def split(self, word: str) -> List[str]:
+        """
+        Split compound into components
+        
+        Args:
+            word: Word to split (lowercase)
+        
+        Returns:
+            Component base forms in order, or [] if the word is not a known compound
+        """
+        if len(word) < self.min_compound_length or word in self.lexicon:
+            return []
+        
+        cached = self._cache.get(word)
+        if cached is None:
+            cached = self._split(word)
+            if len(self._cache) >= self.MAX_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[word] = cached
+        return list(cached)
+    
+    def _split(self, word: str) -> Tuple[str, ...]:
+        """Fewest-parts segmentation: modifier forms followed by one head form"""
+        length = len(word)
+        min_part = self.MIN_PART_LENGTH
+        modifiers = self._modifier_forms
+        
+        # best[i]: fewest parts covering word[i:], with the chosen (end, base) in choice[i]
+        best = [0] * (length + 1)
+        choice: List[Tuple[int, str]] = [None] * (length + 1)
+        
+        for start in range(length - min_part, -1, -1):
+            head = self._head_forms.get(word[start:])
+            if head is not None:
+                best[start] = 1
+                choice[start] = (length, head)
+                continue
+            
+            stop = min(start + self._max_form_length, length - min_part)
+            for end in range(stop, start + min_part - 1, -1):  # Longest modifier first
+                if best[end] and (choice[start] is None or best[end] + 1 < best[start]):
+                    base = modifiers.get(word[start:end])
+                    if base is not None:
+                        best[start] = best[end] + 1
+                        choice[start] = (end, base)
+        
+        if best[0] < 2:
+            return ()
+        
+        parts = []
+        position = 0
+        while position < length:
+            position, base = choice[position]
+            parts.append(base)
+        return tuple(parts)
+    
+    def decompound(self, tokens: List[str]) -> List[str]:
+        """
+        Get components of all compounds in a token list
+        
+        Args:
+            tokens: Tokens (lowercase)
+        
+        Returns:
+            Distinct components in first-seen order
+        """
+        seen = set()
+        components = []
+        for token in tokens:
+            for part in self.split(token):
+                if part not in seen:
+                    seen.add(part)
+                    components.append(part)
+        return components
+    
+    def get_statistics(self) -> Dict:
+        """
+        Get compound handler statistics
+        
+        Returns:
+            Dictionary with statistics
+        """
+        return {
+            'lexicon_size': len(self.lexicon),
+            'compiled_forms': len(self._modifier_forms) + len(self._head_forms),
+            'cached_words': len(self._cache),
+            'min_compound_length': self.min_compound_length
+        }
@@ -1,10 +1,12 @@
 """
 KSE NLP Core - Main NLP coordinator for Swedish language processing
 """
-from typing import List
+from typing import Dict, List
 from kse.nlp.kse_tokenizer import SwedishTokenizer
 from kse.nlp.kse_lemmatizer import SwedishLemmatizer
 from kse.nlp.kse_stopwords import SwedishStopwords
+from kse.nlp.kse_compound_handler import SwedishCompoundHandler
+from kse.core.kse_constants import SWEDISH_COMPOUND_MIN_LENGTH
 from kse.core.kse_logger import get_logger
 
 logger = get_logger(__name__)
@@ -13,23 +15,34 @@ logger = get_logger(__name__)
 class NLPCore:
     """Main NLP coordinator for Swedish text processing"""
     
-    def __init__(self, enable_lemmatization: bool = True, enable_stopword_removal: bool = True):
+    def __init__(
+        self,
+        enable_lemmatization: bool = True,
+        enable_stopword_removal: bool = True,
+        enable_compound_splitting: bool = True,
+        min_compound_length: int = SWEDISH_COMPOUND_MIN_LENGTH
+    ):
         """
         Initialize NLP core
         
         Args:
             enable_lemmatization: Enable lemmatization
             enable_stopword_removal: Enable stopword removal
+            enable_compound_splitting: Enable index-time compound splitting
+            min_compound_length: Shortest word considered for splitting
         """
         self.tokenizer = SwedishTokenizer()
         self.lemmatizer = SwedishLemmatizer() if enable_lemmatization else None
         self.stopwords = SwedishStopwords() if enable_stopword_removal else None
+        self.compound_handler = SwedishCompoundHandler(min_compound_length=min_compound_length) if enable_compound_splitting else None
         
         self.enable_lemmatization = enable_lemmatization
         self.enable_stopword_removal = enable_stopword_removal
+        self.enable_compound_splitting = enable_compound_splitting
         
         logger.info(f"NLP Core initialized (lemmatization: {enable_lemmatization}, "
-                   f"stopword removal: {enable_stopword_removal})")
+                   f"stopword removal: {enable_stopword_removal}, "
+                   f"compound splitting: {enable_compound_splitting})")
     
     def process_text(self, text: str) -> List[str]:
         """
@@ -66,6 +79,108 @@ class NLPCore:
         
         return unique_tokens
     
+    def decompound(self, tokens: List[str]) -> List[str]:
+        """
+        Get index terms for the components of compound tokens
+        
+        Components go through the same lemmatizer as queries, so "vård"
+        matches a document containing "sjukvårdsupplysning".
+        
+        Args:
+            tokens: Processed tokens of a document
+        
+        Returns:
+            Component terms not already among tokens
+        """
+        if not (self.enable_compound_splitting and self.compound_handler) or not tokens:
+            return []
+        
+        components = self.compound_handler.decompound(tokens)
+        if self.enable_lemmatization and self.lemmatizer:
+            components = self.lemmatizer.lemmatize_tokens(components)
+        
+        present = set(tokens)
+        terms = []
+        for component in components:
+            if component not in present and len(component) > 1:
+                present.add(component)
+                terms.append(component)
+        return terms
+    
+    def term_offsets(self, text: str) -> Dict[str, List[int]]:
+        """
+        Get character spans of the index terms in text
+        
+        Words go through the same stopword removal and lemmatization as
+        process_text but are not de-duplicated. Compound components map to
+        the span of the whole compound.
+        
+        Args:
+            text: Text to process
+        
+        Returns:
+            term -> flat [start, end, start, end, ...] in text order
+        """
+        offsets: Dict[str, List[int]] = {}
+        analyzed: Dict[str, List[str]] = {}  # Surface word -> terms, each word analyzed once
+        
+        for word, start, end in self.tokenizer.tokenize_with_offsets(text):
+            terms = analyzed.get(word)
+            if terms is None:
+                terms = self._analyze_word(word)
+                analyzed[word] = terms
+            for term in terms:
+                offsets.setdefault(term, []).extend((start, end))
+        
+        return offsets
+    
+    def _analyze_word(self, word: str) -> List[str]:
+        """Index terms of one lowercase word (empty for stopwords)"""
+        if self.enable_stopword_removal and self.stopwords and self.stopwords.is_stopword(word):
+            return []
+        if self.enable_lemmatization and self.lemmatizer:
+            word = self.lemmatizer.lemmatize(word)
+        if len(word) <= 1:
+            return []
+        return [word] + self.decompound([word])
+    
+    def shingles(self, text: str) -> List[str]:
+        """
+        Get adjacent-word bigrams of text, stopwords included
+        
+        Words are lemmatized but neither removed nor de-duplicated, so
+        "vad är klockan" keeps the pairs its stopwords take part in.
+        
+        Args:
+            text: Text to process
+        
+        Returns:
+            Bigrams as "word word" in text order
+        """
+        tokens = self.phrase_tokens(text)
+        return [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+    
+    def phrase_tokens(self, text: str) -> List[str]:
+        """
+        Get the lemmatized word sequence of text, stopwords included
+        
+        Phrases are matched against this sequence, so "stockholm stad" does
+        not match "Stockholm har en stad".
+        
+        Args:
+            text: Text to process
+        
+        Returns:
+            Lemmatized words in text order
+        """
+        if not text:
+            return []
+        
+        tokens = self.tokenizer.tokenize(text, lowercase=True, remove_numbers=True)
+        if self.enable_lemmatization and self.lemmatizer:
+            tokens = self.lemmatizer.lemmatize_tokens(tokens)
+        return tokens
+    
     def process_query(self, query: str) -> List[str]:
         """
         Process search query
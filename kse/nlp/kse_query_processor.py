@@ -4,6 +4,7 @@ KSE Query Processor - Enhanced query processing for natural language searches
 import re
 from typing import List, Dict, Set, Tuple
 from kse.core.kse_logger import get_logger
+from kse.utils.kse_pattern_matcher import PatternMatcher
 
 logger = get_logger(__name__)
 
@@ -11,6 +12,10 @@ logger = get_logger(__name__)
 class QueryProcessor:
     """Enhanced query processor for natural language understanding"""
     
+    # Relative weights of expansion terms (original query terms weigh 1.0)
+    SYNONYM_WEIGHT = 0.5
+    PATTERN_WEIGHT = 0.3
+    
     def __init__(self):
         """Initialize query processor"""
         # Swedish question words
@@ -56,6 +61,29 @@ class QueryProcessor:
             (r'jämföra? (.*)', r'\1 skillnad kontrast test'),
         ]
         
+        # Intent keywords, checked in priority order (first match wins)
+        self.intent_keywords = [
+            ('shopping', ['köpa', 'köp', 'pris', 'beställa']),
+            ('definition', ['vad är', 'vad betyder', 'definition']),
+            ('how_to', ['hur', 'guide', 'tutorial']),
+            ('location', ['var finns', 'var ligger', 'adress']),
+            ('time', ['när', 'datum', 'tid', 'öppettider']),
+            ('news', ['senaste', 'nyheter', 'aktuellt', 'idag']),
+            ('recommendation', ['bästa', 'rekommendation', 'jämför', 'test']),
+        ]
+        self._intent_matcher = PatternMatcher(
+            (keyword, intent) for intent, keywords in self.intent_keywords for keyword in keywords
+        )
+        
+        # Synonym lookup: any word of a group maps to its base word. Only the
+        # first group listing a word is used, matching dictionary order.
+        self._synonym_matcher = PatternMatcher(whole_words=True)
+        for base_word, synonyms in self.synonyms.items():
+            for word in [base_word] + synonyms:
+                if not self._synonym_matcher.payloads_for(word):
+                    self._synonym_matcher.add(word, base_word)
+        self._synonym_matcher.build()
+        
         logger.info("QueryProcessor initialized with synonym expansion")
     
     def process_query(self, query: str) -> Dict[str, any]:
@@ -69,7 +97,7 @@ class QueryProcessor:
             Dict with processed query data including expanded terms, intent, etc.
         """
         if not query:
-            return {'terms': [], 'expanded_terms': [], 'intent': None, 'is_question': False}
+            return {'terms': [], 'expanded_terms': [], 'expansion_weights': {}, 'intent': None, 'is_question': False}
         
         query = query.strip().lower()
         
@@ -84,6 +112,7 @@ class QueryProcessor:
         
         # Expand terms with synonyms
         expanded_terms = self._expand_terms(terms)
+        synonym_terms = expanded_terms[len(terms):]
         
         # Apply phrase patterns
         pattern_terms = self._apply_phrase_patterns(query)
@@ -96,6 +125,7 @@ class QueryProcessor:
             'original': query,
             'terms': terms,
             'expanded_terms': expanded_terms,
+            'expansion_weights': self._weight_expansions(terms, synonym_terms, pattern_terms),
             'intent': intent,
             'is_question': is_question,
             'query_type': self._get_query_type(query, is_question)
@@ -119,28 +149,11 @@ class QueryProcessor:
     
     def _detect_intent(self, query: str) -> str:
         """Detect user intent from query"""
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in ['köpa', 'köp', 'pris', 'beställa']):
-            return 'shopping'
-        
-        if any(word in query_lower for word in ['vad är', 'vad betyder', 'definition']):
-            return 'definition'
-        
-        if any(word in query_lower for word in ['hur', 'guide', 'tutorial']):
-            return 'how_to'
+        matched_intents = self._intent_matcher.matched_payloads(query.lower())
         
-        if any(word in query_lower for word in ['var finns', 'var ligger', 'adress']):
-            return 'location'
-        
-        if any(word in query_lower for word in ['när', 'datum', 'tid', 'öppettider']):
-            return 'time'
-        
-        if any(word in query_lower for word in ['senaste', 'nyheter', 'aktuellt', 'idag']):
-            return 'news'
-        
-        if any(word in query_lower for word in ['bästa', 'rekommendation', 'jämför', 'test']):
-            return 'recommendation'
+        for intent, _ in self.intent_keywords:
+            if intent in matched_intents:
+                return intent
         
         return 'informational'
     
@@ -179,15 +192,42 @@ class QueryProcessor:
         """Expand terms with synonyms"""
         expanded = list(terms)  # Start with original terms
         
-        for term in terms:
-            # Check if term has synonyms
-            for base_word, synonyms in self.synonyms.items():
-                if term in synonyms or term == base_word:
-                    expanded.extend([base_word] + synonyms)
-                    break
+        # One pass over all terms; whole-word matching keeps lookups exact
+        matches = self._synonym_matcher.iter_matches(' '.join(terms))
+        for _, _, word in matches:
+            base_word = self._synonym_matcher.payloads_for(word)[0]
+            expanded.extend([base_word] + self.synonyms[base_word])
         
         return expanded
     
+    def _weight_expansions(
+        self,
+        terms: List[str],
+        synonym_terms: List[str],
+        pattern_terms: List[str]
+    ) -> Dict[str, float]:
+        """
+        Assign weights to expansion terms
+        
+        Args:
+            terms: Original query terms (excluded from the result)
+            synonym_terms: Terms added by synonym expansion
+            pattern_terms: Terms added by phrase patterns
+        
+        Returns:
+            Dictionary of {term: weight}, strongest source wins
+        """
+        weights: Dict[str, float] = {}
+        for term in pattern_terms:
+            weights[term] = max(weights.get(term, 0.0), self.PATTERN_WEIGHT)
+        for term in synonym_terms:
+            weights[term] = max(weights.get(term, 0.0), self.SYNONYM_WEIGHT)
+        
+        for term in terms:
+            weights.pop(term, None)
+        
+        return weights
+    
     def _apply_phrase_patterns(self, query: str) -> List[str]:
         """Apply phrase pattern matching"""
         additional_terms = []
@@ -195,13 +235,8 @@ class QueryProcessor:
         for pattern, replacement in self.phrase_patterns:
             match = re.search(pattern, query)
             if match:
-                if isinstance(replacement, str):
-                    # Fixed replacement
-                    additional_terms.extend(replacement.split())
-                else:
-                    # Regex group replacement
-                    expanded = re.sub(pattern, replacement, query)
-                    additional_terms.extend(expanded.split())
+                # Fills group references (\1) with the matched query words
+                additional_terms.extend(match.expand(replacement).split())
         
         return additional_terms
     
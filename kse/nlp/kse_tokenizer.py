@@ -2,7 +2,7 @@
 KSE Tokenizer - Swedish tokenization and normalization
 """
 import re
-from typing import List
+from typing import List, Tuple
 from kse.core.kse_logger import get_logger
 
 logger = get_logger(__name__)
@@ -16,6 +16,7 @@ class SwedishTokenizer:
         # Swedish alphabet includes å, ä, ö
         self.word_pattern = re.compile(r'\b[a-zåäöA-ZÅÄÖ]+\b')
         self.number_pattern = re.compile(r'\d+')
+        self.sentence_end_pattern = re.compile(r'[.!?]+\s+')
     
     def tokenize(self, text: str, lowercase: bool = True, remove_numbers: bool = True) -> List[str]:
         """
@@ -48,6 +49,34 @@ class SwedishTokenizer:
         
         return tokens
     
+    def tokenize_with_offsets(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Tokenize text into lowercase words with character spans
+        
+        Args:
+            text: Text to tokenize
+        
+        Returns:
+            List of (word, start, end) in text order
+        """
+        if not text:
+            return []
+        return [(match.group().lower(), match.start(), match.end()) for match in self.word_pattern.finditer(text)]
+    
+    def sentence_starts(self, text: str) -> List[int]:
+        """
+        Get character offsets where sentences start
+        
+        Args:
+            text: Text to split
+        
+        Returns:
+            Ascending offsets, starting with 0
+        """
+        if not text:
+            return []
+        return [0] + [match.end() for match in self.sentence_end_pattern.finditer(text) if match.end() < len(text)]
+    
     def normalize_word(self, word: str) -> str:
         """
         Normalize a single word
@@ -40,7 +40,8 @@ class DiversityRanker:
         domain_counts = defaultdict(int)
         
         for result in results:
-            domain = self._extract_domain(result.get('url', ''))
+            # Results carry the indexed domain; only parse the URL when it is missing
+            domain = result.get('domain') or self._extract_domain(result.get('url', ''))
             
             if domain_counts[domain] < self.max_per_domain:
                 diversified.append(result)
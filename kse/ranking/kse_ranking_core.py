@@ -54,6 +54,14 @@ class RankingCore:
             logger.warning(f"Could not load semantic similarity: {e}")
             self.has_semantic = False
         
+        # Regional scorer compiles its keyword automaton once and is shared by all results
+        try:
+            from kse.ranking.kse_regional_relevance import RegionalRelevance
+            self.regional_scorer = RegionalRelevance()
+        except Exception as e:
+            logger.warning(f"Could not load regional relevance: {e}")
+            self.regional_scorer = None
+        
         logger.info(f"RankingCore initialized with weights: {self.weights}")
     
     def rank_results(
@@ -62,7 +70,8 @@ class RankingCore:
         query_terms: List[str],
         ranking_data: Optional[Dict[str, Any]] = None,
         original_query: str = "",
-        query_intent: str = None
+        query_intent: str = None,
+        context=None
     ) -> List[Dict[str, Any]]:
         """
         Apply comprehensive ranking to search results
@@ -73,6 +82,8 @@ class RankingCore:
             ranking_data: Optional pre-computed ranking data (PageRank, Domain Authority, etc.)
             original_query: Original user query for semantic analysis
             query_intent: Detected query intent
+            context: Optional SearchContext; past its deadline the semantic rerank is
+                skipped (neutral 0.5) and the stage is marked degraded
         
         Returns:
             Ranked and scored results
@@ -81,6 +92,12 @@ class RankingCore:
             logger.debug("No results to rank")
             return []
         
+        use_semantic = self.has_semantic
+        if use_semantic and context is not None and context.expired():
+            logger.info("Search deadline reached, skipping semantic rerank")
+            context.degrade('semantic')
+            use_semantic = False
+        
         logger.debug(f"Ranking {len(results)} results with {len(query_terms)} query terms")
         
         # Initialize ranking data if not provided
@@ -102,7 +119,7 @@ class RankingCore:
                 'regional_relevance': self._calculate_regional_score(result),
                 'semantic_similarity': self._calculate_semantic_score(
                     original_query, result, query_intent
-                ) if self.has_semantic else 0.5,
+                ) if use_semantic else 0.5,
                 'recency': self._calculate_recency_score(result),
                 'keyword_density': self._calculate_keyword_density(result, query_terms),
                 'link_structure': self._calculate_link_score(result)
@@ -170,10 +187,11 @@ class RankingCore:
         Returns:
             Regional score (0.0-1.0)
         """
+        if not self.regional_scorer:
+            return 0.5
+        
         try:
-            from kse.ranking.kse_regional_relevance import RegionalRelevance
-            scorer = RegionalRelevance()
-            return scorer.calculate_regional_score(result)
+            return self.regional_scorer.calculate_regional_score(result)
         except Exception as e:
             logger.warning(f"Regional scoring failed: {e}")
             return 0.5
@@ -244,22 +262,6 @@ class RankingCore:
         # Default neutral score for now
         return 0.5
     
-    def _calculate_regional_score(self, result: Dict[str, Any]) -> float:
-        """
-        Calculate regional relevance score (placeholder - will be implemented in kse_regional_relevance.py)
-        
-        Args:
-            result: Search result with regional metadata
-        
-        Returns:
-            Regional relevance score (0.0-1.0)
-        """
-        # Default neutral score for now - assume Swedish sites are relevant
-        url = result.get('url', '').lower()
-        if '.se' in url or '.nu' in url:
-            return 0.8
-        return 0.3
-    
     def update_weights(self, new_weights: RankingWeights) -> None:
         """
         Update ranking weights
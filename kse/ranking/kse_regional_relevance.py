@@ -6,6 +6,7 @@ Enhanced for enterprise Swedish search engine (Naver-style for Sweden)
 import logging
 from typing import Dict, Any, List
 import re
+from kse.utils.kse_pattern_matcher import PatternMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +54,15 @@ class RegionalRelevance:
             r'\b\d{3}\s\d{2}\s\d{2}\b',  # Swedish postal code
             r'å|ä|ö',  # Swedish letters
         ]
+        self._compiled_patterns = [re.compile(pattern) for pattern in self.swedish_patterns]
+        
+        # One automaton over every dictionary above, tagged by list
+        self._matcher = PatternMatcher(
+            [(tld, 'tld') for tld in self.swedish_tlds] +
+            [(trusted, 'trusted') for trusted in self.trusted_swedish_domains] +
+            [(loc, 'location') for loc in self.swedish_locations] +
+            [(kw, 'keyword') for kw in self.swedish_keywords]
+        )
         
         logger.info("Enhanced RegionalRelevance initialized for Swedish search")
     
@@ -73,25 +83,28 @@ class RegionalRelevance:
         
         score = 0.0  # Start at 0 for non-Swedish content
         
+        # Single pass over each field
+        content_matches = self._matcher.matched_payloads(content)
+        
         # 1. Swedish TLD bonus (strong indicator)
-        if any(tld in url for tld in self.swedish_tlds):
+        if 'tld' in self._matcher.matched_payloads(url):
             score += 0.30
             logger.debug(f"Swedish TLD bonus: {url}")
         
         # 2. Trusted Swedish domain bonus (very strong indicator)
-        if any(trusted in domain for trusted in self.trusted_swedish_domains):
+        if 'trusted' in self._matcher.matched_payloads(domain):
             score += 0.25
             logger.debug(f"Trusted Swedish domain bonus: {domain}")
         
         # 3. Swedish location mentions (geographic relevance)
-        location_matches = sum(1 for loc in self.swedish_locations if loc in content)
+        location_matches = len(content_matches.get('location', ()))
         if location_matches > 0:
             location_score = min(0.15, location_matches * 0.03)
             score += location_score
             logger.debug(f"Location matches: {location_matches}, score: {location_score}")
         
         # 4. Swedish language indicators (content quality)
-        keyword_matches = sum(1 for kw in self.swedish_keywords if kw in content)
+        keyword_matches = len(content_matches.get('keyword', ()))
         if keyword_matches > 0:
             keyword_score = min(0.15, keyword_matches * 0.03)
             score += keyword_score
@@ -99,8 +112,8 @@ class RegionalRelevance:
         
         # 5. Swedish-specific patterns (strong language indicator)
         pattern_matches = 0
-        for pattern in self.swedish_patterns:
-            if re.search(pattern, content):
+        for pattern in self._compiled_patterns:
+            if pattern.search(content):
                 pattern_matches += 1
         
         if pattern_matches > 0:
@@ -109,7 +122,7 @@ class RegionalRelevance:
             logger.debug(f"Pattern matches: {pattern_matches}, score: {pattern_score}")
         
         # 6. Title in Swedish (indicates Swedish-focused content)
-        if any(kw in title for kw in self.swedish_keywords):
+        if 'keyword' in self._matcher.matched_payloads(title):
             score += 0.05
         
         # Normalize to 0-1 range
@@ -4,8 +4,9 @@ Uses advanced NLP techniques to understand query intent and semantic meaning
 """
 
 import logging
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Set, Hashable
 import re
+from kse.utils.kse_pattern_matcher import PatternMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +71,31 @@ class SemanticSimilarity:
             (r'(finns det|finns)', 'hitta lista'),
         ]
         
+        # Document vocabulary expected for each query intent
+        self.intent_patterns = {
+            'definition': ['definition', 'är', 'betyder', 'innebär', 'förklaring'],
+            'how_to': ['guide', 'hur', 'steg', 'instruktion', 'tutorial', 'gör'],
+            'location': ['adress', 'plats', 'karta', 'var', 'ligger', 'finns'],
+            'time': ['öppettider', 'tid', 'datum', 'när', 'schema'],
+            'shopping': ['köpa', 'pris', 'butik', 'köp', 'beställa', 'webshop'],
+            'news': ['senaste', 'nyhet', 'aktuellt', 'idag', 'rapport'],
+            'recommendation': ['bäst', 'topp', 'recension', 'rekommendation', 'test']
+        }
+        
+        # Answer indicators in content
+        self.answer_indicators = [
+            'svaret', 'är', 'betyder', 'innebär', 'kan', 'ska', 'kommer',
+            'definition', 'förklaring', 'genom att', 'på grund av'
+        ]
+        
+        # Clusters, intent vocabulary and answer indicators share one automaton,
+        # so each field of a document is scanned exactly once
+        self._matcher = PatternMatcher(
+            [(term, ('concept', name)) for name, terms in self.concept_clusters.items() for term in terms] +
+            [(term, ('intent', name)) for name, terms in self.intent_patterns.items() for term in terms] +
+            [(term, 'answer') for term in self.answer_indicators]
+        )
+        
         logger.info("SemanticSimilarity initialized for Swedish natural language search")
     
     def calculate_semantic_score(
@@ -96,13 +122,17 @@ class SemanticSimilarity:
         
         score = 0.0
         
+        # Scan each field once; all scorers below read from these matches
+        content_hits = self._matcher.matched_payloads(content)
+        title_hits = self._matcher.matched_payloads(title)
+        
         # 1. Intent matching
         if query_intent:
-            intent_score = self._match_intent(query_intent, document)
+            intent_score = self._match_intent(query_intent, content_hits, title_hits)
             score += intent_score * 0.30
         
         # 2. Concept cluster matching
-        concept_score = self._match_concepts(query_lower, content, title)
+        concept_score = self._match_concepts(query_lower, content_hits, title_hits)
         score += concept_score * 0.25
         
         # 3. Phrase similarity (for conversational queries)
@@ -110,49 +140,43 @@ class SemanticSimilarity:
         score += phrase_score * 0.25
         
         # 4. Question answer matching
-        question_score = self._question_answer_match(query_lower, content, title)
+        question_score = self._question_answer_match(query_lower, content_hits)
         score += question_score * 0.20
         
         return min(1.0, score)
     
-    def _match_intent(self, intent: str, document: Dict[str, Any]) -> float:
+    def _match_intent(
+        self,
+        intent: str,
+        content_hits: Dict[Hashable, Set[str]],
+        title_hits: Dict[Hashable, Set[str]]
+    ) -> float:
         """Match query intent with document type"""
-        content = document.get('content', '').lower()
-        title = document.get('title', '').lower()
-        
-        intent_patterns = {
-            'definition': ['definition', 'är', 'betyder', 'innebär', 'förklaring'],
-            'how_to': ['guide', 'hur', 'steg', 'instruktion', 'tutorial', 'gör'],
-            'location': ['adress', 'plats', 'karta', 'var', 'ligger', 'finns'],
-            'time': ['öppettider', 'tid', 'datum', 'när', 'schema'],
-            'shopping': ['köpa', 'pris', 'butik', 'köp', 'beställa', 'webshop'],
-            'news': ['senaste', 'nyhet', 'aktuellt', 'idag', 'rapport'],
-            'recommendation': ['bäst', 'topp', 'recension', 'rekommendation', 'test']
-        }
-        
-        if intent in intent_patterns:
-            patterns = intent_patterns[intent]
-            matches = sum(1 for p in patterns if p in content or p in title)
+        if intent in self.intent_patterns:
+            key = ('intent', intent)
+            matches = len(content_hits.get(key, set()) | title_hits.get(key, set()))
             return min(1.0, matches * 0.25)
         
         return 0.0
     
-    def _match_concepts(self, query: str, content: str, title: str) -> float:
+    def _match_concepts(
+        self,
+        query: str,
+        content_hits: Dict[Hashable, Set[str]],
+        title_hits: Dict[Hashable, Set[str]]
+    ) -> float:
         """Match semantic concept clusters"""
         score = 0.0
         
         # Find which concept clusters the query belongs to
-        query_concepts = set()
-        for concept_name, terms in self.concept_clusters.items():
-            if any(term in query for term in terms):
-                query_concepts.add(concept_name)
+        query_concepts = self._query_concepts(query)
         
         # Check if document matches these concepts
         for concept_name in query_concepts:
-            terms = self.concept_clusters[concept_name]
+            key = ('concept', concept_name)
             # Count matches in content and title (title weighted higher)
-            content_matches = sum(1 for term in terms if term in content)
-            title_matches = sum(1 for term in terms if term in title)
+            content_matches = len(content_hits.get(key, ()))
+            title_matches = len(title_hits.get(key, ()))
             
             concept_score = min(1.0, (content_matches * 0.1 + title_matches * 0.3))
             score += concept_score
@@ -163,6 +187,14 @@ class SemanticSimilarity:
         
         return min(1.0, score)
     
+    def _query_concepts(self, query: str) -> Set[str]:
+        """Get names of concept clusters mentioned in query"""
+        return {
+            payload[1]
+            for payload in self._matcher.matched_payloads(query)
+            if isinstance(payload, tuple) and payload[0] == 'concept'
+        }
+    
     def _phrase_similarity(self, query: str, content: str, title: str) -> float:
         """Calculate phrase-level similarity"""
         # Extract meaningful phrases from query (2-3 word phrases)
@@ -188,7 +220,7 @@ class SemanticSimilarity:
         
         return min(1.0, total_matches / max_possible if max_possible > 0 else 0.0)
     
-    def _question_answer_match(self, query: str, content: str, title: str) -> float:
+    def _question_answer_match(self, query: str, content_hits: Dict[Hashable, Set[str]]) -> float:
         """Match questions to potential answers"""
         score = 0.0
         
@@ -199,12 +231,7 @@ class SemanticSimilarity:
             return 0.0
         
         # Look for answer indicators in content
-        answer_indicators = [
-            'svaret', 'är', 'betyder', 'innebär', 'kan', 'ska', 'kommer',
-            'definition', 'förklaring', 'genom att', 'på grund av'
-        ]
-        
-        indicator_matches = sum(1 for ind in answer_indicators if ind in content)
+        indicator_matches = len(content_hits.get('answer', ()))
         
         # Documents with many answer indicators are likely to answer questions
         score = min(1.0, indicator_matches * 0.15)
@@ -230,10 +257,9 @@ class SemanticSimilarity:
                 enhanced_terms.update(transformed.split())
         
         # Add concept cluster terms
-        for concept_name, terms in self.concept_clusters.items():
-            if any(term in query.lower() for term in terms):
-                # Add most relevant terms from cluster
-                enhanced_terms.update(terms[:self.MAX_CLUSTER_TERMS])
+        for concept_name in self._query_concepts(query.lower()):
+            # Add most relevant terms from cluster
+            enhanced_terms.update(self.concept_clusters[concept_name][:self.MAX_CLUSTER_TERMS])
         
         return list(enhanced_terms)
     
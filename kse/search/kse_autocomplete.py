@@ -0,0 +1,255 @@
+"""
+KSE Autocomplete - Prefix suggestions from indexed words and past queries
+
+Suggestions live in one sorted array searched with bisect. Prefixes with many
+completions get their top-k precomputed, so a lookup is either a dict hit or
+a bisect over a short range.
+
+Word suggestions come from the index term dictionary, ranked by document
+frequency. When the index changes the arrays are rebuilt on a background
+thread and swapped in under a lock; lookups keep serving the last snapshot.
+"""
+from bisect import bisect_left
+from heapq import nlargest
+from itertools import groupby
+from typing import Dict, List, Optional, Tuple
+import re
+import threading
+import time
+from kse.indexing.kse_inverted_index import InvertedIndex
+from kse.nlp.kse_nlp_core import NLPCore
+from kse.core.kse_logger import get_logger
+
+logger = get_logger(__name__, "search.log")
+
+
+class Autocomplete:
+    """Prefix index over document words and the query log"""
+    
+    MIN_WORD_LENGTH = 3
+    QUERY_WEIGHT = 5  # One past search counts like five documents containing a word
+    TOP_K = 10
+    PRECOMPUTE_THRESHOLD = 32  # Precompute top-k for prefixes with more completions than this
+    REBUILD_INTERVAL = 60.0  # Seconds between rebuilds for new queries
+    
+    def __init__(self, inverted_index: InvertedIndex, nlp_core: NLPCore):
+        """
+        Initialize autocomplete
+        
+        Args:
+            inverted_index: Inverted index (term dictionary, titles and descriptions are read)
+            nlp_core: NLP core (tokenizer and stopwords)
+        """
+        self.index = inverted_index
+        self.nlp = nlp_core
+        
+        # (sorted keys, parallel scores, precomputed top-k), swapped as one unit on rebuild
+        self._entries: Tuple[List[str], List[int], Dict[str, List[Tuple[str, int]]]] = ([], [], {})
+        
+        self._query_counts: Dict[str, int] = {}
+        self._word_counts: Dict[str, int] = {}
+        self._built_generation = -1
+        self._queries_dirty = False
+        self._last_build = 0.0
+        
+        # Guards the snapshot swap and the single background rebuild
+        self._lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase and collapse whitespace"""
+        return re.sub(r'\s+', ' ', (text or '').lower()).lstrip()
+    
+    def record_query(self, query: str, count: int = 1) -> None:
+        """
+        Record a past query (picked up on the next rebuild)
+        
+        Args:
+            query: Query text
+            count: Number of times it was searched
+        """
+        query = self.normalize(query).strip()
+        if len(query) < self.MIN_WORD_LENGTH:
+            return
+        self._query_counts[query] = self._query_counts.get(query, 0) + count
+        self._queries_dirty = True
+    
+    def _surface_forms(self) -> Dict[str, str]:
+        """Map indexed terms to the most common surface word in titles and descriptions"""
+        lemmas: Dict[str, str] = {}
+        counts: Dict[str, int] = {}
+        forms: Dict[str, str] = {}
+        
+        for metadata in list(self.index.documents.values()):
+            text = f"{metadata.get('title', '')} {metadata.get('description', '')}"
+            for word in set(self.nlp.tokenizer.tokenize(text, lowercase=True, remove_numbers=True)):
+                counts[word] = counts.get(word, 0) + 1
+        
+        for word, _ in sorted(counts.items(), key=lambda item: -item[1]):
+            term = lemmas.get(word)
+            if term is None:
+                term = lemmas[word] = self.nlp.lemmatize_word(word)
+            forms.setdefault(term, word)
+        
+        return forms
+    
+    def _count_words(self) -> Dict[str, int]:
+        """Count documents per indexed term, keyed by its surface form"""
+        dictionary = self.index.get_term_dictionary()
+        forms = self._surface_forms()
+        counts: Dict[str, int] = {}
+        
+        for term, frequency in zip(dictionary.terms, dictionary.frequencies):
+            word = forms.get(term, term)
+            if len(word) < self.MIN_WORD_LENGTH:
+                continue
+            counts[word] = max(counts.get(word, 0), frequency)
+        
+        return counts
+    
+    def build(self) -> None:
+        """Rebuild the sorted suggestion array and precomputed top-k lists"""
+        start_time = time.perf_counter()
+        
+        generation = self.index.generation
+        with self._lock:
+            self._queries_dirty = False
+            query_counts = dict(self._query_counts)
+        
+        word_counts = self._word_counts
+        if self._built_generation != generation:
+            word_counts = self._count_words()
+        
+        scores = dict(word_counts)
+        for query, count in query_counts.items():
+            scores[query] = scores.get(query, 0) + count * self.QUERY_WEIGHT
+        
+        keys = sorted(scores)
+        key_scores = [scores[key] for key in keys]
+        entries = (keys, key_scores, self._precompute_top(keys, key_scores))
+        
+        with self._lock:
+            self._entries = entries
+            self._word_counts = word_counts
+            self._built_generation = generation
+            self._last_build = time.time()
+        
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logger.info(f"Autocomplete built: {len(keys)} entries, {len(entries[2])} precomputed prefixes in {elapsed:.1f}ms")
+    
+    def _precompute_top(self, keys: List[str], scores: List[int]) -> Dict[str, List[Tuple[str, int]]]:
+        """Store top-k for every prefix whose range is too large to scan per lookup"""
+        top: Dict[str, List[Tuple[str, int]]] = {}
+        entries = list(zip(keys, scores))
+        
+        length = 1
+        while True:
+            found_large = False
+            for prefix, group in groupby(entries, key=lambda entry: entry[0][:length]):
+                group = list(group)
+                if len(group) > self.PRECOMPUTE_THRESHOLD and len(prefix) == length:
+                    top[prefix] = nlargest(self.TOP_K, group, key=lambda entry: entry[1])
+                    found_large = True
+            if not found_large:
+                break
+            length += 1
+        
+        return top
+    
+    def _ensure_fresh(self) -> None:
+        """Start a rebuild when the index changed, or new queries arrived and the interval passed"""
+        if self._built_generation == self.index.generation:
+            if not self._queries_dirty or time.time() - self._last_build < self.REBUILD_INTERVAL:
+                return
+        
+        if self._built_generation == -1:
+            self.build()  # Nothing to serve yet
+            return
+        
+        with self._lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            self._rebuild_thread = threading.Thread(target=self._rebuild, name='autocomplete-rebuild', daemon=True)
+            self._rebuild_thread.start()
+    
+    def _rebuild(self) -> None:
+        """Background rebuild; the current snapshot stays in place if it fails"""
+        try:
+            self.build()
+        except Exception as e:
+            logger.error(f"Autocomplete rebuild failed: {e}")
+    
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for a running background rebuild to finish
+        
+        Args:
+            timeout: Maximum seconds to wait, or None to wait until done
+        """
+        thread = self._rebuild_thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def _complete(self, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        """Top entries starting with prefix"""
+        keys, scores, top = self._entries
+        
+        if limit <= self.TOP_K:
+            cached = top.get(prefix)
+            if cached is not None:
+                return cached[:limit]
+        
+        lo = bisect_left(keys, prefix)
+        hi = bisect_left(keys, prefix + '\uffff', lo)
+        return nlargest(limit, zip(keys[lo:hi], scores[lo:hi]), key=lambda entry: entry[1])
+    
+    def suggest(self, prefix: str, max_suggestions: int = 5) -> List[str]:
+        """
+        Get suggestions for a partial query
+        
+        Whole past queries are matched first; the last word is then completed
+        from document words, keeping the words already typed.
+        
+        Args:
+            prefix: Partial query as typed
+            max_suggestions: Maximum suggestions
+        
+        Returns:
+            List of suggestions, most frequent first
+        """
+        prefix = self.normalize(prefix)
+        if not prefix or max_suggestions < 1:
+            return []
+        
+        self._ensure_fresh()
+        
+        suggestions = [key for key, _ in self._complete(prefix, max_suggestions)]
+        
+        head, _, last_word = prefix.rpartition(' ')
+        if len(suggestions) < max_suggestions and head and last_word:
+            for word, _ in self._complete(last_word, max_suggestions):
+                if ' ' in word:
+                    continue
+                suggestion = f"{head} {word}"
+                if suggestion not in suggestions:
+                    suggestions.append(suggestion)
+                if len(suggestions) >= max_suggestions:
+                    break
+        
+        return suggestions[:max_suggestions]
+    
+    def get_statistics(self) -> Dict:
+        """
+        Get autocomplete statistics
+        
+        Returns:
+            Dictionary with statistics
+        """
+        keys, _, top = self._entries
+        return {
+            'entries': len(keys),
+            'precomputed_prefixes': len(top),
+            'recorded_queries': len(self._query_counts),
+            'index_generation': self._built_generation
+        }
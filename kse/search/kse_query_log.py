@@ -0,0 +1,158 @@
+"""
+KSE Query Log - Persisted search requests with frequency aggregation
+
+Every search request is appended to a JSON-lines file (buffered, flushed in
+batches) and counted in memory, so the most frequent requests survive a
+restart and can be replayed to warm the result cache.
+"""
+from heapq import nlargest
+from pathlib import Path
+from typing import Dict, List
+import json
+import threading
+import time
+from kse.core.kse_logger import get_logger
+
+logger = get_logger(__name__, "search.log")
+
+
+class QueryLog:
+    """Append-only log of search requests, aggregated by request"""
+    
+    FLUSH_EVERY = 50  # Buffered entries written at once
+    FLUSH_INTERVAL = 5.0  # Seconds before a partial buffer is written anyway
+    
+    def __init__(self, path: Path, max_requests: int = 50000):
+        """
+        Initialize query log, loading the counts of earlier runs
+        
+        Args:
+            path: JSON-lines file of logged requests
+            max_requests: Distinct requests counted; the rarest are dropped beyond this
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_requests = max_requests
+        
+        self._counts: Dict[str, int] = {}  # Request as sorted JSON -> times searched
+        self._pending: List[str] = []
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self.logged = 0
+        
+        self._load()
+    
+    @staticmethod
+    def _normalize(request: Dict) -> Dict:
+        """Request with its query whitespace-normalized"""
+        return dict(request, query=' '.join(request['query'].split()))
+    
+    @staticmethod
+    def _request_key(request: Dict) -> str:
+        """Stable identity of a normalized request"""
+        return json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    
+    def _load(self) -> None:
+        """Aggregate the log file, compacting it when it holds many repeated lines"""
+        if not self.path.exists():
+            return
+        
+        lines = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        count = entry.pop('count', 1)
+                        entry.pop('timestamp', None)
+                        key = self._request_key(self._normalize(entry))
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        continue  # Torn write or foreign line
+                    self._counts[key] = self._counts.get(key, 0) + count
+                    lines += 1
+        except OSError as e:
+            logger.error(f"Failed to read query log {self.path}: {e}")
+            return
+        
+        self._prune()
+        if lines > 2 * len(self._counts):
+            self._compact()
+        logger.info(f"Loaded query log: {lines} entries, {len(self._counts)} distinct requests")
+    
+    def _compact(self) -> None:
+        """Rewrite the file as one line per distinct request with its count"""
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for key, count in self._counts.items():
+                entry = json.loads(key)
+                entry['count'] = count
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+        tmp_path.replace(self.path)
+        logger.info(f"Compacted query log to {len(self._counts)} requests")
+    
+    def _prune(self) -> None:
+        """Keep the most frequent half of the requests once max_requests is exceeded"""
+        if len(self._counts) > self.max_requests:
+            keep = nlargest(self.max_requests // 2, self._counts.items(), key=lambda item: item[1])
+            self._counts = dict(keep)
+    
+    def record(self, request: Dict) -> None:
+        """
+        Log one search request
+        
+        Args:
+            request: SearchPipeline.search keyword arguments (JSON-serializable)
+        """
+        entry = self._normalize(request)
+        key = self._request_key(entry)
+        entry['timestamp'] = round(time.time(), 3)
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self._pending.append(line)
+            self.logged += 1
+            if len(self._pending) >= self.FLUSH_EVERY or time.time() - self._last_flush >= self.FLUSH_INTERVAL:
+                self._flush()
+            self._prune()
+    
+    def flush(self) -> None:
+        """Write buffered entries to the log file"""
+        with self._lock:
+            self._flush()
+    
+    def _flush(self) -> None:
+        """Append the buffer (caller holds the lock)"""
+        self._last_flush = time.time()
+        if not self._pending:
+            return
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(self._pending) + '\n')
+        except OSError as e:
+            logger.error(f"Failed to write query log {self.path}: {e}")
+        self._pending = []
+    
+    def top_requests(self, limit: int) -> List[Dict]:
+        """
+        Get the most frequent requests
+        
+        Args:
+            limit: Maximum number of requests
+        
+        Returns:
+            Requests (search keyword arguments), most frequent first
+        """
+        with self._lock:
+            top = nlargest(limit, self._counts.items(), key=lambda item: item[1])
+        return [json.loads(key) for key, _ in top]
+    
+    def get_stats(self) -> Dict:
+        """Get query log statistics"""
+        with self._lock:
+            return {
+                'path': str(self.path),
+                'distinct_requests': len(self._counts),
+                'logged': self.logged,
+                'pending': len(self._pending)
+            }
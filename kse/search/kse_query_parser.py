@@ -0,0 +1,254 @@
+"""
+KSE Query Parser - Boolean query language
+
+Supports AND/OR/NOT (also OCH/ELLER/INTE), a leading '-' for NOT, parentheses,
+quoted phrases, '*' wildcards and field prefixes (title:, site:). Adjacent
+terms are joined with AND. Parsing is lenient: unbalanced parentheses and
+quotes never fail.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+import re
+from kse.core.kse_logger import get_logger
+
+logger = get_logger(__name__, "search.log")
+
+
+@dataclass
+class TermNode:
+    """Single term, optionally restricted to a field"""
+    text: str
+    field: Optional[str] = None
+
+
+@dataclass
+class WildcardNode:
+    """Term pattern with '*' wildcards (e.g. sjukvård*)"""
+    pattern: str
+    field: Optional[str] = None
+
+
+@dataclass
+class PhraseNode:
+    """Words that must appear next to each other"""
+    words: List[str]
+    field: Optional[str] = None
+    pattern: Optional[List[str]] = None  # Full word sequence, stopwords included (set by the planner)
+
+
+@dataclass
+class AndNode:
+    """All children must match"""
+    children: List = field(default_factory=list)
+
+
+@dataclass
+class OrNode:
+    """Any child may match"""
+    children: List = field(default_factory=list)
+
+
+@dataclass
+class NotNode:
+    """Child must not match"""
+    child: object = None
+
+
+class _ParseState:
+    """Token list and cursor of one parse() call (the parser itself is shared between threads)"""
+    
+    __slots__ = ('tokens', 'position')
+    
+    def __init__(self, tokens: List[Tuple[str, object]]):
+        self.tokens = tokens
+        self.position = 0
+    
+    def peek(self) -> Optional[str]:
+        """Kind of the current token"""
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][0]
+        return None
+
+
+class QueryParser:
+    """Parse search queries into a boolean query tree"""
+    
+    FIELDS = {'title', 'site'}
+    
+    # Operators must be upper case so ordinary words ("och", "or") stay terms
+    AND_WORDS = {'AND', 'OCH', '&&'}
+    OR_WORDS = {'OR', 'ELLER', '||'}
+    NOT_WORDS = {'NOT', 'INTE'}
+    
+    _STRUCTURE_PATTERN = re.compile(
+        r'"|\(|\)|\*|(?:^|\s)-\S|\b(?:title|site):\S|(?:^|\s)(?:AND|OR|NOT|OCH|ELLER|INTE)(?=\s|$)'
+    )
+    
+    def is_structured(self, query: str) -> bool:
+        """
+        Check if query uses any boolean syntax
+        
+        Args:
+            query: Raw search query
+        
+        Returns:
+            True if the query needs the boolean planner
+        """
+        return bool(query and self._STRUCTURE_PATTERN.search(query))
+    
+    def parse(self, query: str):
+        """
+        Parse query into a tree of TermNode/PhraseNode/AndNode/OrNode/NotNode
+        
+        Args:
+            query: Raw search query
+        
+        Returns:
+            Root node, or None for an empty query
+        """
+        state = _ParseState(self._tokenize(query or ''))
+        
+        root = self._parse_or(state)
+        
+        # Lenient: anything left over (stray ')') is parsed as further AND clauses
+        while state.position < len(state.tokens):
+            state.position += 1
+            rest = self._parse_or(state)
+            if rest is not None:
+                root = rest if root is None else AndNode([root, rest])
+        
+        logger.debug(f"Parsed query '{query}' -> {root}")
+        return root
+    
+    def _tokenize(self, query: str) -> List[Tuple[str, object]]:
+        """Split query into (kind, value) tokens"""
+        tokens = []
+        length = len(query)
+        i = 0
+        
+        while i < length:
+            char = query[i]
+            
+            if char.isspace():
+                i += 1
+                continue
+            
+            if char in '()':
+                tokens.append((char, char))
+                i += 1
+                continue
+            
+            # Leading '-' negates the following operand
+            negated = False
+            if char == '-' and i + 1 < length and not query[i + 1].isspace():
+                tokens.append(('NOT', None))
+                negated = True
+                i += 1
+            
+            # Optional field prefix
+            field_name = None
+            match = re.match(r'(\w+):(?=\S)', query[i:])
+            if match and match.group(1).lower() in self.FIELDS:
+                field_name = match.group(1).lower()
+                i += match.end()
+            
+            if i < length and query[i] == '"':
+                end = query.find('"', i + 1)
+                if end == -1:
+                    end = length
+                words = query[i + 1:end].split()
+                if words:
+                    tokens.append(('PHRASE', (words, field_name)))
+                i = end + 1
+                continue
+            
+            start = i
+            while i < length and not query[i].isspace() and query[i] not in '()"':
+                i += 1
+            word = query[start:i]
+            if not word:
+                continue
+            
+            if field_name is None and not negated:
+                if word in self.AND_WORDS:
+                    tokens.append(('AND', None))
+                    continue
+                if word in self.OR_WORDS:
+                    tokens.append(('OR', None))
+                    continue
+                if word in self.NOT_WORDS:
+                    tokens.append(('NOT', None))
+                    continue
+            
+            tokens.append(('TERM', (word, field_name)))
+        
+        return tokens
+    
+    def _parse_or(self, state: _ParseState):
+        """or_expr := and_expr (OR and_expr)*"""
+        children = []
+        node = self._parse_and(state)
+        if node is not None:
+            children.append(node)
+        
+        while state.peek() == 'OR':
+            state.position += 1
+            node = self._parse_and(state)
+            if node is not None:
+                children.append(node)
+        
+        if not children:
+            return None
+        return children[0] if len(children) == 1 else OrNode(children)
+    
+    def _parse_and(self, state: _ParseState):
+        """and_expr := unary ((AND)? unary)*"""
+        children = []
+        
+        while state.peek() not in (None, 'OR', ')'):
+            if state.peek() == 'AND':
+                state.position += 1
+                continue
+            node = self._parse_unary(state)
+            if node is not None:
+                children.append(node)
+        
+        if not children:
+            return None
+        return children[0] if len(children) == 1 else AndNode(children)
+    
+    def _parse_unary(self, state: _ParseState):
+        """unary := NOT unary | primary"""
+        if state.peek() == 'NOT':
+            state.position += 1
+            child = self._parse_unary(state)
+            return NotNode(child) if child is not None else None
+        return self._parse_primary(state)
+    
+    def _parse_primary(self, state: _ParseState):
+        """primary := '(' or_expr ')' | PHRASE | TERM"""
+        if state.peek() in (None, 'OR', ')'):
+            # Dangling NOT at the end of a clause
+            return None
+        
+        kind, value = state.tokens[state.position]
+        state.position += 1
+        
+        if kind == '(':
+            node = self._parse_or(state)
+            if state.peek() == ')':
+                state.position += 1
+            return node
+        
+        if kind == 'PHRASE':
+            words, field_name = value
+            return PhraseNode(words, field_name)
+        
+        if kind == 'TERM':
+            word, field_name = value
+            if '*' in word and field_name != 'site':
+                return WildcardNode(word, field_name)
+            return TermNode(word, field_name)
+        
+        # Operator in operand position (e.g. "AND AND"): skip it
+        return None
@@ -0,0 +1,480 @@
+"""
+KSE Query Planner - Cost-based execution of boolean query trees
+
+Works on sorted integer doc-number postings from the inverted index.
+Intersections run smallest postings first with galloping search, and NOT
+clauses and site: filters are applied inside the intersection instead of
+after ranking. When documents are numbered by site, a site: filter is a
+doc-number range and narrows the other clauses with two bisects. Wildcards expand to a bounded OR of dictionary terms. When
+the index has a shingle field, phrases are looked up as word bigrams, which
+keeps their stopwords and replaces per-word position checks with one or two
+rare postings lists. Otherwise phrase candidates are verified against the
+documents' text, since index positions skip stopwords and repeated words.
+"""
+from bisect import bisect_left
+from heapq import merge
+from typing import Callable, Dict, List, Optional, Tuple
+from kse.indexing.kse_inverted_index import InvertedIndex
+from kse.search.kse_query_parser import TermNode, WildcardNode, PhraseNode, AndNode, OrNode, NotNode
+from kse.core.kse_logger import get_logger
+
+logger = get_logger(__name__, "search.log")
+
+
+def _gallop(postings: List[int], target: int, lo: int) -> int:
+    """
+    Find first index >= lo whose value is >= target
+    
+    Probes lo+1, lo+2, lo+4, ... before a binary search, so walking a long
+    list in order costs O(log gap) per lookup instead of O(gap).
+    """
+    size = len(postings)
+    bound = 1
+    while lo + bound < size and postings[lo + bound] < target:
+        bound *= 2
+    return bisect_left(postings, target, lo, min(lo + bound + 1, size))
+
+
+def intersect_postings(shorter: List[int], longer: List[int]) -> List[int]:
+    """
+    Intersect two sorted postings lists
+    
+    Args:
+        shorter: Sorted doc numbers (iterated)
+        longer: Sorted doc numbers (galloped through)
+    
+    Returns:
+        Sorted doc numbers present in both
+    """
+    if len(shorter) > len(longer):
+        shorter, longer = longer, shorter
+    
+    result = []
+    position = 0
+    size = len(longer)
+    for doc in shorter:
+        position = _gallop(longer, doc, position)
+        if position >= size:
+            break
+        if longer[position] == doc:
+            result.append(doc)
+            position += 1
+    return result
+
+
+def subtract_postings(postings: List[int], excluded: List[int]) -> List[int]:
+    """
+    Remove excluded doc numbers from sorted postings
+    
+    Args:
+        postings: Sorted doc numbers to keep from
+        excluded: Sorted doc numbers to drop
+    
+    Returns:
+        Sorted doc numbers in postings but not in excluded
+    """
+    if not excluded:
+        return list(postings)
+    
+    result = []
+    position = 0
+    size = len(excluded)
+    for doc in postings:
+        position = _gallop(excluded, doc, position)
+        if position >= size or excluded[position] != doc:
+            result.append(doc)
+    return result
+
+
+def union_postings(lists: List[List[int]]) -> List[int]:
+    """
+    Union of sorted postings lists
+    
+    Args:
+        lists: Sorted doc-number lists
+    
+    Returns:
+        Sorted, de-duplicated doc numbers
+    """
+    result = []
+    for doc in merge(*lists):
+        if not result or result[-1] != doc:
+            result.append(doc)
+    return result
+
+
+class QueryPlanner:
+    """Plan and execute boolean query trees against the inverted index"""
+    
+    MAX_WILDCARD_POSTINGS = 20000  # Postings one wildcard may union
+    SHINGLE_FIELD = 'shingle'
+    
+    def __init__(
+        self,
+        inverted_index: InvertedIndex,
+        analyzer: Callable[[str], List[str]],
+        shingle_analyzer: Optional[Callable[[str], List[str]]] = None,
+        phrase_analyzer: Optional[Callable[[str], List[str]]] = None,
+        text_source: Optional[Callable[[str, Optional[str]], List[str]]] = None
+    ):
+        """
+        Initialize query planner
+        
+        Args:
+            inverted_index: Inverted index instance
+            analyzer: Text -> index terms (same pipeline as indexing, e.g. NLPCore.process_query)
+            shingle_analyzer: Text -> word bigrams (e.g. NLPCore.shingles), None if the
+                index has no shingle field
+            phrase_analyzer: Text -> word sequence with stopwords (e.g. NLPCore.phrase_tokens)
+            text_source: (doc_id, field) -> texts of the document phrases are checked in
+                (e.g. IndexerPipeline.get_field_texts); without it and phrase_analyzer,
+                phrases are checked against index positions
+        """
+        self.index = inverted_index
+        self.analyzer = analyzer
+        self.shingle_analyzer = shingle_analyzer
+        self.phrase_analyzer = phrase_analyzer
+        self.text_source = text_source
+    
+    def normalize(self, node):
+        """
+        Run tree leaves through the analyzer
+        
+        Stopword-only leaves are dropped, multi-token leaves become phrases,
+        wildcards expand to an OR of dictionary terms, and site: values are
+        lowercased without 'www.'.
+        
+        Args:
+            node: Parsed query tree
+        
+        Returns:
+            Normalized tree, or None if nothing searchable is left
+        """
+        if node is None:
+            return None
+        
+        if isinstance(node, TermNode):
+            if node.field == 'site':
+                domain = node.text.lower().strip('.')
+                if domain.startswith('www.'):
+                    domain = domain[4:]
+                return TermNode(domain, 'site') if domain else None
+            
+            terms = self.analyzer(node.text)
+            if not terms:
+                return None
+            if len(terms) == 1:
+                return TermNode(terms[0], node.field)
+            return PhraseNode(terms, node.field, self._phrase_pattern(node.text))
+        
+        if isinstance(node, WildcardNode):
+            return self._expand_wildcard(node)
+        
+        if isinstance(node, PhraseNode):
+            if node.field is None and self.shingle_analyzer:
+                shingled = self._shingle_phrase(node.words)
+                if shingled is not None:
+                    return shingled
+            
+            text = ' '.join(node.words)
+            terms = self.analyzer(text)
+            if not terms:
+                return None
+            if len(terms) == 1:
+                return TermNode(terms[0], node.field)
+            return PhraseNode(terms, node.field, self._phrase_pattern(text))
+        
+        if isinstance(node, NotNode):
+            child = self.normalize(node.child)
+            return NotNode(child) if child is not None else None
+        
+        children = [child for child in (self.normalize(c) for c in node.children) if child is not None]
+        if not children:
+            return None
+        if len(children) == 1:
+            return children[0]
+        return type(node)(children)
+    
+    def _phrase_pattern(self, text: str) -> Optional[List[str]]:
+        """Word sequence a phrase is verified against (None: use index positions)"""
+        if self.phrase_analyzer is None or self.text_source is None:
+            return None
+        return self.phrase_analyzer(text) or None
+    
+    def _shingle_phrase(self, words: List[str]):
+        """Phrase as bigram lookups: one term for two words, a bigram phrase for more"""
+        bigrams = self.shingle_analyzer(' '.join(words))
+        if not bigrams:
+            return None
+        if len(bigrams) == 1:
+            return TermNode(bigrams[0], self.SHINGLE_FIELD)
+        return PhraseNode(bigrams, self.SHINGLE_FIELD)
+    
+    @staticmethod
+    def _shingle_words(bigrams: List[str]) -> List[str]:
+        """Words of consecutive bigrams ('a b', 'b c' -> a, b, c)"""
+        words = bigrams[0].split(' ')
+        for bigram in bigrams[1:]:
+            words.append(bigram.split(' ')[-1])
+        return words
+    
+    def _expand_wildcard(self, node: WildcardNode):
+        """Expand pattern to the most frequent matching terms within the postings budget"""
+        dictionary = self.index.get_term_dictionary(node.field)
+        pattern = node.pattern.lower()
+        
+        terms = []
+        budget = self.MAX_WILDCARD_POSTINGS
+        for term in dictionary.expand_wildcard(pattern):
+            frequency = self.index.get_field_frequency(term, node.field)
+            if terms and frequency > budget:
+                break
+            terms.append(term)
+            budget -= frequency
+        
+        logger.info(f"Wildcard {pattern} expanded to {len(terms)} terms")
+        
+        if not terms:
+            # Keep the clause so AND still requires it (matches nothing)
+            return TermNode(pattern, node.field)
+        if len(terms) == 1:
+            return TermNode(terms[0], node.field)
+        return OrNode([TermNode(term, node.field) for term in terms])
+    
+    def estimate(self, node) -> int:
+        """
+        Estimate number of matching documents (upper bound)
+        
+        Args:
+            node: Normalized query tree
+        
+        Returns:
+            Estimated result size
+        """
+        total = len(self.index.doc_ids)
+        
+        if isinstance(node, TermNode):
+            site_range = self._site_range(node)
+            if site_range is not None:
+                return site_range[1] - site_range[0]
+            return self.index.get_field_frequency(node.text, node.field)
+        if isinstance(node, PhraseNode):
+            return min(self.index.get_field_frequency(word, node.field) for word in node.words)
+        if isinstance(node, NotNode):
+            return max(total - self.estimate(node.child), 0)
+        if isinstance(node, OrNode):
+            return min(sum(self.estimate(child) for child in node.children), total)
+        if isinstance(node, AndNode):
+            positives = [child for child in node.children if not isinstance(child, NotNode)]
+            if not positives:
+                return self.estimate(NotNode(OrNode([c.child for c in node.children])))
+            return min(self.estimate(child) for child in positives)
+        return total
+    
+    def execute(self, node) -> List[int]:
+        """
+        Execute normalized query tree
+        
+        Args:
+            node: Normalized query tree
+        
+        Returns:
+            Sorted matching doc numbers
+        """
+        if node is None:
+            return []
+        
+        if isinstance(node, TermNode):
+            site_range = self._site_range(node)
+            if site_range is not None:
+                return list(range(*site_range))
+            return self.index.get_postings(node.text, node.field)
+        
+        if isinstance(node, PhraseNode):
+            return self._execute_phrase(node)
+        
+        if isinstance(node, OrNode):
+            return union_postings([self.execute(child) for child in node.children])
+        
+        if isinstance(node, NotNode):
+            # Bare negation: everything except the child
+            return subtract_postings(range(len(self.index.doc_ids)), self.execute(node.child))
+        
+        return self._execute_and(node)
+    
+    def _execute_and(self, node: AndNode) -> List[int]:
+        """Intersect positive clauses cheapest first, then subtract NOT clauses"""
+        positives = [child for child in node.children if not isinstance(child, NotNode)]
+        negatives = [child.child for child in node.children if isinstance(child, NotNode)]
+        
+        if not positives:
+            return self.execute(NotNode(OrNode(negatives)))
+        
+        # Site ranges narrow the result by slicing instead of intersecting
+        ranges = []
+        for child in list(positives):
+            site_range = self._site_range(child)
+            if site_range is not None and len(positives) > 1:
+                ranges.append(site_range)
+                positives.remove(child)
+        
+        positives.sort(key=self.estimate)
+        
+        result = self.execute(positives[0])
+        for start, end in ranges:
+            result = result[bisect_left(result, start):bisect_left(result, end)]
+        for child in positives[1:]:
+            if not result:
+                return []
+            result = intersect_postings(result, self.execute(child))
+        
+        for child in negatives:
+            if not result:
+                break
+            result = subtract_postings(result, self.execute(child))
+        
+        return result
+    
+    def _site_range(self, node) -> Optional[Tuple[int, int]]:
+        """Doc-number range of a site: leaf, if the index is numbered by site"""
+        if isinstance(node, TermNode) and node.field == 'site':
+            return self.index.get_site_range(node.text)
+        return None
+    
+    def _execute_phrase(self, node: PhraseNode) -> List[int]:
+        """Intersect phrase words, then check they are consecutive in the document"""
+        words = node.words
+        order = sorted(range(len(words)), key=lambda i: self.index.get_field_frequency(words[i], node.field))
+        
+        candidates = self.index.get_postings(words[order[0]], node.field)
+        for i in order[1:]:
+            if not candidates:
+                return []
+            candidates = intersect_postings(candidates, self.index.get_postings(words[i], node.field))
+        
+        doc_ids = self.index.doc_ids
+        if node.pattern:
+            return [doc for doc in candidates if self._contains_phrase(doc_ids[doc], node)]
+        
+        result = []
+        for doc in candidates:
+            doc_id = doc_ids[doc]
+            starts = set(self.index.get_positions(words[0], doc_id, node.field))
+            for offset, word in enumerate(words[1:], start=1):
+                positions = self.index.get_positions(word, doc_id, node.field)
+                starts &= {position - offset for position in positions}
+                if not starts:
+                    break
+            if starts:
+                result.append(doc)
+        return result
+    
+    def _contains_phrase(self, doc_id: str, node: PhraseNode) -> bool:
+        """Check the phrase's word sequence occurs in one of the document's texts"""
+        pattern = node.pattern
+        first = pattern[0]
+        size = len(pattern)
+        for text in self.text_source(doc_id, node.field):
+            words = self.phrase_analyzer(text)
+            for start in range(len(words) - size + 1):
+                if words[start] == first and words[start:start + size] == pattern:
+                    return True
+        return False
+    
+    def search(self, node) -> List[str]:
+        """
+        Execute normalized query tree
+        
+        Args:
+            node: Normalized query tree
+        
+        Returns:
+            Matching document IDs
+        """
+        doc_ids = self.index.doc_ids
+        return [doc_ids[doc] for doc in self.execute(node)]
+    
+    def ranking_terms(self, node, negated: bool = False) -> List[str]:
+        """
+        Collect positive content terms of a normalized tree for scoring
+        
+        Args:
+            node: Normalized query tree
+            negated: Whether node is under a NOT
+        
+        Returns:
+            List of terms (site: filters and NOT clauses excluded)
+        """
+        if node is None or negated:
+            return []
+        if isinstance(node, (TermNode, PhraseNode)) and node.field == self.SHINGLE_FIELD:
+            bigrams = [node.text] if isinstance(node, TermNode) else node.words
+            return self.analyzer(' '.join(self._shingle_words(bigrams)))
+        if isinstance(node, TermNode):
+            return [node.text] if node.field != 'site' else []
+        if isinstance(node, PhraseNode):
+            return list(node.words) if node.field != 'site' else []
+        if isinstance(node, NotNode):
+            return []
+        
+        terms = []
+        for child in node.children:
+            for term in self.ranking_terms(child):
+                if term not in terms:
+                    terms.append(term)
+        return terms
+    
+    def explain(self, node) -> Dict:
+        """
+        Describe the execution plan with estimated sizes
+        
+        Args:
+            node: Normalized query tree
+        
+        Returns:
+            Nested dictionary (children in execution order)
+        """
+        if isinstance(node, TermNode):
+            label = f"{node.field}:{node.text}" if node.field else node.text
+            return {'op': 'term', 'term': label, 'estimate': self.estimate(node)}
+        if isinstance(node, PhraseNode):
+            return {'op': 'phrase', 'words': node.words, 'field': node.field, 'estimate': self.estimate(node)}
+        if isinstance(node, NotNode):
+            return {'op': 'not', 'child': self.explain(node.child), 'estimate': self.estimate(node)}
+        
+        children = list(node.children)
+        if isinstance(node, AndNode):
+            # Positives cheapest first, NOT clauses last
+            children.sort(key=lambda child: (isinstance(child, NotNode), self.estimate(child)))
+        
+        return {
+            'op': 'and' if isinstance(node, AndNode) else 'or',
+            'children': [self.explain(child) for child in children],
+            'estimate': self.estimate(node)
+        }
+    
+    def describe(self, node) -> Optional[str]:
+        """
+        Render normalized tree back to query syntax (for logs and responses)
+        
+        Args:
+            node: Normalized query tree
+        
+        Returns:
+            Query string, or None for an empty tree
+        """
+        if node is None:
+            return None
+        if isinstance(node, (TermNode, PhraseNode)) and node.field == self.SHINGLE_FIELD:
+            bigrams = [node.text] if isinstance(node, TermNode) else node.words
+            return '"' + ' '.join(self._shingle_words(bigrams)) + '"'
+        if isinstance(node, TermNode):
+            return f"{node.field}:{node.text}" if node.field else node.text
+        if isinstance(node, PhraseNode):
+            phrase = '"' + ' '.join(node.pattern or node.words) + '"'
+            return f"{node.field}:{phrase}" if node.field else phrase
+        if isinstance(node, NotNode):
+            return f"-{self.describe(node.child)}"
+        
+        joiner = ' ' if isinstance(node, AndNode) else ' OR '
+        return '(' + joiner.join(self.describe(child) for child in node.children) + ')'
@@ -1,7 +1,11 @@
 """
 KSE Result Processor - Process and format search results
 """
-from typing import List, Dict
+import re
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from typing import List, Dict, Optional, Tuple
+from kse.storage.kse_document_store import DocumentStore
 from kse.core.kse_logger import get_logger
 
 logger = get_logger(__name__, "search.log")
@@ -10,15 +14,24 @@ logger = get_logger(__name__, "search.log")
 class ResultProcessor:
     """Process and format search results"""
     
-    def __init__(self):
-        """Initialize result processor"""
-        pass
+    SNIPPET_LENGTH = 150  # Characters per snippet
+    
+    def __init__(self, document_store: Optional[DocumentStore] = None):
+        """
+        Initialize result processor
+        
+        Args:
+            document_store: Page content store for snippets (descriptions are used if None)
+        """
+        self.document_store = document_store
     
     def format_results(
         self,
         results: List[Dict],
         query: str,
-        max_results: int = 10
+        max_results: int = 10,
+        query_terms: Optional[List[str]] = None,
+        fetch_content: bool = True
     ) -> List[Dict]:
         """
         Format search results
@@ -27,6 +40,8 @@ class ResultProcessor:
             results: Raw search results
             query: Original query
             max_results: Maximum number of results
+            query_terms: Analyzed query terms, matched against stored term offsets
+            fetch_content: Read page content from the document store (False uses descriptions)
         
         Returns:
             Formatted results
@@ -37,6 +52,15 @@ class ResultProcessor:
         # Format each result
         formatted = []
         for i, result in enumerate(results):
+            text, annotations = self._snippet_source(result, fetch_content)
+            selected = None
+            if annotations and query_terms:
+                selected = self._select_snippet(text, annotations, query_terms)
+            if selected:
+                snippet, highlights = selected
+            else:
+                snippet = self._generate_snippet(text, query, self.SNIPPET_LENGTH)
+                highlights = self._highlight(snippet, query)
             formatted_result = {
                 'rank': i + 1,
                 'url': result.get('url', ''),
@@ -44,10 +68,8 @@ class ResultProcessor:
                 'description': result.get('description', ''),
                 'domain': result.get('domain', ''),
                 'score': result.get('score', 0),
-                'snippet': self._generate_snippet(
-                    result.get('description', ''),
-                    query
-                )
+                'snippet': snippet,
+                'highlights': highlights
             }
             formatted.append(formatted_result)
         
@@ -55,6 +77,111 @@ class ResultProcessor:
         
         return formatted
     
+    def _snippet_source(self, result: Dict, fetch_content: bool = True) -> Tuple[str, Optional[Dict]]:
+        """Stored page content and annotations of a result, or its description"""
+        if fetch_content and self.document_store is not None and result.get('url'):
+            document = self.document_store.get_document(result['url'])
+            if document and document[0]:
+                return document
+        return result.get('description', ''), None
+    
+    def _select_snippet(
+        self,
+        text: str,
+        annotations: Dict,
+        query_terms: List[str]
+    ) -> Optional[Tuple[str, List[List[int]]]]:
+        """
+        Pick the snippet window with the densest query-term matches
+        
+        Works on the stored term spans only, so the cost grows with the number
+        of matches, not the document length.
+        
+        Args:
+            text: Page text
+            annotations: {'terms': term -> flat [start, end, ...], 'sentences': starts}
+            query_terms: Analyzed query terms
+        
+        Returns:
+            (snippet, highlight ranges within it), or None if no term occurs
+        """
+        offsets = annotations.get('terms', {})
+        spans = []
+        for index, term in enumerate(dict.fromkeys(query_terms)):
+            flat = offsets.get(term)
+            if flat:
+                spans.append([(flat[i], flat[i + 1], index) for i in range(0, len(flat), 2)])
+        if not spans:
+            return None
+        matches = list(merge(*spans))
+        
+        # Sliding window over matches: most distinct terms, then most matches
+        max_length = self.SNIPPET_LENGTH
+        counts: Dict[int, int] = {}
+        best, best_first, best_last = (0, 0), 0, 0
+        end = 0
+        for first, (start, _, _) in enumerate(matches):
+            while end < len(matches) and (end <= first or matches[end][1] - start <= max_length):
+                term = matches[end][2]
+                counts[term] = counts.get(term, 0) + 1
+                end += 1
+            score = (len(counts), end - first)
+            if score > best:
+                best, best_first, best_last = score, first, end - 1
+            term = matches[first][2]
+            counts[term] -= 1
+            if not counts[term]:
+                del counts[term]
+        
+        # Start at the sentence start when it fits, otherwise at a word before the first match
+        window_start = matches[best_first][0]
+        window_end = matches[best_last][1]
+        slack = max(max_length - (window_end - window_start), 0)
+        sentences = annotations.get('sentences') or [0]
+        sentence_start = sentences[bisect_right(sentences, window_start) - 1]
+        if window_start - sentence_start <= slack:
+            start = sentence_start
+        else:
+            start = window_start - slack // 3
+            space = text.find(' ', start, window_start)
+            start = space + 1 if space >= 0 else window_start
+        
+        end = min(len(text), max(start + max_length, window_end))
+        if end < len(text):
+            space = text.rfind(' ', window_end, end)
+            end = space if space >= 0 else end
+        
+        prefix = "..." if start > 0 else ""
+        snippet = prefix + text[start:end] + ("..." if end < len(text) else "")
+        
+        # Matched spans inside the window, shifted to snippet positions (compound parts share a span)
+        shift = len(prefix) - start
+        highlights: Dict[Tuple[int, int], bool] = {}
+        for span_start, span_end, _ in matches[bisect_left(matches, (start,)):]:
+            if span_start >= end:
+                break
+            if span_end <= end:
+                highlights[(span_start + shift, span_end + shift)] = True
+        return snippet, [list(span) for span in highlights]
+    
+    @staticmethod
+    def _highlight(snippet: str, query: str) -> List[List[int]]:
+        """
+        Find query words in a snippet
+        
+        Args:
+            snippet: Snippet text
+            query: Search query
+        
+        Returns:
+            [start, end] character ranges of words starting with a query word
+        """
+        words = [re.escape(word) for word in re.findall(r'\w+', query.lower()) if len(word) > 1]
+        if not snippet or not words:
+            return []
+        pattern = re.compile(r'\b(?:' + '|'.join(words) + r')\w*', re.IGNORECASE)
+        return [[match.start(), match.end()] for match in pattern.finditer(snippet)]
+    
     def _generate_snippet(self, text: str, query: str, max_length: int = 150) -> str:
         """
         Generate search result snippet with query highlight context
@@ -101,21 +228,21 @@ class ResultProcessor:
     
     def deduplicate_results(self, results: List[Dict]) -> List[Dict]:
         """
-        Remove duplicate results (same URL or very similar title)
+        Remove duplicate results (same URL or same near-duplicate cluster)
         
         Args:
             results: Search results
         
         Returns:
-            Deduplicated results
+            Deduplicated results (first, i.e. best-ranked, result of each cluster kept)
         """
-        seen_urls = set()
+        seen_clusters = set()
         deduplicated = []
         
         for result in results:
-            url = result.get('url', '')
-            if url not in seen_urls:
-                seen_urls.add(url)
+            cluster_id = result.get('cluster_id') or result.get('url', '')
+            if cluster_id not in seen_clusters:
+                seen_clusters.add(cluster_id)
                 deduplicated.append(result)
         
         return deduplicated
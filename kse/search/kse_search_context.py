@@ -0,0 +1,99 @@
+"""
+KSE Search Context - Per-request state shared across search stages
+"""
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class SearchContext:
+    """State for one search request, passed down through the search stages
+    
+    Stages record their elapsed time under a name so the response can show
+    where a query spent its time. With a deadline, stages check the remaining
+    budget and fall back to cheaper work, marking the request as degraded.
+    """
+    stage_timings: Dict[str, float] = field(default_factory=dict)  # Stage name -> milliseconds
+    expansion_applied: bool = False  # Expansion postings were merged into retrieval
+    expansion_terms: List[str] = field(default_factory=list)  # Expansion terms actually used
+    corrections: Dict[str, str] = field(default_factory=dict)  # Misspelled term -> correction
+    did_you_mean: Optional[str] = None  # Suggested corrected query
+    auto_corrected: bool = False  # Corrections were applied to the search
+    retrieval_tier: int = 0  # 1 = champion lists filled top-k, 2 = full postings
+    estimated_hits: Optional[int] = None  # Matching documents, estimated when tier 1 answered
+    deadline: Optional[float] = None  # time.perf_counter() value when the search budget runs out
+    degraded_stages: List[str] = field(default_factory=list)  # Stages that cut work to meet the deadline
+    
+    @classmethod
+    def with_timeout(cls, timeout: Optional[float]) -> 'SearchContext':
+        """
+        Create a context whose deadline is timeout seconds from now
+        
+        Args:
+            timeout: Search budget in seconds (None or 0 = no deadline)
+        
+        Returns:
+            New SearchContext
+        """
+        return cls(deadline=time.perf_counter() + timeout if timeout else None)
+    
+    def time_remaining(self) -> Optional[float]:
+        """
+        Get seconds left before the deadline
+        
+        Returns:
+            Remaining seconds (may be negative), or None without a deadline
+        """
+        if self.deadline is None:
+            return None
+        return self.deadline - time.perf_counter()
+    
+    def expired(self) -> bool:
+        """Check if the deadline has passed"""
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+    
+    def degrade(self, stage: str) -> None:
+        """
+        Record that a stage returned partial or cheaper results
+        
+        Args:
+            stage: Stage name
+        """
+        if stage not in self.degraded_stages:
+            self.degraded_stages.append(stage)
+    
+    @property
+    def degraded(self) -> bool:
+        """True if any stage cut work to meet the deadline"""
+        return bool(self.degraded_stages)
+    
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time a search stage
+        
+        Args:
+            name: Stage name (repeated stages accumulate)
+        
+        Example:
+            with context.stage('retrieval'):
+                # code to time
+                pass
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            self.stage_timings[name] = self.stage_timings.get(name, 0.0) + elapsed_ms
+    
+    def get_stage_timings(self) -> Dict[str, float]:
+        """
+        Get stage timings rounded for reporting
+        
+        Returns:
+            Dictionary of {stage: milliseconds}
+        """
+        return {name: round(ms, 3) for name, ms in self.stage_timings.items()}
@@ -1,8 +1,9 @@
 """
 KSE Search Executor - Execute search operations
 """
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 from kse.indexing.kse_indexer_pipeline import IndexerPipeline
+from kse.search.kse_autocomplete import Autocomplete
 from kse.core.kse_logger import get_logger
 
 logger = get_logger(__name__, "search.log")
@@ -19,11 +20,17 @@ class SearchExecutor:
             indexer: Indexer pipeline instance
         """
         self.indexer = indexer
+        self.autocomplete = Autocomplete(indexer.inverted_index, indexer.nlp)
     
     def execute_search(
         self,
         query_terms: List[str],
-        max_results: int = 10
+        max_results: int = 10,
+        expansion_terms: Optional[Dict[str, float]] = None,
+        context=None,
+        doc_ids: Optional[List[str]] = None,
+        auto_correct: bool = True,
+        doc_filter: Optional[Callable[[str], bool]] = None
     ) -> List[Dict]:
         """
         Execute search
@@ -31,17 +38,30 @@ class SearchExecutor:
         Args:
             query_terms: Preprocessed query terms
             max_results: Maximum number of results
+            expansion_terms: Optional {term: weight} merged only if originals underfill
+            context: Optional SearchContext for stage timings and the search deadline
+            doc_ids: Optional candidate documents (from the boolean query planner)
+            auto_correct: Apply spelling corrections when no term is in the index
+            doc_filter: Optional doc-id predicate from facet filters
         
         Returns:
             List of search results
         """
-        if not query_terms:
+        if not query_terms and doc_ids is None:
             return []
         
         logger.info(f"Executing search for terms: {query_terms}")
         
         # Pass pre-processed terms directly to indexer to avoid double processing
-        results = self.indexer.search(query_terms, max_results)
+        results = self.indexer.search(
+            query_terms,
+            max_results,
+            expansion_terms=expansion_terms,
+            context=context,
+            doc_ids=doc_ids,
+            auto_correct=auto_correct,
+            doc_filter=doc_filter
+        )
         
         logger.info(f"Search returned {len(results)} results")
         
@@ -78,6 +98,4 @@ class SearchExecutor:
         Returns:
             List of suggestions
         """
-        # Basic implementation: return empty for now
-        # Full implementation would use term frequency and common queries
-        return []
+        return self.autocomplete.suggest(partial_query, max_suggestions)
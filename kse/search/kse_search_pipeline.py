@@ -5,14 +5,25 @@ from typing import List, Dict, Optional
 from kse.search.kse_query_preprocessor import QueryPreprocessor
 from kse.search.kse_result_processor import ResultProcessor
 from kse.search.kse_search_executor import SearchExecutor
+from kse.search.kse_search_context import SearchContext
+from kse.search.kse_query_parser import QueryParser, PhraseNode
+from kse.search.kse_query_planner import QueryPlanner
+from kse.search.kse_query_log import QueryLog
 from kse.indexing.kse_indexer_pipeline import IndexerPipeline
 from kse.nlp.kse_nlp_core import NLPCore
 from kse.nlp.kse_query_processor import QueryProcessor
 from kse.ranking.kse_ranking_core import RankingCore
 from kse.ranking.kse_diversity_ranker import DiversityRanker
 from kse.cache.kse_cache_manager import CacheManager
+from kse.cache.kse_single_flight import SingleFlight
 from kse.core.kse_logger import get_logger
+from collections import OrderedDict
+from pathlib import Path
+import copy
+import hashlib
+import threading
 import time
+import zlib
 
 logger = get_logger(__name__, "search.log")
 
@@ -20,12 +31,23 @@ logger = get_logger(__name__, "search.log")
 class SearchPipeline:
     """Main search orchestrator with ranking and caching"""
     
+    HOT_REQUESTS_TRACKED = 1000  # Distinct cached requests whose hit counts are kept
+    WARMUP_DUTY_CYCLE = 0.2  # Share of one thread's time the cache warm-up may use
+    
     def __init__(
         self,
         indexer: IndexerPipeline,
         nlp_core: Optional[NLPCore] = None,
         enable_cache: bool = True,
-        enable_ranking: bool = True
+        enable_ranking: bool = True,
+        auto_correct: bool = True,
+        search_timeout: Optional[float] = None,
+        cache_options: Optional[Dict] = None,
+        refresh_hot_queries: int = 0,
+        coalesce_requests: bool = True,
+        coalesce_wait_timeout: Optional[float] = 5.0,
+        query_log_path: Optional[Path] = None,
+        warmup_queries: int = 0
     ):
         """
         Initialize search pipeline
@@ -35,17 +57,40 @@ class SearchPipeline:
             nlp_core: NLP core instance (uses indexer's NLP if None)
             enable_cache: Enable search result caching
             enable_ranking: Enable advanced ranking
+            auto_correct: Search the spelling-corrected query when nothing matches
+            search_timeout: Search budget in seconds; stages past it return partial
+                results flagged degraded (None = no deadline)
+            cache_options: CacheManager settings (max_size_mb, default_ttl, admission, shards,
+                disk_cache_dir, disk_max_size_mb, postings_cache_mb, postings_min_document_frequency,
+                memory_budget)
+            refresh_hot_queries: Most requested cached searches recomputed in the background
+                after the index changes (0 = stale entries are only replaced on demand)
+            coalesce_requests: Let concurrent identical searches share one execution
+            coalesce_wait_timeout: Seconds a coalesced request waits before searching itself
+            query_log_path: File persisting every search request (None = not persisted)
+            warmup_queries: Most frequent logged requests replayed by start_warmup
         """
         self.indexer = indexer
         self.nlp = nlp_core or indexer.nlp
         self.enable_cache = enable_cache
         self.enable_ranking = enable_ranking
+        self.auto_correct = auto_correct
+        self.search_timeout = search_timeout
+        self.refresh_hot_queries = refresh_hot_queries
         
         # Initialize components
         self.query_preprocessor = QueryPreprocessor(self.nlp)
         self.query_processor = QueryProcessor()  # Enhanced query processor
-        self.result_processor = ResultProcessor()
+        self.result_processor = ResultProcessor(indexer.document_store)
         self.search_executor = SearchExecutor(indexer)
+        self.query_parser = QueryParser()
+        self.query_planner = QueryPlanner(
+            indexer.inverted_index,
+            self.nlp.process_query,
+            shingle_analyzer=self.nlp.shingles if indexer.enable_shingles else None,
+            phrase_analyzer=self.nlp.phrase_tokens,
+            text_source=indexer.get_field_texts
+        )
         
         # Initialize ranking system
         if self.enable_ranking:
@@ -55,11 +100,32 @@ class SearchPipeline:
         
         # Initialize cache
         if self.enable_cache:
-            self.cache_manager = CacheManager(max_size_mb=100, default_ttl=3600)
+            cache_settings = {'max_size_mb': 100, 'default_ttl': 3600}
+            cache_settings.update(cache_options or {})
+            self.cache_manager = CacheManager(**cache_settings)
+            indexer.inverted_index.set_postings_cache(self.cache_manager.postings_cache)
             logger.info("Search cache enabled")
         
         # Search history
         self.search_history: List[Dict] = []
+        self.degraded_queries = 0
+        
+        # Cached results are tagged with the index version they were computed against
+        self._cache_generation = indexer.index_version
+        self._hot_requests: OrderedDict = OrderedDict()  # cache key -> {'request', 'hits'}
+        self._refresh_lock = threading.Lock()
+        self._refresh_state = threading.local()  # active = True in the refresh and warm-up threads
+        self._refresh_thread: Optional[threading.Thread] = None
+        self.hot_refreshes = 0
+        
+        # Concurrent identical requests wait for the first one instead of searching again
+        self.single_flight = SingleFlight(coalesce_wait_timeout) if coalesce_requests else None
+        
+        # Requests of this and earlier runs, replayed into the cache after a restart
+        self.query_log = QueryLog(query_log_path) if query_log_path else None
+        self.warmup_queries = warmup_queries
+        self._warmup_thread: Optional[threading.Thread] = None
+        self.warmup_status: Dict = {'state': 'idle'}
         
         logger.info("Search pipeline initialized")
     
@@ -70,11 +136,17 @@ class SearchPipeline:
         diversify: bool = True,
         max_per_domain: int = 3,
         offset: int = 0,
-        page_size: int = None
+        page_size: int = None,
+        filters: Optional[Dict] = None
     ) -> Dict:
         """
         Execute search query with pagination, advanced ranking and caching
         
+        Requests are identified by their analyzed query, so "Nyheter  Stockholm" and
+        "stockholm nyheter" share cache entries. Concurrent identical requests share
+        one execution; the ones that waited get a deep copy of its response with
+        'coalesced' set.
+        
         Args:
             query: Search query
             max_results: Maximum number of results (for backward compatibility)
@@ -82,12 +154,90 @@ class SearchPipeline:
             max_per_domain: Maximum results per domain when diversifying
             offset: Starting position for pagination (0-based)
             page_size: Number of results per page (overrides max_results if set)
+            filters: Optional facet filters, e.g. {'domain': 'svt.se', 'category': 'news',
+                     'language': 'sv', 'crawled_after': timestamp}
         
         Returns:
             Dictionary with search results and pagination metadata
         """
         start_time = time.time()
+        context = SearchContext.with_timeout(self.search_timeout)
+        
+        if self.query_log is not None and not getattr(self._refresh_state, 'active', False):
+            self.query_log.record({
+                'query': query,
+                'max_results': max_results,
+                'diversify': diversify,
+                'max_per_domain': max_per_domain,
+                'offset': offset,
+                'page_size': page_size,
+                'filters': filters
+            })
+        
+        # Analyzed once per distinct query text; the cache key is built from the analysis
+        with context.stage('query_analysis'):
+            analysis = self._analyze_query(query)
+        
+        def execute() -> Dict:
+            return self._search(
+                query, analysis, context, start_time,
+                max_results, diversify, max_per_domain, offset, page_size, filters
+            )
+        
+        if self.single_flight is None:
+            return execute()
+        
+        key = (self._cache_key(analysis, page_size or max_results, diversify, offset, filters), max_per_domain)
+        response, shared = self.single_flight.do(key, execute)
+        if shared:
+            # Deep copy: callers may edit result dicts, which the leader and other waiters also hold
+            response = copy.deepcopy(response)
+            response.update(query=query, coalesced=True)
+        return response
+    
+    def get_etag(
+        self,
+        query: str,
+        max_results: int = 10,
+        diversify: bool = True,
+        max_per_domain: int = 3,
+        offset: int = 0,
+        page_size: int = None,
+        filters: Optional[Dict] = None
+    ) -> str:
+        """
+        Get an HTTP validator for a search request without executing it
+        
+        The tag combines the index version with the analyzed request (the same
+        identity the result cache uses), so it changes when the index or ranking
+        changes and equivalent queries share it. It is weak: timings and
+        timestamps in the response body differ between executions.
+        
+        Args:
+            Same as search
         
+        Returns:
+            Weak ETag, e.g. W/"7-3f2a9c0d1e5b4a68"
+        """
+        analysis = self._analyze_query(query)
+        key = self._cache_key(analysis, page_size or max_results, diversify, offset, filters)
+        digest = hashlib.blake2b(f"{key}_{max_per_domain}".encode('utf-8'), digest_size=8).hexdigest()
+        return f'W/"{self._check_index_version()}-{digest}"'
+    
+    def _search(
+        self,
+        query: str,
+        analysis: Dict,
+        context: SearchContext,
+        start_time: float,
+        max_results: int,
+        diversify: bool,
+        max_per_domain: int,
+        offset: int,
+        page_size: Optional[int],
+        filters: Optional[Dict]
+    ) -> Dict:
+        """Execute one analyzed search (see search for the arguments)"""
         # Determine actual page size
         if page_size is None:
             page_size = max_results
@@ -102,27 +252,48 @@ class SearchPipeline:
         
         logger.info(f"Search request: '{query}' (offset={offset}, page_size={page_size})")
         
-        # Enhanced query processing for natural language
-        enhanced_query = self.query_processor.process_query(query)
-        logger.debug(f"Enhanced query: {enhanced_query['expanded_terms']}")
-        
         # Check cache if enabled (include pagination in cache key)
         if self.enable_cache:
-            cache_key = f"{query}_{page_size}_{diversify}_{offset}"
-            cached_result = self.cache_manager.get('search', cache_key)
+            generation = self._check_index_version()
+            cache_key = self._cache_key(analysis, page_size, diversify, offset, filters)
+            self._track_request(cache_key, {
+                'query': query,
+                'page_size': page_size,
+                'diversify': diversify,
+                'max_per_domain': max_per_domain,
+                'offset': offset,
+                'filters': filters
+            })
+            cached_result = self.cache_manager.get('search', cache_key, generation=generation)
             if cached_result:
                 logger.info(f"Cache hit for query: '{query}'")
-                cached_result['from_cache'] = True
-                return cached_result
-        
-        # Preprocess query (traditional method)
-        preprocessed = self.query_preprocessor.preprocess(query)
-        
-        # Combine traditional terms with enhanced expanded terms
-        search_terms = list(set(preprocessed.get('processed_terms', []) + 
-                                enhanced_query.get('expanded_terms', [])))
-        
-        if not search_terms:
+                # Equivalent queries share the entry: answer with this request's own text
+                return dict(cached_result, query=query, from_cache=True)
+        
+        ranking_terms = analysis['ranking_terms']
+        search_terms = analysis['search_terms']
+        expansion_terms = analysis['expansion_terms']
+        query_tree = analysis['query_tree']
+        candidate_doc_ids = None
+        
+        # Mostly common words ("vem är det"): exact bigram matches answer the query when there are any
+        if analysis['common_words']:
+            with context.stage('shingle_lookup'):
+                phrase_tree = self.query_planner.normalize(PhraseNode(query.split()))
+                phrase_doc_ids = self.query_planner.search(phrase_tree) if phrase_tree is not None else []
+            if phrase_doc_ids:
+                query_tree = phrase_tree
+                candidate_doc_ids = phrase_doc_ids
+                expansion_terms = {}
+                logger.info(f"Common-word query '{query}' matched {len(phrase_doc_ids)} documents by bigrams")
+        
+        # Boolean retrieval: NOT clauses and site: filters applied before ranking
+        if query_tree is not None and candidate_doc_ids is None:
+            with context.stage('boolean_retrieval'):
+                candidate_doc_ids = self.query_planner.search(query_tree)
+            logger.info(f"Boolean query {self.query_planner.describe(query_tree)} matched {len(candidate_doc_ids)} documents")
+        
+        if not search_terms and query_tree is None:
             logger.warning(f"Invalid query: '{query}'")
             return {
                 'query': query,
@@ -138,6 +309,14 @@ class SearchPipeline:
                 }
             }
         
+        # Facet filters become one bitmap, tested against postings during retrieval
+        doc_filter = None
+        if filters:
+            with context.stage('filters'):
+                doc_filter = self.indexer.facet_index.get_filter(filters)
+                if doc_filter is not None and candidate_doc_ids is not None:
+                    candidate_doc_ids = [doc_id for doc_id in candidate_doc_ids if doc_filter(doc_id)]
+        
         logger.info(f"Search terms: {search_terms}")
         
         # Execute search with more results for pagination
@@ -147,7 +326,12 @@ class SearchPipeline:
         try:
             results = self.search_executor.execute_search(
                 search_terms,
-                total_to_fetch
+                total_to_fetch,
+                expansion_terms=expansion_terms,
+                context=context,
+                doc_ids=candidate_doc_ids,
+                auto_correct=self.auto_correct,
+                doc_filter=doc_filter
             )
         except Exception as e:
             # Graceful degradation - return error info instead of failing
@@ -175,6 +359,7 @@ class SearchPipeline:
                     'query': query,
                     'results': results,
                     'total_results': 0,
+                    'did_you_mean': context.did_you_mean,
                     'search_time': time.time() - start_time,
                     'pagination': {
                         'offset': offset,
@@ -184,42 +369,54 @@ class SearchPipeline:
                     }
                 }
             
-            # Deduplicate
-            results = self.result_processor.deduplicate_results(results)
-            
-            # Apply advanced ranking if enabled
-            if self.enable_ranking:
-                results = self.ranking_core.rank_results(
-                    results,
-                    preprocessed['processed_terms'],
-                    original_query=query,
-                    query_intent=enhanced_query.get('intent')
-                )
-                logger.debug(f"Applied advanced ranking to {len(results)} results")
+            # Facet counts over the matched documents, before diversification drops any
+            with context.stage('facets'):
+                facets = self.indexer.facet_index.facet_counts(result['url'] for result in results)
             
-            # Diversify if requested
-            if diversify:
+            with context.stage('ranking'):
+                # Deduplicate
+                results = self.result_processor.deduplicate_results(results)
+                
+                # Apply advanced ranking if enabled
                 if self.enable_ranking:
-                    # Use advanced diversity ranker
-                    results = self.diversity_ranker.diversify_results(results)
-                else:
-                    # Use basic diversity
-                    results = self.result_processor.diversify_results(
+                    results = self.ranking_core.rank_results(
                         results,
-                        max_per_domain
+                        ranking_terms,
+                        original_query=query,
+                        query_intent=analysis['intent'],
+                        context=context
                     )
+                    logger.debug(f"Applied advanced ranking to {len(results)} results")
+                
+                # Diversify if requested
+                if diversify:
+                    if self.enable_ranking:
+                        # Use advanced diversity ranker
+                        results = self.diversity_ranker.diversify_results(results)
+                    else:
+                        # Use basic diversity
+                        results = self.result_processor.diversify_results(
+                            results,
+                            max_per_domain
+                        )
             
             # Apply pagination
             total_available = len(results)
             end_index = offset + page_size
             paginated_results = results[offset:end_index]
             
-            # Format results
-            paginated_results = self.result_processor.format_results(
-                paginated_results,
-                query,
-                page_size
-            )
+            # Format results (out of time: description snippets, no document store reads)
+            fetch_content = not context.expired()
+            if not fetch_content:
+                context.degrade('snippets')
+            with context.stage('formatting'):
+                paginated_results = self.result_processor.format_results(
+                    paginated_results,
+                    query,
+                    page_size,
+                    query_terms=ranking_terms,
+                    fetch_content=fetch_content
+                )
             
             # Calculate pagination metadata
             has_more = end_index < total_available
@@ -227,6 +424,7 @@ class SearchPipeline:
             current_page = offset // page_size + 1
         else:
             paginated_results = []
+            facets = {}
             total_available = 0
             has_more = False
             total_pages = 0
@@ -237,7 +435,7 @@ class SearchPipeline:
         # Create response with pagination metadata
         response = {
             'query': query,
-            'processed_terms': preprocessed['processed_terms'],
+            'processed_terms': ranking_terms,
             'results': paginated_results,
             'total_results': len(paginated_results),
             'total_available': total_available,
@@ -246,6 +444,18 @@ class SearchPipeline:
             'from_cache': False,
             'ranking_enabled': self.enable_ranking,
             'cache_enabled': self.enable_cache,
+            'boolean_query': self.query_planner.describe(query_tree),
+            'did_you_mean': context.did_you_mean,
+            'corrected_query': context.did_you_mean if context.auto_corrected else None,
+            'expansion_applied': context.expansion_applied,
+            'expansion_terms': context.expansion_terms,
+            'filters': filters or {},
+            'facets': facets,
+            'retrieval_tier': context.retrieval_tier,
+            'estimated_total_hits': context.estimated_hits,
+            'stage_timings': context.get_stage_timings(),
+            'degraded': context.degraded,
+            'degraded_stages': list(context.degraded_stages),
             'pagination': {
                 'offset': offset,
                 'page_size': page_size,
@@ -256,10 +466,13 @@ class SearchPipeline:
             }
         }
         
-        # Cache result if enabled
-        if self.enable_cache:
-            cache_key = f"{query}_{page_size}_{diversify}_{offset}"
-            self.cache_manager.set('search', cache_key, response)
+        if context.degraded:
+            self.degraded_queries += 1
+            logger.warning(f"Search for '{query}' degraded to meet the deadline: {', '.join(context.degraded_stages)}")
+        
+        # Cache result if enabled (partial results are not worth keeping)
+        if self.enable_cache and not context.degraded:
+            self.cache_manager.set('search', cache_key, response, generation=generation)
         
         # Log search
         self._log_search(response)
@@ -268,8 +481,279 @@ class SearchPipeline:
         
         return response
     
+    def _analyze_query(self, query: str) -> Dict:
+        """
+        Analyze a query into the terms, expansions and boolean tree the search runs on
+        
+        Analyses are cached per whitespace-normalized query text and index version
+        (wildcards and shingles are resolved against the index).
+        
+        Args:
+            query: Raw search query
+        
+        Returns:
+            Dictionary with ranking_terms, search_terms, expansion_terms, query_tree,
+            common_words, intent and canonical (the analyzed query as one string)
+        """
+        text = ' '.join(query.split())
+        if self.enable_cache:
+            generation = self._check_index_version()
+            analysis = self.cache_manager.get('query', text, generation=generation)
+            if analysis is not None:
+                return analysis
+        
+        # Enhanced query processing for natural language
+        enhanced_query = self.query_processor.process_query(query)
+        logger.debug(f"Enhanced query: {enhanced_query['expanded_terms']}")
+        
+        # Preprocess query (traditional method)
+        preprocessed = self.query_preprocessor.preprocess(query)
+        ranking_terms = preprocessed['processed_terms']
+        query_tree = None
+        
+        if self.query_parser.is_structured(query):
+            # Boolean query: the planner decides candidates, no expansion
+            query_tree = self.query_planner.normalize(self.query_parser.parse(query))
+            ranking_terms = self.query_planner.ranking_terms(query_tree)
+            search_terms = list(ranking_terms)
+            expansion_terms = {}
+        else:
+            # User's terms are retrieved first; expansions are weighted and merged lazily
+            search_terms = list(dict.fromkeys(ranking_terms))
+            expansion_terms = self._analyze_expansions(enhanced_query, search_terms)
+            
+            if not search_terms:
+                # Nothing but expansions survived analysis: search them as the query
+                search_terms = list(expansion_terms)
+                expansion_terms = {}
+        
+        analysis = {
+            'ranking_terms': ranking_terms,
+            'search_terms': search_terms,
+            'expansion_terms': expansion_terms,
+            'query_tree': query_tree,
+            'common_words': query_tree is None and self._is_common_word_query(query, search_terms),
+            'intent': enhanced_query.get('intent')
+        }
+        analysis['canonical'] = self._canonical_query(text, analysis)
+        
+        if self.enable_cache:
+            self.cache_manager.set('query', text, analysis, generation=generation)
+        return analysis
+    
+    def _canonical_query(self, text: str, analysis: Dict) -> str:
+        """
+        Describe an analyzed query so that queries searched the same way compare equal
+        
+        Plain queries are bags of terms, so case, spacing, stopwords and word order
+        do not matter. Boolean queries are described by their normalized tree, and
+        common-word queries (looked up as bigrams) keep their word order.
+        
+        Args:
+            text: Whitespace-normalized query text
+            analysis: Query analysis (see _analyze_query)
+        
+        Returns:
+            Canonical query string
+        """
+        if analysis['query_tree'] is not None:
+            canonical = f"bool:{self.query_planner.describe(analysis['query_tree'])}"
+        elif analysis['common_words']:
+            canonical = f"phrase:{text.lower()}"
+        else:
+            canonical = f"terms:{' '.join(sorted(analysis['ranking_terms']))}"
+        
+        expansions = ','.join(f"{term}={weight:g}" for term, weight in sorted(analysis['expansion_terms'].items()))
+        return f"{canonical}|intent={analysis['intent']}|expand={expansions}"
+    
+    def _ranking_version(self) -> str:
+        """Short fingerprint of the ranking configuration, so reweighting bypasses old entries"""
+        if not self.enable_ranking:
+            return 'unranked'
+        return format(zlib.crc32(repr(self.ranking_core.get_weights()).encode('utf-8')), '08x')
+    
+    def _cache_key(
+        self,
+        analysis: Dict,
+        page_size: int,
+        diversify: bool,
+        offset: int,
+        filters: Optional[Dict]
+    ) -> str:
+        """Cache key for a search request (filters included in a stable order)"""
+        key = f"{analysis['canonical']}_{page_size}_{diversify}_{offset}_{self._ranking_version()}"
+        if filters:
+            key += '_' + '_'.join(f"{name}={filters[name]}" for name in sorted(filters))
+        return key
+    
+    def _check_index_version(self) -> int:
+        """
+        Get the index version cached results must match
+        
+        A new version makes older cached results stale; they are replaced when
+        requested again, and the hottest ones are recomputed in the background
+        if refresh_hot_queries is set.
+        
+        Returns:
+            Current index version
+        """
+        version = self.indexer.index_version
+        if version == self._cache_generation:
+            return version
+        
+        with self._refresh_lock:
+            if version == self._cache_generation:
+                return version
+            self._cache_generation = version
+            logger.info(f"Index version {version}: cached results of older versions are stale")
+            
+            if self.refresh_hot_queries and not (self._refresh_thread and self._refresh_thread.is_alive()):
+                self._refresh_thread = threading.Thread(
+                    target=self._refresh_hot_requests,
+                    name="kse-cache-refresh",
+                    daemon=True
+                )
+                self._refresh_thread.start()
+        return version
+    
+    def _track_request(self, cache_key: str, request: Dict) -> None:
+        """Count a cacheable request so the hottest can be refreshed after reindexing"""
+        if getattr(self._refresh_state, 'active', False):
+            return
+        with self._refresh_lock:
+            entry = self._hot_requests.pop(cache_key, None) or {'request': request, 'hits': 0}
+            entry['hits'] += 1
+            self._hot_requests[cache_key] = entry
+            if len(self._hot_requests) > self.HOT_REQUESTS_TRACKED:
+                self._hot_requests.popitem(last=False)
+    
+    def _refresh_hot_requests(self) -> None:
+        """Recompute the most requested searches against the current index"""
+        with self._refresh_lock:
+            hot = sorted(self._hot_requests.values(), key=lambda entry: -entry['hits'])
+        
+        self._refresh_state.active = True
+        refreshed = 0
+        try:
+            for entry in hot[:self.refresh_hot_queries]:
+                self.search(**entry['request'])
+                refreshed += 1
+        except Exception as e:
+            logger.error(f"Refreshing hot cached searches failed: {e}")
+        finally:
+            self._refresh_state.active = False
+            self.hot_refreshes += refreshed
+        logger.info(f"Refreshed {refreshed} hot cached searches for index version {self._cache_generation}")
+    
+    def start_warmup(self) -> bool:
+        """
+        Replay the most frequent logged requests into the cache in a background thread
+        
+        The replay sleeps between requests so it uses at most WARMUP_DUTY_CYCLE
+        of one thread's time, leaving the rest to live traffic. Progress is in
+        warmup_status.
+        
+        Returns:
+            True if a warm-up was started
+        """
+        if not (self.enable_cache and self.query_log is not None and self.warmup_queries > 0):
+            return False
+        
+        with self._refresh_lock:
+            if self._warmup_thread and self._warmup_thread.is_alive():
+                return False
+            self.warmup_status = {
+                'state': 'running',
+                'total': 0,
+                'completed': 0,
+                'already_cached': 0,
+                'failed': 0,
+                'started_at': time.time(),
+                'elapsed': 0.0
+            }
+            self._warmup_thread = threading.Thread(target=self._warm_cache, name="kse-cache-warmup", daemon=True)
+            self._warmup_thread.start()
+        return True
+    
+    def _warm_cache(self) -> None:
+        """Search the top logged requests, throttled to the warm-up duty cycle"""
+        status = self.warmup_status
+        requests = self.query_log.top_requests(self.warmup_queries)
+        status['total'] = len(requests)
+        logger.info(f"Warming cache with {len(requests)} logged requests")
+        
+        self._refresh_state.active = True
+        try:
+            for request in requests:
+                start = time.perf_counter()
+                try:
+                    if self.search(**request).get('from_cache'):
+                        status['already_cached'] += 1
+                except Exception as e:
+                    status['failed'] += 1
+                    logger.warning(f"Cache warm-up request {request} failed: {e}")
+                status['completed'] += 1
+                status['elapsed'] = round(time.time() - status['started_at'], 3)
+                time.sleep((time.perf_counter() - start) * (1 / self.WARMUP_DUTY_CYCLE - 1))
+            status['state'] = 'done'
+        except Exception as e:
+            status['state'] = 'failed'
+            logger.error(f"Cache warm-up failed: {e}")
+        finally:
+            self._refresh_state.active = False
+            status['elapsed'] = round(time.time() - status['started_at'], 3)
+        logger.info(f"Cache warm-up {status['state']}: {status['completed']}/{status['total']} requests "
+                    f"in {status['elapsed']}s")
+    
+    def _is_common_word_query(self, query: str, search_terms: List[str]) -> bool:
+        """
+        Check if a plain query lost at least half its words to stopword removal
+        
+        Args:
+            query: Raw search query
+            search_terms: Analyzed terms left after stopword removal
+        
+        Returns:
+            True if the query should first be looked up as bigrams
+        """
+        if not self.query_planner.shingle_analyzer:
+            return False
+        words = query.split()
+        return len(words) > 1 and len(words) - len(search_terms) >= len(search_terms)
+    
+    def _analyze_expansions(self, enhanced_query: Dict, original_terms: List[str]) -> Dict[str, float]:
+        """
+        Run expansion terms through the index analyzer and keep their weights
+        
+        Args:
+            enhanced_query: Output of QueryProcessor.process_query
+            original_terms: Processed user terms (never treated as expansions)
+        
+        Returns:
+            Dictionary of {processed_term: weight}
+        """
+        originals = set(original_terms)
+        expansion_terms: Dict[str, float] = {}
+        
+        for term, weight in enhanced_query.get('expansion_weights', {}).items():
+            for processed in self.nlp.process_query(term):
+                if processed in originals:
+                    continue
+                expansion_terms[processed] = max(expansion_terms.get(processed, 0.0), weight)
+        
+        return expansion_terms
+    
     def _log_search(self, search_data: Dict) -> None:
-        """Log search to history"""
+        """Log search to history (background cache refreshes are not user searches)"""
+        if getattr(self._refresh_state, 'active', False):
+            return
+        
+        # Only queries that found something are worth suggesting, spelled as they were
+        # searched; boolean syntax ("göteborg -regn") is not something to complete to
+        if search_data['total_results'] > 0 and not self.query_parser.is_structured(search_data['query']):
+            suggestion = search_data.get('corrected_query') or search_data.get('did_you_mean') or search_data['query']
+            self.search_executor.autocomplete.record_query(suggestion)
+        
         self.search_history.append({
             'query': search_data['query'],
             'results_count': search_data['total_results'],
@@ -281,6 +765,19 @@ class SearchPipeline:
         if len(self.search_history) > 1000:
             self.search_history = self.search_history[-1000:]
     
+    def get_suggestions(self, partial_query: str, max_suggestions: int = 5) -> List[str]:
+        """
+        Get autocomplete suggestions
+        
+        Args:
+            partial_query: Query as typed so far
+            max_suggestions: Maximum suggestions
+        
+        Returns:
+            List of suggestions
+        """
+        return self.search_executor.get_suggestions(partial_query, max_suggestions)
+    
     def get_search_history(self, limit: int = 100) -> List[Dict]:
         """
         Get search history
@@ -316,6 +813,17 @@ class SearchPipeline:
                 'average_results': round(total_results / len(self.search_history), 2)
             }
         
+        stats['search_timeout'] = self.search_timeout
+        stats['degraded_queries'] = self.degraded_queries
+        stats['degraded_rate'] = round(self.degraded_queries / max(stats['total_searches'], 1), 3)
+        stats['index_version'] = self._cache_generation
+        stats['hot_refreshes'] = self.hot_refreshes
+        if self.single_flight is not None:
+            stats['coalescing'] = self.single_flight.get_stats()
+        stats['warmup'] = dict(self.warmup_status)
+        if self.query_log is not None:
+            stats['query_log'] = self.query_log.get_stats()
+        
         # Add cache statistics if enabled
         if self.enable_cache:
             stats['cache'] = self.cache_manager.get_statistics()
@@ -0,0 +1,156 @@
+"""
+KSE HTTP Cache - Validators, cache headers and compression for API responses
+Framework-independent helpers used by the server: fast JSON encoding (orjson
+when installed), ETag matching for conditional requests and Accept-Encoding
+negotiation with gzip or brotli compression
+"""
+import gzip
+import json
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Standard library json is used instead
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # Only gzip is offered
+
+GZIP_LEVEL = 5  # Dynamic responses: most of the size reduction at a fraction of level 9's CPU
+BROTLI_QUALITY = 4
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize values the encoders do not handle natively (sets, numpy scalars)"""
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def encode_json(data: Any) -> bytes:
+    """
+    Serialize data as UTF-8 JSON
+    
+    Args:
+        data: JSON-compatible data
+    
+    Returns:
+        Encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+def decode_json(data) -> Any:
+    """
+    Parse JSON
+    
+    Args:
+        data: JSON text (str or bytes)
+    
+    Returns:
+        Parsed data
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against a response ETag (weak comparison)
+    
+    Args:
+        if_none_match: Header value, e.g. 'W/"a1", W/"b2"' or '*'
+        etag: ETag of the current response
+    
+    Returns:
+        True if the client's copy is current (answer 304 Not Modified)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def cache_control(max_age: int) -> str:
+    """
+    Cache-Control header for a cacheable response
+    
+    Args:
+        max_age: Seconds the response may be reused without revalidation (0 = always revalidate)
+    
+    Returns:
+        Header value
+    """
+    if max_age <= 0:
+        return 'no-cache'
+    return f'public, max-age={max_age}'
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick a response encoding from an Accept-Encoding header
+    
+    Brotli is preferred when the brotli package is installed; codings with q=0
+    are refused.
+    
+    Args:
+        accept_encoding: Header value, e.g. 'gzip, deflate, br;q=0.9'
+    
+    Returns:
+        'br', 'gzip' or None (send uncompressed)
+    """
+    if not accept_encoding:
+        return None
+    
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+    
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    wildcard = accepted.get('*', 0.0)
+    best = None
+    best_quality = 0.0
+    for coding in offered:
+        quality = accepted.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compress a response body
+    
+    Args:
+        body: Uncompressed body
+        encoding: 'br' or 'gzip' (as returned by choose_encoding)
+    
+    Returns:
+        Compressed body
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
@@ -2,18 +2,23 @@
 KSE Server - Main Flask REST API server
 """
 from flask import Flask, jsonify, request
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from pathlib import Path
 import json
+import time
 from datetime import datetime
 from kse.core.kse_config import get_config
+from kse.core.kse_constants import DEFAULT_SEARCH_TIMEOUT
 from kse.core.kse_logger import KSELogger, get_logger
 from kse.core.kse_network_info import get_network_info, format_server_info
 from kse.core.kse_state_manager import StateManager
+from kse.core.kse_memory_budget import MemoryBudget
 from kse.storage.kse_storage_manager import StorageManager
 from kse.nlp.kse_nlp_core import NLPCore
 from kse.indexing.kse_indexer_pipeline import IndexerPipeline
 from kse.search.kse_search_pipeline import SearchPipeline
+from kse.server.kse_http_cache import cache_control, choose_encoding, compress, decode_json, encode_json, etag_matches
 
 logger = None
 app = None
@@ -21,14 +26,29 @@ search_pipeline = None
 network_info = None
 allowed_domains = None
 state_manager = None
+memory_budget = None
+monitoring = None
+http_options = {}
+
+
+class KSEJSONProvider(JSONProvider):
+    """jsonify through the fast encoder (orjson when installed)"""
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return encode_json(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return decode_json(s)
 
 
 def create_app():
     """Create Flask application"""
-    global app, search_pipeline, logger, network_info, allowed_domains, state_manager
+    global app, search_pipeline, logger, network_info, allowed_domains, state_manager, http_options
+    global memory_budget, monitoring
     
     # Initialize Flask
     app = Flask(__name__)
+    app.json = KSEJSONProvider(app)
     
     # Load configuration
     config = get_config()
@@ -90,23 +110,63 @@ def create_app():
     if config.get("server.enable_cors", True):
         CORS(app)
     
+    # HTTP caching and compression of API responses
+    http_options = {
+        'max_age': config.get("search.http_max_age", 60),
+        'compress': config.get("server.compress_responses", True),
+        'min_size': config.get("server.compression_min_size", 1024)
+    }
+    
     # Initialize components
+    memory_budget = MemoryBudget.from_config(config)
     data_dir = Path(config.get("data_dir"))
     storage_manager = StorageManager(data_dir)
-    nlp_core = NLPCore(enable_lemmatization=True, enable_stopword_removal=True)
-    indexer = IndexerPipeline(storage_manager, nlp_core)
+    nlp_core = NLPCore(
+        enable_lemmatization=config.get("nlp.enable_lemmatization", True),
+        enable_stopword_removal=True,
+        enable_compound_splitting=config.get("nlp.enable_compound_splitting", True),
+        min_compound_length=config.get("nlp.min_compound_length", 8)
+    )
+    indexer = IndexerPipeline(
+        storage_manager,
+        nlp_core,
+        enable_shingles=config.get("nlp.enable_shingles", False),
+        detect_duplicates=config.get("indexing.detect_duplicates", True),
+        collapse_duplicates=config.get("indexing.collapse_duplicates", True),
+        document_compression=config.get("storage.document_compression", "zlib"),
+        memory_budget=memory_budget
+    )
     search_pipeline = SearchPipeline(
         indexer,
         nlp_core,
         enable_cache=config.get("cache.enabled", True),
-        enable_ranking=config.get("ranking.enabled", True)
+        enable_ranking=config.get("ranking.enabled", True),
+        auto_correct=config.get("search.auto_correct", True),
+        search_timeout=config.get("search.search_timeout", DEFAULT_SEARCH_TIMEOUT),
+        cache_options={
+            "max_size_mb": config.get("cache.max_size_mb", 100),
+            "default_ttl": config.get("cache.default_ttl", 3600),
+            "admission": config.get("cache.admission", "tinylfu"),
+            "shards": config.get("cache.shards", 8),
+            "disk_cache_dir": storage_manager.cache_dir if config.get("cache.disk_enabled", True) else None,
+            "disk_max_size_mb": config.get("cache.disk_max_size_mb", 256),
+            "postings_cache_mb": config.get("cache.postings_cache_mb", 32),
+            "postings_min_document_frequency": config.get("cache.postings_min_document_frequency", 64),
+            "memory_budget": memory_budget,
+        },
+        refresh_hot_queries=config.get("cache.refresh_hot_queries", 50),
+        coalesce_requests=config.get("search.coalesce_requests", True),
+        coalesce_wait_timeout=config.get("search.coalesce_wait_timeout", 5.0),
+        query_log_path=storage_manager.cache_dir / "query_log.jsonl" if config.get("cache.query_log", True) else None,
+        warmup_queries=config.get("cache.warmup_queries", 100)
     )
+    search_pipeline.start_warmup()
+    memory_budget.start()
     
     # Initialize monitoring if enabled
-    monitoring = None
     if config.get("monitoring.enabled", True):
         from kse.monitoring.kse_monitoring_core import MonitoringCore
-        monitoring = MonitoringCore(check_interval=60)
+        monitoring = MonitoringCore(check_interval=60, memory_budget=memory_budget)
         monitoring.start_monitoring()
         logger.info("Monitoring enabled")
     
@@ -135,6 +195,24 @@ def create_app():
 def register_routes():
     """Register API routes"""
     
+    @app.after_request
+    def compress_response(response):
+        """Compress JSON responses for clients that accept gzip or br"""
+        if (not http_options.get('compress') or response.status_code != 200
+                or response.mimetype != 'application/json' or response.direct_passthrough
+                or 'Content-Encoding' in response.headers):
+            return response
+        
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        if len(body) < http_options['min_size']:
+            return response
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding:
+            response.set_data(compress(body, encoding))
+            response.headers['Content-Encoding'] = encoding
+        return response
+    
     @app.route('/api/search', methods=['GET'])
     def search():
         """Search endpoint with pagination support"""
@@ -154,15 +232,64 @@ def register_routes():
                 'error': 'Offset must be non-negative'
             }), 400
         
+        # Optional facet filters (repeat domain/category/lang for OR; after/before are Unix timestamps)
+        filters = {
+            'domain': request.args.getlist('domain'),
+            'category': request.args.getlist('category'),
+            'language': request.args.getlist('lang'),
+            'crawled_after': request.args.get('after', type=float),
+            'crawled_before': request.args.get('before', type=float)
+        }
+        filters = {name: value for name, value in filters.items() if value not in (None, [])}
+        
+        # Revalidation: an unchanged index and request mean the client's copy is current
+        etag = search_pipeline.get_etag(
+            query,
+            max_results=max_results,
+            offset=offset,
+            page_size=page_size,
+            filters=filters or None
+        )
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            response = app.response_class(status=304)
+            response.headers['ETag'] = etag
+            response.headers['Cache-Control'] = cache_control(http_options['max_age'])
+            return response
+        
         # Execute search with pagination
         results = search_pipeline.search(
             query, 
             max_results=max_results,
             offset=offset,
-            page_size=page_size
+            page_size=page_size,
+            filters=filters or None
         )
         
-        return jsonify(results)
+        response = jsonify(results)
+        if results.get('error') or results.get('degraded'):
+            # Failed or partial results must not be reused
+            response.headers['Cache-Control'] = 'no-store'
+        else:
+            response.headers['ETag'] = etag
+            response.headers['Cache-Control'] = cache_control(http_options['max_age'])
+        return response
+    
+    @app.route('/api/suggest', methods=['GET'])
+    def suggest():
+        """Autocomplete endpoint (called on every keystroke)"""
+        query = request.args.get('q', '')
+        max_suggestions = request.args.get('max', 5, type=int)
+        max_suggestions = max(1, min(max_suggestions, 10))
+        
+        start_time = time.perf_counter()
+        suggestions = search_pipeline.get_suggestions(query, max_suggestions)
+        lookup_ms = (time.perf_counter() - start_time) * 1000
+        
+        return jsonify({
+            'query': query,
+            'suggestions': suggestions,
+            'lookup_time_ms': round(lookup_ms, 3)
+        })
     
     @app.route('/api/check-domain', methods=['GET'])
     def check_domain():
@@ -451,6 +578,7 @@ def register_routes():
             'network': network_info,
             'endpoints': [
                 '/api/search?q=query',
+                '/api/suggest?q=prefix',
                 '/api/check-domain?domain=example.com',
                 '/api/domains - GET all domains',
                 '/api/domains/add - POST add domain',
@@ -467,7 +595,8 @@ def register_routes():
                 '/api/cache/clear',
                 '/api/cache/stats',
                 '/api/ranking/weights',
-                '/api/monitoring/status'
+                '/api/monitoring/status',
+                '/api/monitoring/memory'
             ]
         })
     
@@ -507,6 +636,7 @@ def register_routes():
         """Get cache statistics"""
         if search_pipeline.enable_cache:
             stats = search_pipeline.cache_manager.get_statistics()
+            stats['warmup'] = dict(search_pipeline.warmup_status)
             return jsonify(stats)
         return jsonify({
             'error': 'Cache not enabled'
@@ -528,6 +658,15 @@ def register_routes():
             'error': 'Monitoring not enabled'
         }), 400
     
+    @app.route('/api/monitoring/memory', methods=['GET'])
+    def monitoring_memory():
+        """Get process memory budget and per-consumer usage"""
+        if memory_budget:
+            return jsonify(memory_budget.get_stats())
+        return jsonify({
+            'error': 'Memory budget not enabled'
+        }), 400
+    
     @app.route('/', methods=['GET'])
     def index():
         """Root endpoint"""
@@ -539,6 +678,7 @@ def register_routes():
             'network': network_info,
             'endpoints': [
                 '/api/search?q=query',
+                '/api/suggest?q=prefix',
                 '/api/check-domain?domain=example.com',
                 '/api/domains - Domain management',
                 '/api/system/state - System state',
@@ -550,7 +690,8 @@ def register_routes():
                 '/api/cache/clear',
                 '/api/cache/stats',
                 '/api/ranking/weights',
-                '/api/monitoring/status'
+                '/api/monitoring/status',
+                '/api/monitoring/memory'
             ]
         })
 
@@ -576,6 +717,7 @@ def main():
     # Display API endpoints
     print(f"API endpoints:")
     print(f"  - GET  http://{host}:{port}/api/search?q=<query>")
+    print(f"  - GET  http://{host}:{port}/api/suggest?q=<prefix>")
     print(f"  - GET  http://{host}:{port}/api/check-domain?domain=<domain>")
     print(f"  - GET  http://{host}:{port}/api/server/info")
     print(f"  - GET  http://{host}:{port}/api/health")
@@ -585,6 +727,7 @@ def main():
     print(f"  - GET  http://{host}:{port}/api/cache/stats")
     print(f"  - GET  http://{host}:{port}/api/ranking/weights")
     print(f"  - GET  http://{host}:{port}/api/monitoring/status")
+    print(f"  - GET  http://{host}:{port}/api/monitoring/memory")
     
     if network_info and network_info.get('public_ip'):
         public_ip = network_info['public_ip']
@@ -0,0 +1,268 @@
+"""
+KSE Document Store - Compressed random-access storage for page content
+
+Page texts are appended to an uncompressed pending block. Once the block
+reaches BLOCK_SIZE bytes it is compressed (zlib or lzma) and appended to a
+single data file. An index maps each doc_id to (block, offset, length) inside
+the decompressed block, so one document is fetched by reading and
+decompressing a single block, never unrelated pages. Recently decompressed
+blocks are kept in a small LRU. A document may carry JSON annotations (term
+offsets, sentence starts) stored right after its text in the same block.
+"""
+import json
+import lzma
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from kse.core.kse_exceptions import StorageError
+from kse.core.kse_logger import get_logger
+from kse.storage.kse_data_serializer import DataSerializer
+
+logger = get_logger(__name__, "storage.log")
+
+CODECS = {
+    'zlib': (lambda data: zlib.compress(data, 6), zlib.decompress),
+    'lzma': (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+
+
+class DocumentStore:
+    """Block-compressed page content with per-document random access"""
+    
+    BLOCK_SIZE = 64 * 1024  # Uncompressed bytes per block
+    BLOCK_CACHE_SIZE = 16  # Decompressed blocks kept in memory
+    
+    DATA_FILE = "documents.dat"
+    INDEX_FILE = "documents_index.pkl"
+    
+    def __init__(self, directory: Path, compression: str = 'zlib', block_size: int = None):
+        """
+        Initialize document store
+        
+        Args:
+            directory: Directory for the data and index files
+            compression: Block codec, 'zlib' or 'lzma' (existing stores keep their codec)
+            block_size: Uncompressed bytes per block (defaults to BLOCK_SIZE)
+        """
+        if compression not in CODECS:
+            raise StorageError(f"Unknown document compression: {compression}")
+        
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+        self.block_size = block_size or self.BLOCK_SIZE
+        self._serializer = DataSerializer()
+        
+        # doc_id -> (block, offset, text length, annotations length)
+        self._documents: Dict[str, Tuple[int, ...]] = {}
+        self._blocks: List[Tuple[int, int]] = []  # block -> (file offset, compressed size)
+        self._pending = bytearray()  # Block being filled, number len(self._blocks)
+        self._block_cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self._raw_bytes = 0
+        self._fetches = 0
+        self._fetch_seconds = 0.0
+        self._max_fetch_seconds = 0.0
+        
+        self._load()
+    
+    @property
+    def _data_path(self) -> Path:
+        """Compressed blocks, appended in order"""
+        return self.directory / self.DATA_FILE
+    
+    @property
+    def _index_path(self) -> Path:
+        """Pickled block table and doc_id locations"""
+        return self.directory / self.INDEX_FILE
+    
+    def _load(self) -> None:
+        """Load the block index of an existing store"""
+        if not self._index_path.exists():
+            return
+        try:
+            state = self._serializer.load_pickle(self._index_path)
+            if state:
+                self.compression = state.get('compression', self.compression)
+                self._documents = state.get('documents', {})
+                self._blocks = state.get('blocks', [])
+                self._raw_bytes = state.get('raw_bytes', 0)
+                logger.info(f"Document store loaded: {len(self._documents)} documents in {len(self._blocks)} blocks")
+        except Exception as e:
+            logger.error(f"Failed to load document store index: {e}")
+    
+    def add(self, doc_id: str, content: str, annotations: Optional[Dict] = None) -> None:
+        """
+        Store document content (replaces earlier content of the same doc_id)
+        
+        Args:
+            doc_id: Document identifier (URL)
+            content: Page text
+            annotations: Optional JSON-serializable data fetched together with the text
+        """
+        data = (content or '').encode('utf-8')
+        extra = json.dumps(annotations, separators=(',', ':'), ensure_ascii=False).encode('utf-8') if annotations else b''
+        with self._lock:
+            self._documents[doc_id] = (len(self._blocks), len(self._pending), len(data), len(extra))
+            self._pending += data
+            self._pending += extra
+            self._raw_bytes += len(data) + len(extra)
+            if len(self._pending) >= self.block_size:
+                self._write_block()
+    
+    def _write_block(self) -> None:
+        """Compress the pending block and append it to the data file"""
+        if not self._pending:
+            return
+        compress, _ = CODECS[self.compression]
+        compressed = compress(bytes(self._pending))
+        with open(self._data_path, 'ab') as f:
+            offset = f.tell()
+            f.write(compressed)
+        self._blocks.append((offset, len(compressed)))
+        self._pending = bytearray()
+    
+    def flush(self) -> None:
+        """Write the pending block and persist the block index"""
+        with self._lock:
+            self._write_block()
+            state = {
+                'compression': self.compression,
+                'documents': self._documents,
+                'blocks': self._blocks,
+                'raw_bytes': self._raw_bytes
+            }
+            self._serializer.save_pickle(state, self._index_path)
+        logger.debug(f"Document store flushed: {len(self._blocks)} blocks")
+    
+    def _read_block(self, block: int) -> bytes:
+        """Decompressed bytes of a block (pending block included)"""
+        if block == len(self._blocks):
+            return bytes(self._pending)
+        
+        data = self._block_cache.get(block)
+        if data is not None:
+            self._block_cache.move_to_end(block)
+            return data
+        
+        offset, size = self._blocks[block]
+        with open(self._data_path, 'rb') as f:
+            f.seek(offset)
+            compressed = f.read(size)
+        _, decompress = CODECS[self.compression]
+        data = decompress(compressed)
+        
+        self._block_cache[block] = data
+        if len(self._block_cache) > self.BLOCK_CACHE_SIZE:
+            self._block_cache.popitem(last=False)
+        return data
+    
+    def get(self, doc_id: str) -> Optional[str]:
+        """
+        Fetch one document's content
+        
+        Args:
+            doc_id: Document identifier
+        
+        Returns:
+            Page text, or None if the document is not stored
+        """
+        document = self.get_document(doc_id)
+        return document[0] if document else None
+    
+    def get_document(self, doc_id: str) -> Optional[Tuple[str, Optional[Dict]]]:
+        """
+        Fetch one document's content and annotations
+        
+        Args:
+            doc_id: Document identifier
+        
+        Returns:
+            (page text, annotations or None), or None if the document is not stored
+        """
+        start = time.perf_counter()
+        with self._lock:
+            location = self._documents.get(doc_id)
+            if location is None:
+                return None
+            block, offset, length = location[:3]
+            extra_length = location[3] if len(location) > 3 else 0
+            try:
+                data = self._read_block(block)
+            except Exception as e:
+                logger.error(f"Failed to read document {doc_id} from block {block}: {e}")
+                return None
+            
+            elapsed = time.perf_counter() - start
+            self._fetches += 1
+            self._fetch_seconds += elapsed
+            self._max_fetch_seconds = max(self._max_fetch_seconds, elapsed)
+        
+        content = data[offset:offset + length].decode('utf-8')
+        annotations = None
+        if extra_length:
+            annotations = json.loads(data[offset + length:offset + length + extra_length])
+        return content, annotations
+    
+    def __contains__(self, doc_id: str) -> bool:
+        """Check if a document is stored"""
+        return doc_id in self._documents
+    
+    def __len__(self) -> int:
+        """Number of stored documents"""
+        return len(self._documents)
+    
+    def clear(self) -> None:
+        """Delete all stored documents"""
+        with self._lock:
+            self._documents.clear()
+            self._blocks.clear()
+            self._pending = bytearray()
+            self._block_cache.clear()
+            self._raw_bytes = 0
+            for path in (self._data_path, self._index_path):
+                if path.exists():
+                    path.unlink()
+        logger.info("Document store cleared")
+    
+    def get_memory_usage(self) -> int:
+        """Bytes buffered in memory (block being filled and decompressed block cache)"""
+        with self._lock:
+            return len(self._pending) + sum(len(data) for data in self._block_cache.values())
+    
+    def release_memory(self) -> int:
+        """
+        Write the block being filled and drop decompressed blocks
+        
+        Returns:
+            Bytes freed
+        """
+        with self._lock:
+            freed = len(self._pending) + sum(len(data) for data in self._block_cache.values())
+            self._write_block()
+            self._block_cache.clear()
+        return freed
+    
+    def get_statistics(self) -> Dict:
+        """
+        Get document store statistics
+        
+        Returns:
+            Dictionary with statistics (fetch times in milliseconds)
+        """
+        compressed = sum(size for _, size in self._blocks) + len(self._pending)
+        return {
+            'documents': len(self._documents),
+            'blocks': len(self._blocks),
+            'compression': self.compression,
+            'raw_bytes': self._raw_bytes,
+            'stored_bytes': compressed,
+            'compression_ratio': round(self._raw_bytes / max(compressed, 1), 2),
+            'fetches': self._fetches,
+            'avg_fetch_ms': round(self._fetch_seconds * 1000 / max(self._fetches, 1), 3),
+            'max_fetch_ms': round(self._max_fetch_seconds * 1000, 3)
+        }
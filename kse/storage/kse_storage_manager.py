@@ -25,6 +25,11 @@ class StorageManager:
         self._ensure_directories()
         logger.info(f"Storage initialized at {self.base_path}")
     
+    @property
+    def cache_dir(self) -> Path:
+        """Directory of persistent caches"""
+        return self.base_path / "storage" / "cache"
+    
     def _ensure_directories(self) -> None:
         """Create all required directories"""
         directories = [
@@ -33,6 +38,7 @@ class StorageManager:
             self.base_path / "storage" / "crawl_state",
             self.base_path / "storage" / "snapshots",
             self.base_path / "storage" / "pages",  # For incremental page storage
+            self.base_path / "storage" / "documents",  # Compressed page content
             self.base_path / "logs",
             self.base_path / "exports",
         ]
@@ -0,0 +1,31 @@
+"""
+Bit Utilities - Bit counting for integer bitsets and fingerprints
+"""
+
+import sys
+
+
+if sys.version_info >= (3, 10):
+    def popcount(value: int) -> int:
+        """
+        Count set bits in an integer
+        
+        Args:
+            value: Integer (bitset or fingerprint)
+        
+        Returns:
+            Number of 1 bits
+        """
+        return value.bit_count()
+else:
+    def popcount(value: int) -> int:
+        """
+        Count set bits in an integer (int.bit_count needs Python 3.10)
+        
+        Args:
+            value: Integer (bitset or fingerprint)
+        
+        Returns:
+            Number of 1 bits
+        """
+        return bin(value).count('1')
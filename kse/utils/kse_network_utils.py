@@ -3,7 +3,7 @@ Network Utilities - Network and URL handling utilities
 """
 
 import logging
-from typing import Optional
+from typing import List, Optional
 from urllib.parse import urlparse, urljoin, parse_qs
 
 logger = logging.getLogger(__name__)
@@ -68,6 +68,27 @@ def get_domain(url: str) -> Optional[str]:
         return None
 
 
+def get_domain_suffixes(domain: str) -> List[str]:
+    """
+    Get a domain and its parent domains (down to two labels)
+    
+    Args:
+        domain: Domain name, e.g. 'www.nyheter.svt.se'
+    
+    Returns:
+        List like ['nyheter.svt.se', 'svt.se'] ('www.' is dropped)
+    """
+    domain = (domain or '').lower().strip('.')
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    
+    labels = domain.split('.')
+    if len(labels) < 2:
+        return [domain] if domain else []
+    
+    return ['.'.join(labels[i:]) for i in range(len(labels) - 1)]
+
+
 def get_base_url(url: str) -> Optional[str]:
     """
     Get base URL (scheme + domain)
@@ -0,0 +1,212 @@
+"""
+Pattern Matcher - Aho-Corasick multi-pattern matching
+Compiles keyword dictionaries once and finds every match in a single pass over the text
+"""
+
+import logging
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PatternMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of patterns
+    
+    Every pattern carries one or more payloads (e.g. a category name), so several
+    dictionaries can share one automaton and be told apart after matching.
+    """
+    
+    def __init__(
+        self,
+        patterns: Optional[Iterable[Tuple[str, Hashable]]] = None,
+        whole_words: bool = False
+    ):
+        """
+        Initialize pattern matcher
+        
+        Args:
+            patterns: Optional iterable of (pattern, payload) pairs
+            whole_words: Only report matches that start and end on word boundaries
+        """
+        self.whole_words = whole_words
+        
+        # Trie: node -> {char: child node}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Node -> pattern ids ending here (including those reached via fail links)
+        self._output: List[List[int]] = [[]]
+        
+        self._patterns: List[str] = []
+        self._payloads: List[List[Hashable]] = []
+        self._pattern_ids: Dict[str, int] = {}
+        self._built = False
+        
+        if patterns:
+            for pattern, payload in patterns:
+                self.add(pattern, payload)
+            self.build()
+    
+    def add(self, pattern: str, payload: Hashable = None) -> None:
+        """
+        Add pattern to the automaton
+        
+        Args:
+            pattern: Pattern text (matched as-is, callers lowercase beforehand)
+            payload: Value reported with matches of this pattern
+        """
+        if not pattern:
+            return
+        
+        pattern_id = self._pattern_ids.get(pattern)
+        if pattern_id is None:
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[node][char] = next_node
+                node = next_node
+            
+            pattern_id = len(self._patterns)
+            self._patterns.append(pattern)
+            self._payloads.append([])
+            self._pattern_ids[pattern] = pattern_id
+            self._output[node].append(pattern_id)
+        
+        if payload is not None and payload not in self._payloads[pattern_id]:
+            self._payloads[pattern_id].append(payload)
+        
+        self._built = False
+    
+    def build(self) -> None:
+        """Compute failure links (breadth-first over the trie)"""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+        
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                
+                # Inherit outputs of the longest proper suffix
+                inherited = self._output[self._fail[child]]
+                if inherited:
+                    self._output[child] = self._output[child] + [
+                        pid for pid in inherited if pid not in self._output[child]
+                    ]
+        
+        self._built = True
+        logger.debug(f"PatternMatcher built: {len(self._patterns)} patterns, {len(self._goto)} states")
+    
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """
+        Iterate over all matches in text
+        
+        Args:
+            text: Text to scan
+        
+        Yields:
+            (start, end, pattern) tuples, end exclusive
+        """
+        if not self._built:
+            self.build()
+        
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        patterns = self._patterns
+        whole_words = self.whole_words
+        text_length = len(text)
+        
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            
+            if not output[node]:
+                continue
+            
+            end = index + 1
+            for pattern_id in output[node]:
+                pattern = patterns[pattern_id]
+                start = end - len(pattern)
+                if whole_words:
+                    if start > 0 and text[start - 1].isalnum():
+                        continue
+                    if end < text_length and text[end].isalnum():
+                        continue
+                yield start, end, pattern
+    
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Find all matches in text
+        
+        Args:
+            text: Text to scan
+        
+        Returns:
+            List of (start, end, pattern) tuples
+        """
+        return list(self.iter_matches(text))
+    
+    def matched_patterns(self, text: str) -> Set[str]:
+        """
+        Get the distinct patterns occurring in text
+        
+        Args:
+            text: Text to scan
+        
+        Returns:
+            Set of matched patterns
+        """
+        return {pattern for _, _, pattern in self.iter_matches(text)}
+    
+    def matched_payloads(self, text: str) -> Dict[Hashable, Set[str]]:
+        """
+        Group distinct matched patterns by payload
+        
+        Args:
+            text: Text to scan
+        
+        Returns:
+            Dictionary of {payload: set(patterns)}
+        """
+        grouped: Dict[Hashable, Set[str]] = {}
+        for pattern in self.matched_patterns(text):
+            for payload in self._payloads[self._pattern_ids[pattern]]:
+                grouped.setdefault(payload, set()).add(pattern)
+        return grouped
+    
+    def payloads_for(self, pattern: str) -> List[Hashable]:
+        """
+        Get payloads registered for a pattern
+        
+        Args:
+            pattern: Pattern text
+        
+        Returns:
+            List of payloads in registration order
+        """
+        pattern_id = self._pattern_ids.get(pattern)
+        if pattern_id is None:
+            return []
+        return list(self._payloads[pattern_id])
+    
+    def __len__(self) -> int:
+        return len(self._patterns)
+    
+    def __contains__(self, pattern: Any) -> bool:
+        return pattern in self._pattern_ids
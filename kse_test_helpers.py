@@ -0,0 +1,42 @@
+"""
+Shared fixtures for the root-level test scripts
+"""
+import shutil
+import time
+from pathlib import Path
+
+from kse.core.kse_logger import KSELogger
+from kse.storage.kse_storage_manager import StorageManager
+from kse.indexing.kse_indexer_pipeline import IndexerPipeline
+from kse.nlp.kse_nlp_core import NLPCore
+
+
+def page(index: int, content: str, title: str = None, domain: str = None) -> dict:
+    """Build a crawler-style page (title defaults to 'Sida <index>', domain to site<index>.se)"""
+    domain = domain or f'site{index}.se'
+    return {
+        'url': f'https://{domain}/sida{index}',
+        'domain': domain,
+        'title': title if title is not None else f'Sida {index}',
+        'description': content[:60],
+        'content': content,
+        'keywords': [],
+        'crawl_time': time.time()
+    }
+
+
+def build_indexer(name: str, pages: list, **options) -> IndexerPipeline:
+    """Create a fresh indexer in /tmp and index pages (options go to IndexerPipeline)"""
+    test_dir = Path('/tmp') / name
+    if test_dir.exists():
+        shutil.rmtree(test_dir)
+    (test_dir / 'logs').mkdir(parents=True)
+    
+    KSELogger.setup(test_dir / 'logs', "INFO", False)
+    
+    storage = StorageManager(test_dir)
+    nlp = NLPCore(enable_lemmatization=True, enable_stopword_removal=True)
+    indexer = IndexerPipeline(storage, nlp, **options)
+    indexer.inverted_index.clear()
+    indexer.index_pages(pages)
+    return indexer
@@ -5,6 +5,7 @@ import sys
 from pathlib import Path
 from kse.core.kse_config import get_config
 from kse.core.kse_logger import KSELogger, get_logger
+from kse.core.kse_memory_budget import MemoryBudget
 from kse.storage.kse_storage_manager import StorageManager
 from kse.storage.kse_domain_manager import DomainManager
 from kse.crawler.kse_crawler_core import CrawlerCore
@@ -62,7 +63,8 @@ def main():
             timeout=crawler_config.get("timeout", 10),
             max_retries=crawler_config.get("max_retries", 3),
             crawl_depth=5,  # Limit to 5 pages per domain for testing
-            respect_robots=crawler_config.get("respect_robots_txt", True)
+            respect_robots=crawler_config.get("respect_robots_txt", True),
+            memory_budget=MemoryBudget.from_config(config)
         )
         
         # Crawl domains
@@ -87,8 +89,10 @@ def main():
         print(f"  Total URLs visited: {stats['total_urls_visited']}")
         print("=" * 60 + "\n")
         
-        # Get crawled pages
+        # Get crawled pages (all of them are in storage if memory pressure released some)
         pages = crawler.get_crawled_pages()
+        if stats['pages_released']:
+            pages = crawler.load_all_crawled_pages()
         print(f"Sample crawled pages (first 5):")
         for i, page in enumerate(pages[:5]):
             print(f"\n{i+1}. {page['url']}")
@@ -0,0 +1,705 @@
+"""
+Test Cache Layers - Validate result cache accounting, admission and eviction
+"""
+import gzip
+import json
+import random
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Ensure kse module can be imported
+sys.path.insert(0, str(Path(__file__).parent))
+
+from kse.cache.kse_memory_cache import MemoryCache, estimate_size
+from kse.cache.kse_frequency_sketch import FrequencySketch
+from kse.cache.kse_sharded_cache import ShardedCache
+from kse.cache.kse_cache_manager import CacheManager
+from kse.cache.kse_disk_cache import DiskCache
+from kse.cache.kse_single_flight import SingleFlight
+from kse.cache.kse_postings_cache import PostingsCache, postings_size
+from kse.core.kse_config import get_config
+from kse.core.kse_memory_budget import MemoryBudget
+from kse.search.kse_search_pipeline import SearchPipeline
+from kse.search.kse_query_log import QueryLog
+from kse.server.kse_http_cache import choose_encoding, compress, decode_json, encode_json, etag_matches
+from kse_test_helpers import build_indexer, page
+
+
+def _response(query: str, results: int = 10) -> dict:
+    """Build a search-response-shaped value"""
+    return {
+        'query': query,
+        'results': [{
+            'url': f'https://example.se/{query}/{i}',
+            'title': f'{query} {i}',
+            'snippet': 'Lorem ipsum ' * 10,
+            'highlights': [[0, 5]]
+        } for i in range(results)],
+        'pagination': {'offset': 0, 'page_size': results}
+    }
+
+
+def _hit_rate(cache: MemoryCache, steps: int = 20000) -> float:
+    """Replay a popular-plus-one-off query stream and return the hit rate"""
+    rng = random.Random(3)
+    popular = [f'popular{i}' for i in range(80)]
+    hits = 0
+    for step in range(steps):
+        key = rng.choice(popular) if rng.random() < 0.5 else f'once{step}'
+        if cache.get(key) is None:
+            cache.set(key, key)
+        else:
+            hits += 1
+    return hits / steps
+
+
+def _contention_benchmark(cache, threads: int = 16, operations: int = 3000) -> float:
+    """Run get-or-set traffic from many threads and return operations per second"""
+    errors = []
+    
+    def worker(offset: int) -> None:
+        try:
+            for i in range(operations):
+                key = f'query{(i * 7 + offset) % 400}'
+                if cache.get(key) is None:
+                    cache.set(key, _response(key, results=2))
+        except Exception as e:
+            errors.append(e)
+    
+    workers = [threading.Thread(target=worker, args=(offset,)) for offset in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    assert not errors, errors
+    return threads * operations / elapsed
+
+
+def test_size_accounting() -> None:
+    """Test entries are measured deeply once and the byte total is kept running"""
+    print(f"\n{'='*70}")
+    print("TEST: Cache Size Accounting")
+    print(f"{'='*70}")
+    
+    response = _response('kalmar')
+    assert estimate_size(response) > 10 * sys.getsizeof(response), "Nested results are counted"
+    shared = 'x' * 1000
+    assert estimate_size([shared, shared]) < estimate_size([shared, 'y' * 1000]), "Shared objects count once"
+    
+    cache = MemoryCache('sizes', max_size_mb=1, max_items=100000)
+    for i in range(50):
+        cache.set(f'q{i}', _response(f'q{i}'))
+    cache.set('q0', _response('q0', results=2))  # Replacing an entry replaces its size
+    expected = sum(cache._metadata[key]['size'] for key in cache._metadata)
+    assert cache.get_stats()['size_bytes'] == expected
+    print(f"50 responses: {cache.get_stats()['size_mb']}MB")
+    
+    start = time.perf_counter()
+    for i in range(20000):
+        cache.set(f'filler{i}', 'x' * 200)
+    elapsed = time.perf_counter() - start
+    stats = cache.get_stats()
+    assert stats['size_bytes'] <= cache.max_bytes and stats['evictions'] > 0
+    print(f"20000 sets against a full cache: {elapsed * 1000:.0f}ms, {stats['evictions']} evictions")
+    assert elapsed < 2.0, "Eviction must not rescan the cache"
+    
+    cache.set('huge', 'x' * (2 * 1024 * 1024))
+    assert cache.get('huge') is None and cache.get_stats()['rejections'] == 1
+    cache.cleanup_expired()
+    cache.clear()
+    assert cache.get_stats()['size_bytes'] == 0
+    print("✓ Running byte total matches deep entry sizes")
+    
+    print("✓ Size accounting test PASSED")
+
+
+def test_tinylfu_admission() -> None:
+    """Test W-TinyLFU admission keeps popular entries away from one-off queries"""
+    print(f"\n{'='*70}")
+    print("TEST: W-TinyLFU Admission")
+    print(f"{'='*70}")
+    
+    sketch = FrequencySketch(100)
+    for _ in range(5):
+        sketch.increment('popular')
+    sketch.increment('rare')
+    assert sketch.frequency('popular') >= 5 > sketch.frequency('rare') >= 1
+    assert sketch.frequency('never') <= 1
+    for i in range(sketch.sample_size):
+        sketch.increment(f'noise{i}')
+    assert sketch.get_stats()['resets'] >= 1 and sketch.frequency('popular') < 5, "Counts age"
+    
+    lru_rate = _hit_rate(MemoryCache('lru', max_items=100))
+    tinylfu = MemoryCache('tinylfu', max_items=100, admission='tinylfu')
+    tinylfu_rate = _hit_rate(tinylfu)
+    print(f"Hit rate: LRU {lru_rate:.1%}, W-TinyLFU {tinylfu_rate:.1%}")
+    assert tinylfu_rate > lru_rate + 0.05, "One-off queries must not flush popular ones"
+    
+    stats = tinylfu.get_stats()
+    assert stats['items'] <= 100 and stats['rejections'] > 0
+    assert stats['window_items'] <= tinylfu.window_items
+    assert tinylfu.get('popular0') is not None, "Popular entry survived"
+    
+    tinylfu.set('popular0', 'updated')
+    assert tinylfu.get('popular0') == 'updated'
+    try:
+        MemoryCache('bad', admission='fifo')
+        assert False, "Unknown admission policy accepted"
+    except ValueError:
+        pass
+    print("✓ Frequency-based admission beats plain LRU")
+    
+    print("✓ W-TinyLFU admission test PASSED")
+
+
+def test_sharded_cache() -> None:
+    """Test lock-striped shards route keys, split limits and aggregate stats"""
+    print(f"\n{'='*70}")
+    print("TEST: Sharded Cache")
+    print(f"{'='*70}")
+    
+    cache = ShardedCache('sharded', max_size_mb=8, max_items=800, shards=8)
+    assert cache.shard_count == 8
+    for i in range(2000):
+        cache.set(f'q{i}', i)
+    assert all(cache.get(f'q{i}') == i for i in range(1990, 2000)), "Keys always map to the same shard"
+    
+    stats = cache.get_stats()
+    assert stats['items'] == sum(stats['shard_items']) <= 800
+    assert max(stats['shard_items']) <= 100, "Each shard enforces its share of the limit"
+    assert stats['hits'] == 10 and stats['evictions'] == 2000 - stats['items']
+    print(f"Items per shard: {stats['shard_items']}")
+    
+    manager = CacheManager(max_size_mb=16, shards=4, admission='tinylfu')
+    assert isinstance(manager.search_cache, ShardedCache)
+    manager.set('search', 'kalmar_10', {'results': []})
+    assert manager.get('search', 'kalmar_10') == {'results': []}
+    assert manager.get_statistics()['search_cache']['shards'] == 4
+    assert isinstance(CacheManager(max_size_mb=16).search_cache, MemoryCache)
+    print("✓ CacheManager builds sharded caches when configured")
+    
+    for cache in (MemoryCache('single', max_items=1000), ShardedCache('striped', max_items=1000, shards=16)):
+        throughput = _contention_benchmark(cache)
+        stats = cache.get_stats()
+        assert stats['items'] == 400 and stats['hits'] + stats['misses'] == 16 * 3000
+        print(f"{type(cache).__name__}: {throughput:,.0f} ops/s from 16 threads, {stats['lock_waits']} lock waits")
+    print("✓ Concurrent get/set stays consistent")
+    
+    print("✓ Sharded cache test PASSED")
+
+
+def test_disk_cache_tier() -> None:
+    """Test the persistent L2 cache survives restarts and is checked on L1 misses"""
+    print(f"\n{'='*70}")
+    print("TEST: Persistent L2 Disk Cache")
+    print(f"{'='*70}")
+    
+    cache_dir = Path('/tmp') / 'kse_disk_cache_test'
+    if cache_dir.exists():
+        shutil.rmtree(cache_dir)
+    
+    manager = CacheManager(max_size_mb=16, disk_cache_dir=cache_dir)
+    manager.set('search', 'kalmar_10', _response('kalmar'))
+    assert manager.get('search', 'kalmar_10') == _response('kalmar')
+    manager.disk_cache.close()
+    
+    # Restart: L1 is cold, L2 answers and promotes the entry
+    restarted = CacheManager(max_size_mb=16, disk_cache_dir=cache_dir)
+    assert restarted.get('search', 'kalmar_10') == _response('kalmar'), "Entry survived the restart"
+    assert restarted.get('search', 'kalmar_10') is not None
+    assert restarted.get('search', 'okänd_10') is None
+    tiers = restarted.get_statistics()['tiers']
+    assert (tiers['l1_hits'], tiers['l2_hits'], tiers['misses']) == (1, 1, 1), tiers
+    assert tiers['l2_hit_rate_percent'] == 50.0 and tiers['hit_rate_percent'] == 66.67
+    print(f"Tiers after restart: {tiers}")
+    
+    restarted.clear('search')
+    assert restarted.disk_cache.get('search', 'kalmar_10') is None, "Clearing a cache clears its L2 entries"
+    restarted.disk_cache.close()
+    print("✓ L1 misses served from disk after a restart")
+    
+    disk = DiskCache(cache_dir / 'small', max_size_mb=0.05)
+    disk.set('search', 'expired', 'x', ttl=-1)
+    assert disk.get('search', 'expired') is None, "Expired entries are not returned"
+    for i in range(100):
+        disk.set('search', f'q{i}', 'x' * 1000)
+    stats = disk.get_stats()
+    assert stats['evictions'] > 0 and disk.get_size_mb() <= 0.05
+    assert disk.get('search', 'q99') is not None and disk.get('search', 'q0') is None, "Oldest entries evicted"
+    disk.cleanup_expired()
+    print(f"Capped disk cache: {stats['items']} items, {stats['evictions']} evictions")
+    disk.close()
+    
+    print("✓ Disk cache tier test PASSED")
+
+
+def test_generation_invalidation() -> None:
+    """Test cached results go stale lazily after a reindex and hot ones are refreshed"""
+    print(f"\n{'='*70}")
+    print("TEST: Index-Generation Cache Invalidation")
+    print(f"{'='*70}")
+    
+    manager = CacheManager(max_size_mb=16)
+    manager.set('search', 'kalmar', 'old', generation=1)
+    assert manager.get('search', 'kalmar', generation=1) == 'old'
+    assert manager.get('search', 'kalmar') == 'old', "Untagged lookups ignore generations"
+    assert manager.get('search', 'kalmar', generation=2) is None
+    assert manager.get_statistics()['tiers']['stale_misses'] == 1
+    
+    indexer = build_indexer('kse_generation_test', [
+        page(i, f"Kalmar slott och {topic} i länet, nyheter om {topic} varje dag.")
+        for i, topic in enumerate(['trafik', 'kultur', 'skola', 'väder'])
+    ], detect_duplicates=False)
+    search = SearchPipeline(indexer, refresh_hot_queries=2)
+    version = indexer.index_version
+    assert version >= 1
+    
+    for _ in range(3):
+        search.search('kalmar')
+    search.search('trafik')
+    search.search('kultur')
+    assert search.search('kultur')['from_cache']
+    
+    indexer.index_pages([page(9, "Kalmar domkyrka har fått nya fönster, kalmar kalmar domkyrka.")])
+    assert indexer.index_version == version + 1
+    
+    # First search after the reindex sees the new version and refreshes the two hottest requests
+    search.search('väder')
+    search._refresh_thread.join(timeout=30)
+    assert search.hot_refreshes == 2
+    
+    assert not search.search('trafik')['from_cache'], "Entries of older generations are misses"
+    refreshed = search.search('kalmar')
+    assert refreshed['from_cache'], "Hot request was recomputed in the background"
+    assert any('sida9' in result['url'] for result in refreshed['results']), "Refreshed against the new index"
+    assert search.search('kultur')['from_cache']
+    stats = search.get_search_statistics()
+    assert stats['index_version'] == version + 1
+    assert stats['cache']['tiers']['stale_misses'] >= 1
+    assert stats['total_searches'] == 5, "Background refreshes are not logged as searches"
+    print(f"Stale misses: {stats['cache']['tiers']['stale_misses']}, hot refreshes: {stats['hot_refreshes']}")
+    print("✓ Reindexing invalidates lazily without a global flush")
+    
+    print("✓ Generation invalidation test PASSED")
+
+
+def _concurrent_searches(search: SearchPipeline, queries: list) -> list:
+    """Start one thread per query at once and collect the responses"""
+    responses = [None] * len(queries)
+    
+    def worker(i: int) -> None:
+        responses[i] = search.search(queries[i])
+    
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(len(queries))]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return responses
+
+
+def test_request_coalescing() -> None:
+    """Test concurrent identical searches share one execution"""
+    print(f"\n{'='*70}")
+    print("TEST: Single-Flight Request Coalescing")
+    print(f"{'='*70}")
+    
+    indexer = build_indexer('kse_coalescing_test', [
+        page(i, f"Kalmar slott och {topic} i länet, nyheter om {topic} varje dag.")
+        for i, topic in enumerate(['trafik', 'kultur', 'skola', 'väder'])
+    ], detect_duplicates=False)
+    
+    def slowed(search: SearchPipeline, seconds: float) -> SearchPipeline:
+        execute = search._search
+        search._search = lambda *args: (time.sleep(seconds), execute(*args))[1]
+        return search
+    
+    search = slowed(SearchPipeline(indexer, enable_cache=False), 0.3)
+    start = time.perf_counter()
+    responses = _concurrent_searches(search, ['kalmar'] * 8 + ['kultur'] * 2)
+    elapsed = time.perf_counter() - start
+    
+    coalescing = search.get_search_statistics()['coalescing']
+    assert coalescing['executions'] == 2 and coalescing['coalesced'] == 8, coalescing
+    assert coalescing['in_flight'] == 0
+    assert sum(1 for response in responses if response.get('coalesced')) == 8
+    assert all(response['results'] == responses[0]['results'] for response in responses[:8])
+    followers = [response for response in responses[:8] if response.get('coalesced')]
+    followers[0]['results'][0]['title'] = 'Ändrad'
+    assert all(response['results'][0]['title'] != 'Ändrad' for response in responses[:8] if response is not followers[0]), \
+        "Waiters do not share result dicts"
+    assert elapsed < 1.0, "Waiting requests do not search again"
+    print(f"10 concurrent requests, 2 distinct: {coalescing['executions']} executions in {elapsed * 1000:.0f}ms")
+    
+    impatient = slowed(SearchPipeline(indexer, enable_cache=False, coalesce_wait_timeout=0.05), 0.3)
+    _concurrent_searches(impatient, ['kalmar'] * 4)
+    coalescing = impatient.get_search_statistics()['coalescing']
+    assert coalescing['wait_timeouts'] == 3 and coalescing['executions'] == 4
+    print("✓ Waiters execute themselves after the wait timeout")
+    
+    group = SingleFlight()
+    attempts = []
+    
+    def failing() -> str:
+        attempts.append(1)
+        time.sleep(0.1)
+        raise RuntimeError("index unavailable")
+    
+    def caller() -> None:
+        try:
+            group.do('kalmar', failing)
+        except RuntimeError:
+            pass
+    
+    workers = [threading.Thread(target=caller) for _ in range(3)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    assert len(attempts) == 3 and group.coalesced == 0, "A failed execution is not shared"
+    assert SearchPipeline(indexer, coalesce_requests=False).single_flight is None
+    print("✓ Failures are retried by each waiter")
+    
+    print("✓ Request coalescing test PASSED")
+
+
+def test_canonical_cache_keys() -> None:
+    """Test searches are cached by analyzed query, measured on a recorded query log"""
+    print(f"\n{'='*70}")
+    print("TEST: Canonical Query Cache Keys")
+    print(f"{'='*70}")
+    
+    indexer = build_indexer('kse_canonical_key_test', [
+        page(i, f"Nyheter från {city}: {topic} i {city} och trafik i länet varje dag.")
+        for i, (city, topic) in enumerate([
+            ('Stockholm', 'kultur'), ('Göteborg', 'sport'), ('Malmö', 'skola'),
+            ('Uppsala', 'väder'), ('Stockholm', 'politik'), ('Kalmar', 'slott')
+        ])
+    ], detect_duplicates=False)
+    search = SearchPipeline(indexer)
+    
+    # Recorded traffic: the same searches typed with different case, spacing and word order
+    query_log = [
+        'nyheter stockholm', 'Nyheter Stockholm', 'nyheter  stockholm', 'stockholm nyheter',
+        'trafik göteborg', 'Trafik Göteborg', 'göteborg trafik', 'trafik göteborg',
+        'kalmar slott', 'Kalmar slott', 'slott kalmar', 'kultur', 'Kultur', ' kultur ',
+        'väder uppsala', 'uppsala väder', 'skola malmö', 'Malmö skola', 'politik', 'POLITIK'
+    ] * 3
+    
+    raw_seen = set()
+    raw_hits = 0
+    responses = {}
+    for query in query_log:
+        raw_hits += query in raw_seen
+        raw_seen.add(query)
+        responses[query] = search.search(query)
+    
+    search_cache = search.cache_manager.get_statistics()['search_cache']
+    raw_rate = raw_hits / len(query_log)
+    canonical_rate = search_cache['hits'] / len(query_log)
+    print(f"Hit rate over {len(query_log)} logged searches: raw keys {raw_rate:.1%}, canonical keys {canonical_rate:.1%}")
+    assert search_cache['hits'] + search_cache['misses'] == len(query_log)
+    assert search_cache['misses'] == 7, "One miss per distinct analyzed query"
+    assert canonical_rate > raw_rate
+    print("✓ Case, spacing and word order variants share one cache entry")
+    
+    variant = responses['stockholm nyheter']
+    assert variant['from_cache'] and variant['query'] == 'stockholm nyheter', "Answers carry the request's own text"
+    assert [r['url'] for r in variant['results']] == [r['url'] for r in responses['nyheter stockholm']['results']]
+    
+    query_cache = search.cache_manager.get_statistics()['query_cache']
+    assert query_cache['items'] == len(set(' '.join(query.split()) for query in query_log))
+    assert query_cache['hits'] > 0
+    print(f"Query analysis cache: {query_cache['items']} analyses, {query_cache['hits']} reused")
+    
+    # Structured queries keep their meaning in the key
+    assert not search.search('kalmar OR slott')['from_cache']
+    assert not search.search('stockholm -politik')['from_cache']
+    
+    # New ranking weights bypass results ranked with the old ones
+    weights = search.ranking_core.get_weights()
+    search.ranking_core.update_weights(type(weights)(tf_idf=0.5, pagerank=0.05))
+    assert not search.search('nyheter stockholm')['from_cache']
+    print("✓ Boolean operators and ranking changes produce new keys")
+    
+    print("✓ Canonical cache key test PASSED")
+
+
+def test_postings_cache() -> None:
+    """Test decoded posting lists are cached by cost and popularity"""
+    print(f"\n{'='*70}")
+    print("TEST: Decoded Postings Cache")
+    print(f"{'='*70}")
+    
+    postings = list(range(0, 20000, 200))
+    cache = PostingsCache(max_size_mb=2.5 * postings_size(postings) / (1024 * 1024), min_document_frequency=10)
+    assert not cache.put((None, 'sällsynt'), [1, 2, 3], 0.001)
+    assert cache.get_stats()['bypassed'] == 1, "Short lists are cheaper to rebuild than to keep"
+    
+    for term in ('kalmar', 'nyheter'):
+        for _ in range(5):
+            cache.get((None, term))
+        assert cache.put((None, term), postings, 0.002)
+    
+    cache.get((None, 'engång'))
+    assert not cache.put((None, 'engång'), postings, 0.002), "A one-off term does not displace hot ones"
+    for _ in range(10):
+        cache.get((None, 'trafik'))
+    assert cache.put((None, 'trafik'), postings, 0.002), "A hotter term displaces the LRU one"
+    stats = cache.get_stats()
+    assert stats['items'] == 2 and stats['evictions'] == 1 and stats['rejections'] == 1
+    assert stats['size_bytes'] == 2 * postings_size(postings)
+    
+    assert cache.get((None, 'trafik')) is postings
+    assert cache.get_stats()['decode_time_saved_ms'] == 2.0
+    cache.invalidate()
+    assert cache.get_stats()['items'] == 0 and cache.get_stats()['hits'] == 1, "Invalidation keeps statistics"
+    print("✓ Admission weighs query frequency against decode cost")
+    
+    indexer = build_indexer('kse_postings_cache_test', [
+        page(i, f"Kalmar slott och {topic} i länet, nyheter om {topic} varje dag.")
+        for i, topic in enumerate(['trafik', 'kultur', 'skola', 'väder'] * 5)
+    ], detect_duplicates=False)
+    search = SearchPipeline(indexer, enable_cache=True, cache_options={'postings_min_document_frequency': 1})
+    assert indexer.inverted_index.postings_cache is search.cache_manager.postings_cache
+    
+    for query in ['kalmar AND nyheter', 'kultur OR skola', 'kalmar -väder']:
+        assert search.search(query)['total_results'] > 0
+        search.clear_cache()  # Force re-execution so the index is asked again
+        search.search(query)
+    
+    stats = search.get_search_statistics()['cache']['postings_cache']
+    print(f"Postings cache: {stats['hits']} hits, {stats['hit_rate']}% hit rate, "
+          f"{stats['decode_time_saved_ms']}ms of {stats['decode_time_ms']}ms decoding saved")
+    assert stats['hits'] > 0 and stats['items'] > 0
+    assert stats['decode_time_saved_ms'] > 0
+    
+    # Plain ranked queries look up their candidates through the same cache
+    hits = stats['hits']
+    for _ in range(2):
+        assert search.search('kultur nyheter', diversify=False)['total_results'] > 0
+        search.clear_cache()
+    assert search.get_search_statistics()['cache']['postings_cache']['hits'] > hits
+    print("✓ TF-IDF candidate retrieval reuses decoded lists")
+    
+    indexer.index_pages([page(99, "Kalmar domkyrka och nyheter.")])
+    assert search.cache_manager.postings_cache.get_stats()['items'] == 0, "Reindexing drops decoded lists"
+    search.clear_cache()
+    response = search.search('kalmar AND domkyrka')
+    assert [result['url'] for result in response['results']] == ['https://site99.se/sida99'], "Decoded from the new index"
+    print("✓ Boolean queries reuse decoded lists until the index changes")
+    
+    print("✓ Postings cache test PASSED")
+
+
+def test_cache_warmup() -> None:
+    """Test logged requests survive a restart and warm the cache in the background"""
+    print(f"\n{'='*70}")
+    print("TEST: Query Log Cache Warm-Up")
+    print(f"{'='*70}")
+    
+    indexer = build_indexer('kse_warmup_test', [
+        page(i, f"Kalmar slott och {topic} i länet, nyheter om {topic} varje dag.")
+        for i, topic in enumerate(['trafik', 'kultur', 'skola', 'väder'])
+    ], detect_duplicates=False)
+    log_path = Path('/tmp/kse_warmup_test/query_log.jsonl')
+    
+    search = SearchPipeline(indexer, query_log_path=log_path)
+    for query in ['kalmar'] * 3 + ['Kultur', ' Kultur'] + ['skola']:
+        search.search(query)
+    search.query_log.flush()
+    assert search.query_log.get_stats()['distinct_requests'] == 3
+    
+    # Restart: a new pipeline loads the log and replays the two most frequent requests
+    restarted = SearchPipeline(indexer, query_log_path=log_path, warmup_queries=2)
+    assert [request['query'] for request in restarted.query_log.top_requests(2)] == ['kalmar', 'Kultur']
+    execute = restarted._search
+    restarted._search = lambda *args: (time.sleep(0.05), execute(*args))[1]
+    assert restarted.start_warmup()
+    assert not restarted.start_warmup(), "Only one warm-up runs at a time"
+    restarted._warmup_thread.join(timeout=30)
+    
+    status = restarted.get_search_statistics()['warmup']
+    print(f"Warm-up: {status}")
+    assert status['state'] == 'done' and status['completed'] == status['total'] == 2
+    assert status['elapsed'] >= 2 * 0.05 / restarted.WARMUP_DUTY_CYCLE * 0.8, "Replays are throttled"
+    assert restarted.search('kalmar')['from_cache']
+    assert restarted.search('kultur')['from_cache']
+    assert not restarted.search('skola')['from_cache']
+    stats = restarted.get_search_statistics()
+    assert stats['total_searches'] == 1 and stats['query_log']['logged'] == 3, "Replays are not logged"
+    print("✓ Most frequent requests are cached before users ask again")
+    
+    # Repeated lines are compacted into counts on load
+    restarted.query_log.flush()
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write('{"query": "kalmar"\n')  # Torn write
+    compacted = QueryLog(log_path)
+    with open(log_path, encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == compacted.get_stats()['distinct_requests'] == 4
+    assert lines[0]['query'] == 'kalmar' and lines[0]['count'] == 4
+    assert compacted.top_requests(1)[0]['query'] == 'kalmar'
+    print("✓ Query log is compacted and tolerates torn lines")
+    
+    print("✓ Cache warm-up test PASSED")
+
+
+def test_memory_budget() -> None:
+    """Test consumers release memory in priority order when the process is over budget"""
+    print(f"\n{'='*70}")
+    print("TEST: Process Memory Budget")
+    print(f"{'='*70}")
+    
+    cache = MemoryCache(name="shrink", max_size_mb=16)
+    for i in range(20):
+        cache.set(f'query{i}', _response(f'query{i}'))
+    entry_size = cache.get_stats()['size_bytes'] // 20
+    cache.get('query0')
+    freed = cache.shrink(3 * entry_size)
+    assert freed >= 3 * entry_size and cache.get_stats()['items'] == 16
+    assert cache.get('query0') is not None and cache.get('query1') is None, "Least recently used go first"
+    print("✓ Caches shrink from the LRU end")
+    
+    configured = MemoryBudget.from_config(get_config())
+    assert configured.limit_mb > 0, "No memory.limit_mb: a share of physical memory"
+    assert configured.high_watermark == get_config().get("memory.high_watermark")
+    
+    relaxed = MemoryBudget(limit_mb=1024 * 1024)
+    assert relaxed.check() == 'ok' and relaxed.pressure_events == 0
+    print(f"Process RSS {relaxed.get_stats()['rss_mb']}MB (read via {relaxed.rss_source})")
+    
+    # A limit below the current RSS keeps the process under critical pressure
+    budget = MemoryBudget(limit_mb=relaxed.rss_bytes / (1024 * 1024) / 2, check_interval=0)
+    released = []
+    
+    def consumer(name: str, holds: int):
+        state = {'held': holds}
+        
+        def release(nbytes: int) -> int:
+            released.append(name)
+            freed, state['held'] = state['held'], 0
+            return freed
+        
+        budget.register(name, lambda: state['held'], release, priority=len(released) + ord(name[0]))
+        return state
+    
+    crawler = consumer('b-crawler', 4 * 1024 * 1024)
+    consumer('a-buffers', 1024 * 1024)
+    manager = CacheManager(max_size_mb=16, memory_budget=budget)
+    for i in range(20):
+        manager.set('search', f'query{i}', _response(f'query{i}'))
+    assert budget.get_stats()['consumers']['caches']['usage_mb'] > 0
+    
+    assert budget.check() == 'critical'
+    stats = budget.get_stats()
+    assert released == ['a-buffers', 'b-crawler'], "Consumers are asked in priority order"
+    assert manager.get_memory_usage() == 0 and crawler['held'] == 0
+    assert stats['consumers']['caches']['releases'] == 1 and stats['pressure_events'] == 1
+    assert stats['released_mb'] >= 5
+    print(f"Released {stats['released_mb']}MB: {stats['consumers']}")
+    print("✓ Caches shrink and buffers flush under pressure")
+    
+    waited = budget.throttle(max_wait=0.3)
+    assert 0.25 <= waited < 1.0 and budget.get_stats()['throttled_seconds'] >= 0.25
+    print("✓ Producers are held back while the process is past its limit")
+    
+    indexer = build_indexer('kse_memory_budget_test', [
+        page(i, f"Kalmar slott och {topic} i länet.") for i, topic in enumerate(['trafik', 'kultur'])
+    ], detect_duplicates=False, memory_budget=relaxed)
+    indexer.document_store.get_document('https://site0.se/sida0')
+    assert indexer.get_memory_usage() > 0
+    assert indexer.release_memory(1) > 0 and indexer.get_memory_usage() == 0
+    assert 'indexer' in relaxed.get_stats()['consumers']
+    assert indexer.document_store.get('https://site1.se/sida1'), "Released content is read back from disk"
+    print("✓ Indexer registers its document buffers")
+    
+    print("✓ Memory budget test PASSED")
+
+
+def test_http_validators() -> None:
+    """Test ETags, conditional requests and response compression for /api/search"""
+    print(f"\n{'='*70}")
+    print("TEST: HTTP Validators and Compression")
+    print(f"{'='*70}")
+    
+    indexer = build_indexer('kse_http_cache_test', [
+        page(i, f"Nyheter från {city}: trafik och kultur i {city} varje dag.")
+        for i, city in enumerate(['Stockholm', 'Göteborg', 'Malmö', 'Kalmar'])
+    ], detect_duplicates=False)
+    search = SearchPipeline(indexer)
+    
+    etag = search.get_etag('nyheter stockholm')
+    assert etag.startswith('W/"') and etag == search.get_etag('Stockholm  nyheter'), "Equivalent queries share a tag"
+    assert etag != search.get_etag('nyheter stockholm', offset=10)
+    assert etag != search.get_etag('nyheter stockholm', filters={'domain': ['site1.se']})
+    assert search.get_search_statistics()['total_searches'] == 0, "Tagging does not execute the search"
+    
+    assert etag_matches(etag, etag) and etag_matches(f'W/"x", {etag}', etag) and etag_matches('*', etag)
+    assert etag_matches(etag[2:], etag), "Weak comparison ignores the W/ prefix"
+    assert not etag_matches(None, etag) and not etag_matches('W/"x"', etag)
+    
+    indexer.index_pages([page(9, "Nyheter om Stockholm: nya spår för trafik i Stockholm.")])
+    assert not etag_matches(etag, search.get_etag('nyheter stockholm')), "A reindex changes the tag"
+    print("✓ ETags follow the index version and the analyzed request")
+    
+    response = search.search('nyheter stockholm', max_results=20)
+    body = encode_json(response)
+    assert decode_json(body)['results'] == json.loads(json.dumps(response, default=str))['results']
+    assert 'Göteborg'.encode('utf-8') in encode_json({'city': 'Göteborg'}), "UTF-8, not ASCII escapes"
+    assert decode_json(encode_json({'terms': {'kalmar'}, 1: 'ett'})) == {'terms': ['kalmar'], '1': 'ett'}
+    
+    assert choose_encoding(None) is None and choose_encoding('identity') is None
+    assert choose_encoding('gzip, deflate') == 'gzip'
+    assert choose_encoding('gzip;q=0, deflate') is None
+    assert choose_encoding('*') in ('br', 'gzip')
+    encoding = choose_encoding('gzip, deflate, br')
+    compressed = compress(body, encoding)
+    if encoding == 'gzip':
+        assert gzip.decompress(compressed) == body
+    print(f"Search response: {len(body)} bytes JSON, {len(compressed)} bytes {encoding}")
+    assert len(compressed) < len(body) / 2
+    print("✓ Responses are encoded compactly and compressed on request")
+    
+    print("✓ HTTP validators test PASSED")
+
+
+def main():
+    """Run all cache layer tests"""
+    try:
+        print("="*70)
+        print("CACHE LAYERS TEST SUITE")
+        print("="*70)
+        
+        test_size_accounting()
+        test_tinylfu_admission()
+        test_sharded_cache()
+        test_disk_cache_tier()
+        test_generation_invalidation()
+        test_request_coalescing()
+        test_canonical_cache_keys()
+        test_postings_cache()
+        test_cache_warmup()
+        test_memory_budget()
+        test_http_validators()
+        
+        print(f"\n{'='*70}")
+        print("✓ ALL CACHE LAYER TESTS PASSED!")
+        print(f"{'='*70}")
+        
+        return 0
+    
+    except Exception as e:
+        print(f"\n✗ TEST FAILED: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
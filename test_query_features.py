@@ -0,0 +1,543 @@
+"""
+Test Query Features - Validate query-side matching, expansion and lookup structures
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Ensure kse module can be imported
+sys.path.insert(0, str(Path(__file__).parent))
+
+from kse.indexing.kse_indexer_pipeline import IndexerPipeline
+from kse.search.kse_search_pipeline import SearchPipeline
+from kse.nlp.kse_nlp_core import NLPCore
+from kse.utils.kse_pattern_matcher import PatternMatcher
+from kse_test_helpers import build_indexer, page
+
+
+def test_pattern_matcher() -> None:
+    """Test Aho-Corasick matcher finds overlapping matches in one pass"""
+    print(f"\n{'='*70}")
+    print("TEST: Aho-Corasick Pattern Matcher")
+    print(f"{'='*70}")
+    
+    matcher = PatternMatcher([
+        ('he', 'a'), ('she', 'a'), ('his', 'b'), ('hers', 'b'), ('he', 'c')
+    ])
+    matches = matcher.find_all('ushers')
+    print(f"Matches in 'ushers': {matches}")
+    assert (1, 4, 'she') in matches, "Should find 'she'"
+    assert (2, 4, 'he') in matches, "Should find 'he' via failure link"
+    assert (2, 6, 'hers') in matches, "Should find 'hers'"
+    
+    grouped = matcher.matched_payloads('ushers')
+    assert grouped['a'] == {'she', 'he'}
+    assert grouped['b'] == {'hers'}
+    assert grouped['c'] == {'he'}, "Shared pattern should report every payload"
+    print("✓ Overlapping matches and payloads reported")
+    
+    words = PatternMatcher([('vård', 'x')], whole_words=True)
+    assert not words.find_all('sjukvård'), "Whole-word matcher should skip infix match"
+    assert words.find_all('god vård här'), "Whole-word matcher should find separate word"
+    print("✓ Whole-word matching respects boundaries")
+    
+    print("✓ Pattern matcher test PASSED")
+
+
+def test_scorers_use_single_pass() -> None:
+    """Test regional, semantic and intent scorers on the shared matcher"""
+    print(f"\n{'='*70}")
+    print("TEST: Scorers Ported to Pattern Matcher")
+    print(f"{'='*70}")
+    
+    from kse.ranking.kse_regional_relevance import RegionalRelevance
+    from kse.ranking.kse_semantic_similarity import SemanticSimilarity
+    from kse.nlp.kse_query_processor import QueryProcessor
+    
+    regional = RegionalRelevance()
+    document = {
+        'url': 'https://www.svt.se/nyheter',
+        'domain': 'svt.se',
+        'title': 'Nyheter från Sverige',
+        'content': 'Senaste nytt från stockholm, göteborg och malmö. Sverige och svenska kommun. ' * 50
+    }
+    
+    start = time.perf_counter()
+    for _ in range(200):
+        score = regional.calculate_regional_score(document)
+    elapsed = (time.perf_counter() - start) / 200
+    print(f"Regional score: {score:.3f} ({elapsed*1000:.3f}ms per document)")
+    assert score > 0.7, "Trusted Swedish news page should score high"
+    
+    semantic = SemanticSimilarity()
+    score = semantic.calculate_semantic_score(
+        'var kan jag äta mat i stockholm',
+        {'title': 'Restaurang guide', 'content': 'Bästa mat och lunch på restaurang i stockholm.'},
+        'location'
+    )
+    print(f"Semantic score: {score:.3f}")
+    assert score > 0, "Food query should match restaurant document"
+    
+    processor = QueryProcessor()
+    assert processor._detect_intent('köpa billig cykel') == 'shopping'
+    assert processor._detect_intent('vad är klockan') == 'definition'
+    assert processor._detect_intent('stockholm') == 'informational'
+    expanded = processor._expand_terms(['nyhet', 'stockholm'])
+    assert 'nyheter' in expanded and 'aktuellt' in expanded, "Synonym should expand to its group"
+    print(f"✓ Intent and synonym expansion work: {sorted(set(expanded))}")
+    
+    print("✓ Scorer port test PASSED")
+
+
+def test_lazy_weighted_expansion() -> None:
+    """Test expansions are weighted and only merged when originals underfill"""
+    print(f"\n{'='*70}")
+    print("TEST: Lazy Weighted Query Expansion")
+    print(f"{'='*70}")
+    
+    pages = [page(i, 'Cykel med växlar och ramar för stadstrafik. ' * 5, title=f'Cykel {i}') for i in range(12)]
+    pages += [page(100 + i, 'Pris och kostnad jämför alla erbjudanden. ' * 5, title=f'Pris {i}') for i in range(3)]
+    pages += [page(200 + i, 'Regn och sol över Sverige i helgen. ' * 5, title=f'Väder {i}') for i in range(30)]
+    # Pages share template text on purpose, so keep them all instead of clustering
+    indexer = build_indexer('kse_expansion_test', pages, detect_duplicates=False)
+    search = SearchPipeline(indexer, enable_cache=False)
+    
+    # Originals fill the page: no expansion work
+    response = search.search('billig cykel', page_size=3, diversify=False)
+    print(f"Stage timings: {response['stage_timings']}")
+    assert not response['expansion_applied'], "Expansion should not run when originals fill top-k"
+    assert 'expansion' not in response['stage_timings']
+    assert 'retrieval' in response['stage_timings'] and 'ranking' in response['stage_timings']
+    assert all(r['title'].startswith('Cykel') for r in response['results'])
+    print("✓ Originals alone fill top-k, expansion skipped")
+    
+    # Originals underfill: expansions are merged, ranked below original matches
+    response = search.search('billig cykel', page_size=20, diversify=False)
+    print(f"Expansion terms: {response['expansion_terms']}")
+    assert response['expansion_applied'], "Expansion should run when originals underfill"
+    assert 'expansion' in response['stage_timings']
+    assert response['total_available'] == 15
+    
+    ranked = indexer.search(['billig', 'cykel'], 20, expansion_terms={'pris': 0.3})
+    titles = [r['title'] for r in ranked]
+    assert all(t.startswith('Cykel') for t in titles[:12]), "Original matches should outrank expansions"
+    assert all(t.startswith('Pris') for t in titles[12:])
+    print("✓ Expansion postings merged lazily with lower weight")
+    
+    print("✓ Lazy expansion test PASSED")
+
+
+def test_boolean_query_planner() -> None:
+    """Test boolean parsing, galloping intersection and NOT/site: pushdown"""
+    print(f"\n{'='*70}")
+    print("TEST: Boolean Query Language and Planner")
+    print(f"{'='*70}")
+    
+    import random
+    from kse.search.kse_query_parser import QueryParser, AndNode, OrNode, NotNode, PhraseNode, TermNode
+    from kse.search.kse_query_planner import intersect_postings, subtract_postings, union_postings
+    
+    parser = QueryParser()
+    tree = parser.parse('cykel AND (pris OR kostnad) -begagnad site:blocket.se title:"god mat"')
+    assert isinstance(tree, AndNode)
+    assert isinstance(tree.children[1], OrNode)
+    assert isinstance(tree.children[2], NotNode)
+    assert tree.children[3] == TermNode('blocket.se', 'site')
+    assert tree.children[4] == PhraseNode(['god', 'mat'], 'title')
+    assert not parser.is_structured('billig cykel i stockholm')
+    assert parser.parse('((a OR') is not None, "Parser should be lenient"
+    print("✓ Parser builds boolean tree")
+    
+    # One parser serves all request threads
+    queries = ['cykel AND (pris OR kostnad)', '"god mat" -dyr', 'site:svt.se nyheter OR sport',
+               'NOT (a OR b) c', 'title:kalmar slott*']
+    expected = {query: parser.parse(query) for query in queries}
+    mismatches = []
+    
+    def parse_many(offset: int) -> None:
+        for i in range(2000):
+            query = queries[(i + offset) % len(queries)]
+            if parser.parse(query) != expected[query]:
+                mismatches.append(query)
+    
+    threads = [threading.Thread(target=parse_many, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not mismatches, f"{len(mismatches)} concurrent parses differed"
+    print("✓ Concurrent parses share the parser safely")
+    
+    rng = random.Random(7)
+    for _ in range(200):
+        a = sorted(rng.sample(range(5000), rng.randint(0, 50)))
+        b = sorted(rng.sample(range(5000), rng.randint(0, 3000)))
+        assert intersect_postings(a, b) == sorted(set(a) & set(b))
+        assert subtract_postings(b, a) == sorted(set(b) - set(a))
+        assert union_postings([a, b]) == sorted(set(a) | set(b))
+    print("✓ Galloping intersection matches set semantics")
+    
+    pages = [
+        page(i, 'Begagnad cykel säljes billigt.' if i % 2 else 'Ny cykel i butik.', title='Cykel',
+             domain='www.blocket.se' if i < 4 else None)
+        for i in range(10)
+    ]
+    pages += [page(50 + i, 'Svenska riksdagen beslutar om ny lag.', title='Riksdagen beslutar lag') for i in range(3)]
+    indexer = build_indexer('kse_boolean_test', pages)
+    search = SearchPipeline(indexer, enable_cache=False)
+    
+    def urls(query):
+        response = search.search(query, page_size=50, diversify=False)
+        return {r['url'] for r in response['results'] if r['url']}
+    
+    assert urls('cykel -begagnad') == {f'https://site{i}.se/sida{i}' for i in (4, 6, 8)} | {
+        'https://www.blocket.se/sida0', 'https://www.blocket.se/sida2'}
+    assert urls('cykel site:blocket.se') == {f'https://www.blocket.se/sida{i}' for i in range(4)}
+    assert len(urls('"svenska riksdagen"')) == 3
+    assert not urls('"riksdagen svenska"'), "Phrase order should matter"
+    
+    # Phrases are checked against the page text, where stopwords still sit between words
+    phrase_pages = [
+        page(70, 'Stockholm har en stad del som heter Gamla stan.', title='Stadsdelar'),
+        page(71, 'Vi åkte till Stockholm stad och sedan vidare.', title='Resor'),
+        page(72, 'Kalmar i stad och land, stockholm nämns också.', title='Kalmar')
+    ]
+    phrases = SearchPipeline(build_indexer('kse_phrase_text_test', phrase_pages), enable_cache=False)
+    
+    def phrase_urls(query):
+        response = phrases.search(query, page_size=50, diversify=False)
+        return {r['url'] for r in response['results'] if r['url']}
+    
+    assert phrase_urls('"stockholm stad"') == {'https://site71.se/sida71'}, "A stopword between the words breaks the phrase"
+    assert phrase_urls('"stockholm har en stad"') == {'https://site70.se/sida70'}, "Stopwords inside the phrase must match"
+    assert phrase_urls('"kalmar i stad"') == {'https://site72.se/sida72'}
+    describe = phrases.query_planner.describe
+    normalize = phrases.query_planner.normalize
+    assert describe(normalize(parser.parse('"kalmar i stad"'))) != describe(normalize(parser.parse('"kalmar stad"'))), \
+        "Phrases differing only in stopwords are different queries"
+    assert len(urls('title:riksdagen OR begagnad')) == 8
+    print("✓ NOT, site:, phrase and title: queries return exact sets")
+    
+    planner = search.query_planner
+    plan = planner.explain(planner.normalize(parser.parse('cykel site:blocket.se -begagnad')))
+    print(f"Plan: {plan}")
+    assert [child['op'] for child in plan['children']] == ['term', 'term', 'not']
+    assert plan['children'][0]['term'] == 'site:blocket.se', "Smallest postings should run first"
+    
+    # Fields and doc numbering survive a reload
+    reloaded = IndexerPipeline(indexer.storage, indexer.nlp)
+    assert reloaded.inverted_index.get_postings('blocket.se', 'site') == indexer.inverted_index.get_postings('blocket.se', 'site')
+    print("✓ Planner orders clauses by cost and fields persist")
+    
+    print("✓ Boolean query test PASSED")
+
+
+def test_autocomplete() -> None:
+    """Test prefix suggestions from indexed words and past queries"""
+    print(f"\n{'='*70}")
+    print("TEST: Autocomplete Prefix Index")
+    print(f"{'='*70}")
+    
+    words = ['stockholm', 'stockholms', 'stadsbibliotek', 'stadion', 'stad', 'sverige', 'svenska']
+    pages = [
+        page(i, 'Innehåll om staden.', title=f'{words[i % len(words)]} {words[(i * 3) % len(words)]}')
+        for i in range(60)
+    ]
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    pages += [page(100 + i, 'Text.', title=f'ord{letters[i // 26 % 26]}{letters[i % 26]}') for i in range(200)]
+    indexer = build_indexer('kse_autocomplete_test', pages)
+    search = SearchPipeline(indexer, enable_cache=False)
+    
+    suggestions = search.get_suggestions('st', 5)
+    print(f"'st' -> {suggestions}")
+    assert suggestions and all(s.startswith('st') for s in suggestions)
+    assert suggestions[0] in ('stockholm', 'stad', 'staden', 'stadion', 'stadsbibliotek', 'stockholms')
+    
+    # Past queries are recorded and ranked above single words
+    for _ in range(5):
+        search.search('stockholm stad', diversify=False)
+    search.search_executor.autocomplete.build()
+    suggestions = search.get_suggestions('stockh', 3)
+    print(f"'stockh' -> {suggestions}")
+    assert suggestions[0] == 'stockholm stad'
+    
+    # Corrected spellings are recorded, and boolean syntax is not
+    misspelled = search.search('stokholms', diversify=False)
+    boolean = search.search('stockholm -stad', diversify=False)
+    assert misspelled['corrected_query'] and misspelled['total_results'] > 0
+    assert boolean['boolean_query'] and boolean['total_results'] > 0
+    search.search_executor.autocomplete.build()
+    suggestions = search.get_suggestions('sto', 8)
+    print(f"'sto' -> {suggestions}")
+    assert misspelled['corrected_query'] in suggestions and 'stokholms' not in suggestions
+    assert not any('-' in suggestion for suggestion in suggestions)
+    
+    # Last word is completed from document words
+    suggestions = search.get_suggestions('billig sverig', 3)
+    assert suggestions == ['billig sverige'], suggestions
+    
+    # Words come from the indexed vocabulary, shown in their surface form
+    assert search.get_suggestions('stadi', 3) == ['stadion'], "Lemma 'stadio' is shown as 'stadion'"
+    assert search.get_suggestions('innehål', 3) == ['innehåll'], "Content words are suggested"
+    
+    # New documents make the prefix index stale; the last snapshot is served while it rebuilds
+    autocomplete = search.search_executor.autocomplete
+    indexer.index_pages([page(999, 'Fåglar.', title='Zebrafink')])
+    assert search.get_suggestions('stockh', 3)[0] == 'stockholm stad'
+    autocomplete.wait(timeout=10)
+    assert search.get_suggestions('zebra', 3) == ['zebrafink']
+    assert autocomplete.get_statistics()['index_generation'] == indexer.inverted_index.generation
+    
+    start = time.perf_counter()
+    for prefix in ('s', 'st', 'sto', 'o', 'ord', 'orda', 'ordbc'):
+        for _ in range(200):
+            search.get_suggestions(prefix, 8)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / 1400
+    print(f"Average lookup: {elapsed_ms:.4f}ms")
+    stats = search.search_executor.autocomplete.get_statistics()
+    print(f"Stats: {stats}")
+    assert stats['precomputed_prefixes'] > 0, "Large prefix ranges should be precomputed"
+    assert elapsed_ms < 1.0, "Lookups should be sub-millisecond"
+    
+    print("✓ Autocomplete test PASSED")
+
+
+def test_spell_checker() -> None:
+    """Test symmetric-delete corrections, diacritic folding and search fallback"""
+    print(f"\n{'='*70}")
+    print("TEST: Spelling Correction (Menade du)")
+    print(f"{'='*70}")
+    
+    import random
+    from kse.indexing.kse_spell_checker import SpellChecker
+    
+    checker = SpellChecker()
+    checker.build({'göteborg': 50, 'stockholm': 80, 'skola': 30, 'skolan': 5, 'universitet': 20})
+    assert checker.correct('goteborg') == 'göteborg', "Folded spelling should match"
+    assert checker.correct('stokholm') == 'stockholm'
+    assert checker.correct('stockhlom') == 'stockholm', "Transposition counts as one edit"
+    assert checker.correct('skoal') == 'skola'
+    assert checker.correct('qwertyuiop') is None
+    print("✓ Deletions, transpositions and å/ä/ö confusions corrected")
+    
+    # Incremental refresh
+    assert checker.correct('malmo') is None
+    checker.add_terms(['malmö'])
+    assert checker.correct('malmo') == 'malmö'
+    print("✓ New terms are picked up incrementally")
+    
+    rng = random.Random(3)
+    letters = 'abcdefghijklmnoprstuvyåäö'
+    vocabulary = {''.join(rng.choice(letters) for _ in range(rng.randint(4, 12))): rng.randint(1, 100)
+                  for _ in range(20000)}
+    checker.build(vocabulary)
+    words = list(vocabulary)[:500]
+    misspelled = [word[:2] + word[3:] for word in words]
+    
+    start = time.perf_counter()
+    corrected = [checker.correct(word) for word in misspelled]
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(misspelled)
+    print(f"Average correction over {len(vocabulary)} terms: {elapsed_ms:.4f}ms")
+    assert sum(1 for c in corrected if c is not None) == len(misspelled)
+    assert elapsed_ms < 1.0, "Corrections should take well under a millisecond"
+    
+    pages = [page(i, 'Restauranger och universitet i Göteborg.', title='Göteborg') for i in range(5)]
+    indexer = build_indexer('kse_spelling_test', pages)
+    response = SearchPipeline(indexer, enable_cache=False).search('gotebörg')
+    assert response['corrected_query'] == 'göteborg'
+    assert response['results'] and response['results'][0]['url'], "Corrected query should be searched"
+    
+    response = SearchPipeline(indexer, enable_cache=False, auto_correct=False).search('gotebörg')
+    assert response['did_you_mean'] == 'göteborg' and response['total_results'] == 0
+    print("✓ Search suggests or applies corrections when nothing matches")
+    
+    print("✓ Spell checker test PASSED")
+
+
+def test_wildcard_terms() -> None:
+    """Test prefix and infix wildcards over the sorted term dictionary"""
+    print(f"\n{'='*70}")
+    print("TEST: Prefix and Wildcard Term Queries")
+    print(f"{'='*70}")
+    
+    from kse.indexing.kse_term_dictionary import TermDictionary
+    
+    dictionary = TermDictionary({
+        'sjukvård': 40, 'sjukvårdsupplysning': 5, 'sjukvårdare': 2, 'sjukhus': 30,
+        'vårdcentral': 20, 'tandvård': 10, 'skola': 50
+    })
+    assert list(dictionary.terms) == sorted(dictionary.terms)
+    assert dictionary.expand_wildcard('sjukvård*') == ['sjukvård', 'sjukvårdsupplysning', 'sjukvårdare']
+    assert dictionary.expand_wildcard('*vård') == ['sjukvård', 'tandvård']
+    assert dictionary.expand_wildcard('sjuk*hus') == ['sjukhus']
+    assert dictionary.expand_wildcard('*vård*', limit=2) == ['sjukvård', 'vårdcentral'], "Cap keeps most frequent"
+    assert dictionary.expand_wildcard('s*') == [], "Too-broad patterns are refused"
+    print("✓ Prefix, suffix and infix patterns expand by frequency with a cap")
+    
+    pages = [page(i, 'Sjukvården i regionen och vårdcentralen.', title='Sjukvård') for i in range(4)]
+    pages += [page(10 + i, 'Tandvården för barn.', title='Tandvård') for i in range(3)]
+    pages += [page(20 + i, ' '.join(f'vård{chr(97 + j)}{chr(97 + i)}' for j in range(26)), title=f'Ordlista {i}')
+              for i in range(26)]
+    indexer = build_indexer('kse_wildcard_test', pages)
+    search = SearchPipeline(indexer, enable_cache=False)
+    
+    response = search.search('sjukv*', page_size=50, diversify=False)
+    print(f"'sjukv*' -> {response['boolean_query']}")
+    assert response['total_available'] == 4
+    assert response['total_available'] == search.search('*vård* -title:ordlista', page_size=50,
+                                                         diversify=False)['total_available'] - 3
+    
+    # A broad wildcard expands to at most MAX_EXPANSIONS terms
+    start = time.perf_counter()
+    response = search.search('vård*', page_size=50, diversify=False)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    expanded = response['boolean_query'].count(' OR ') + 1
+    print(f"'vård*' expanded to {expanded} terms in {elapsed_ms:.1f}ms")
+    assert expanded <= indexer.inverted_index.get_term_dictionary().MAX_EXPANSIONS
+    assert indexer.inverted_index.get_all_terms() == sorted(indexer.inverted_index.index)
+    print("✓ Wildcard queries are bounded and dictionary tracks the index")
+    
+    print("✓ Wildcard test PASSED")
+
+
+def test_compound_splitting() -> None:
+    """Test index-time decompounding and its throughput"""
+    print(f"\n{'='*70}")
+    print("TEST: Swedish Compound Splitting")
+    print(f"{'='*70}")
+    
+    from kse.nlp.kse_compound_handler import SwedishCompoundHandler
+    
+    handler = SwedishCompoundHandler()
+    assert handler.split('sjukvårdsupplysning') == ['sjuk', 'vård', 'upplysning']
+    assert handler.split('bostadsrättsförening') == ['bostad', 'rätt', 'förening'], "Linking -s-"
+    assert handler.split('skolbiblioteket') == ['skola', 'bibliotek'], "Dropped final vowel and inflected head"
+    assert handler.split('information') == [], "Lexicon words are not split"
+    assert handler.split('hälsa') == [], "Short words are not split"
+    print("✓ Linking morphemes, stem forms and inflected heads handled")
+    
+    words = ['sjukvårdsupplysning', 'arbetsförmedlingen', 'kommunfullmäktige', 'polisstation',
+             'universitetssjukhus', 'trafikinformation', 'stockholmsregionen', 'utvecklingsarbete']
+    corpus = [f"{word}{i}" if i % 2 else word for i in range(2000) for word in words]
+    start = time.perf_counter()
+    for word in corpus:
+        handler.split(word)
+    elapsed = time.perf_counter() - start
+    print(f"Decompounding throughput: {len(corpus) / elapsed:,.0f} words/s "
+          f"({handler.get_statistics()['cached_words']} distinct words)")
+    assert len(corpus) / elapsed > 20000, "Decompounding sits on the indexing hot path"
+    
+    pages = [page(0, 'Ring sjukvårdsupplysningen dygnet runt.', title='Sjukvårdsupplysning')]
+    pages += [page(i, 'Information om bygglov och avfall.', title='Kommunen') for i in range(1, 6)]
+    indexer = build_indexer('kse_compound_test', pages)
+    response = SearchPipeline(indexer, enable_cache=False).search('vård')
+    urls = [result['url'] for result in response['results'] if result['url']]
+    assert urls == ['https://site0.se/sida0'], "Component matches with a plain postings lookup"
+    assert indexer.inverted_index.get_postings('upplysning')
+    
+    # A component ranks below the same word written out, and counts COMPOUND_WEIGHT per occurrence
+    pages = [page(0, 'Sjukvård dygnet runt.', title='Sjukvård'), page(1, 'Vård dygnet runt.', title='Vård')]
+    pages += [page(i, 'Information om bygglov och avfall.', title='Kommunen') for i in range(2, 6)]
+    indexer = build_indexer('kse_compound_weight_test', pages)
+    response = SearchPipeline(indexer, enable_cache=False).search('vård', diversify=False)
+    urls = [result['url'] for result in response['results'] if result['url']]
+    assert urls == ['https://site1.se/sida1', 'https://site0.se/sida0'], urls
+    calculator = indexer.tfidf_calculator
+    length = indexer.inverted_index.get_document_length('https://site0.se/sida0')
+    assert calculator.calculate_tf('vård', 'https://site0.se/sida0') == calculator.COMPOUND_WEIGHT / length
+    
+    nlp = NLPCore(enable_compound_splitting=False)
+    assert nlp.decompound(['sjukvårdsupplysning']) == []
+    print("✓ Components are indexed at reduced weight and can be disabled")
+    
+    print("✓ Compound splitting test PASSED")
+
+
+def test_shingle_phrases() -> None:
+    """Test bigram shingle lookups for phrases and common-word queries"""
+    print(f"\n{'='*70}")
+    print("TEST: Shingle Field for Phrase Queries")
+    print(f"{'='*70}")
+    
+    words = ['stockholm', 'klockan', 'tåget', 'vädret', 'bussen', 'skolan', 'parken', 'kaffe']
+    pages = [page(0, 'Klockan i Stockholm visar svensk tid.', title='Vad är klockan i Stockholm')]
+    pages.append(page(1, 'Vem är det som ringer? Det är vi.', title='Vem är det'))
+    pages += [page(i, ' '.join(words[(i * 3 + j) % len(words)] for j in range(40)) + '. Bor i Stockholm', title=f'Sida {i}')
+              for i in range(2, 60)]
+    
+    plain = build_indexer('kse_shingle_plain', pages)
+    shingled = build_indexer('kse_shingle_test', pages, enable_shingles=True)
+    search = SearchPipeline(shingled, enable_cache=False)
+    
+    def urls(response):
+        return [result['url'] for result in response['results'] if result['url']]
+    
+    response = search.search('"klockan i stockholm"', diversify=False)
+    print(f"Phrase -> {response['boolean_query']}")
+    assert urls(response) == ['https://site0.se/sida0'], "Stopword inside phrase must match exactly"
+    assert response['processed_terms'], "Phrase words are still used for ranking"
+    
+    response = search.search('vem är det', diversify=False)
+    assert urls(response) == ['https://site1.se/sida1'], "Common-word queries use bigram lookups"
+    assert len(urls(SearchPipeline(plain, enable_cache=False).search('vem är det'))) > 1, \
+        "Without shingles only the leftover word is matched"
+    print("✓ Phrases and common-word queries answered from bigram postings")
+    
+    positional = SearchPipeline(plain, enable_cache=False).query_planner
+    bigram = search.query_planner
+    phrase = search.query_parser.parse('"tåget vädret bussen"')
+    positional_tree = positional.normalize(phrase)
+    bigram_tree = bigram.normalize(phrase)
+    
+    def time_phrase(planner, tree):
+        start = time.perf_counter()
+        for _ in range(200):
+            planner.execute(tree)
+        return (time.perf_counter() - start) * 1000 / 200
+    
+    # Checked against the page text, phrases match the same pages either way
+    assert set(positional.search(positional_tree)) == set(bigram.search(bigram_tree)) != set()
+    stats = shingled.get_statistics()['shingle_field']
+    print(f"Phrase latency: text check {time_phrase(positional, positional_tree):.3f}ms, "
+          f"shingle {time_phrase(bigram, bigram_tree):.3f}ms")
+    print(f"Shingle field: {stats['terms']} terms, {stats['postings']} postings, "
+          f"{stats['positions_vs_main_index']}x main index positions")
+    assert stats['terms'] > 0
+    print("✓ Shingle size and latency reported")
+    
+    print("✓ Shingle test PASSED")
+
+
+def main():
+    """Run all query feature tests"""
+    try:
+        print("="*70)
+        print("QUERY FEATURES TEST SUITE")
+        print("="*70)
+        
+        test_pattern_matcher()
+        test_scorers_use_single_pass()
+        test_lazy_weighted_expansion()
+        test_boolean_query_planner()
+        test_autocomplete()
+        test_spell_checker()
+        test_wildcard_terms()
+        test_compound_splitting()
+        test_shingle_phrases()
+        
+        print(f"\n{'='*70}")
+        print("✓ ALL QUERY FEATURE TESTS PASSED!")
+        print(f"{'='*70}")
+        
+        return 0
+    
+    except Exception as e:
+        print(f"\n✗ TEST FAILED: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
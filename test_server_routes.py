@@ -0,0 +1,118 @@
+"""
+Test Server Routes - Call API endpoints through the Flask test client
+"""
+import sys
+from pathlib import Path
+
+# Ensure kse module can be imported
+sys.path.insert(0, str(Path(__file__).parent))
+
+from kse.core.kse_memory_budget import MemoryBudget
+from kse.search.kse_search_pipeline import SearchPipeline
+from kse_test_helpers import build_indexer, page
+
+
+def _test_client(monitoring_enabled: bool = True):
+    """Wire the server's routes to a small index, as create_app does, and return a test client"""
+    from flask import Flask
+    from kse.server import kse_server
+    
+    budget = MemoryBudget(limit_mb=1024 * 1024)
+    indexer = build_indexer('kse_server_routes_test', [
+        page(i, f"Nyheter från {city}: trafik och kultur i {city} varje dag. " * 20)
+        for i, city in enumerate(['Stockholm', 'Göteborg', 'Malmö', 'Kalmar'])
+    ], detect_duplicates=False, memory_budget=budget)
+    
+    kse_server.app = Flask(__name__)
+    kse_server.app.json = kse_server.KSEJSONProvider(kse_server.app)
+    kse_server.search_pipeline = SearchPipeline(indexer, cache_options={'memory_budget': budget})
+    kse_server.memory_budget = budget
+    kse_server.monitoring = None
+    if monitoring_enabled:
+        from kse.monitoring.kse_monitoring_core import MonitoringCore
+        kse_server.monitoring = MonitoringCore(memory_budget=budget)
+    kse_server.http_options = {'max_age': 60, 'compress': True, 'min_size': 1024}
+    kse_server.register_routes()
+    return kse_server.app.test_client()
+
+
+def test_monitoring_routes() -> None:
+    """Test the memory budget is reachable from the monitoring endpoints"""
+    print(f"\n{'='*70}")
+    print("TEST: Monitoring Routes")
+    print(f"{'='*70}")
+    
+    try:
+        client = _test_client()
+    except ImportError as e:
+        print(f"⚠ Server dependencies not installed ({e}), route test skipped")
+        return
+    
+    response = client.get('/api/monitoring/memory')
+    assert response.status_code == 200, response.status_code
+    memory = response.get_json()
+    print(f"Memory: {memory['rss_mb']}MB of {memory['limit_mb']}MB, consumers {sorted(memory['consumers'])}")
+    assert memory['pressure'] == 'ok'
+    assert {'caches', 'indexer'} <= set(memory['consumers']), "Per-consumer usage is reported"
+    
+    response = client.get('/api/monitoring/status')
+    assert response.status_code == 200, response.status_code
+    assert set(response.get_json()['memory_budget']['consumers']) == set(memory['consumers'])
+    print("✓ /api/monitoring/memory and /api/monitoring/status report the memory budget")
+    
+    print("✓ Monitoring routes test PASSED")
+
+
+def test_search_route_caching() -> None:
+    """Test ETag revalidation and compression of /api/search"""
+    print(f"\n{'='*70}")
+    print("TEST: Search Route HTTP Caching")
+    print(f"{'='*70}")
+    
+    try:
+        client = _test_client(monitoring_enabled=False)
+    except ImportError as e:
+        print(f"⚠ Server dependencies not installed ({e}), route test skipped")
+        return
+    
+    response = client.get('/api/search?q=nyheter+stockholm', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip' and 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['Cache-Control'] == 'public, max-age=60'
+    etag = response.headers['ETag']
+    
+    response = client.get('/api/search?q=Stockholm+nyheter', headers={'If-None-Match': etag})
+    assert response.status_code == 304 and response.headers['ETag'] == etag
+    print("✓ Revalidation with a current ETag answers 304 Not Modified")
+    
+    response = client.get('/api/monitoring/status')
+    assert response.status_code == 400, "Monitoring disabled"
+    
+    print("✓ Search route caching test PASSED")
+
+
+def main():
+    """Run all server route tests"""
+    try:
+        print("="*70)
+        print("SERVER ROUTES TEST SUITE")
+        print("="*70)
+        
+        test_monitoring_routes()
+        test_search_route_caching()
+        
+        print(f"\n{'='*70}")
+        print("✓ ALL SERVER ROUTE TESTS PASSED!")
+        print(f"{'='*70}")
+        
+        return 0
+    
+    except Exception as e:
+        print(f"\n✗ TEST FAILED: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())